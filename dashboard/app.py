@@ -5,13 +5,18 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+from contextlib import contextmanager
 from pathlib import Path
 import sys
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+# Les tables chargées sont partagées entre sessions (st.cache_resource) :
+# avec Copy-on-Write, tranches et colonnes sont des vues, et une écriture
+# éventuelle copie au lieu de modifier les données des autres sessions
+pd.options.mode.copy_on_write = True
+
 # Configuration page
 st.set_page_config(
     page_title="EpiSight — Dashboard Épidémiologique",
@@ -24,9 +29,24 @@ st.set_page_config(
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 BASE_PATH = Path(__file__).parent.parent
 
+from stockage import lire_table, lister_departements, version_donnees
+from index_temporel import IndexTemporel
+from sous_echantillonnage import decimer, LARGEUR_COLONNE
+from cache_figures import CacheFigures
+from table_departements import TableDepartements
+from vagues_departements import IndexVagues
+from alertes_departements import IndexAlertes, NIVEAUX
+from cube_territoires import CubeTerritoires, territoires
+from decalages import CIBLES, DECALAGE_MAX, NATIONAL, correlations_croisees, meilleurs_decalages
+from scenarios_reanimation import (MoteurScenarios, CAPACITE_REA_NORMALE, DUREE_SEJOUR,
+                                   TRAJECTOIRES, TRAJECTOIRES_DEPARTEMENTS, capacites_departements)
+from predictions import NOMS_MOTEURS, lire_artefact
+
+# Le pipeline (requests, pyarrow.csv, scipy) n'est importé qu'au premier
+# lancement, quand les données sont absentes — pas à chaque démarrage
 try:
-    from data_loader import pipeline_complet
     if not (BASE_PATH / "data" / "processed" / "indicateurs_tests.csv").exists():
+        from data_loader import pipeline_complet
         with st.spinner("⏳ Téléchargement et préparation des données (2-3 min)..."):
             pipeline_complet(BASE_PATH)
         st.rerun()
@@ -111,24 +131,25 @@ html, body, [class*="css"] {
     font-size: 0.8rem !important;
 }
 
-/* ── Onglets ── */
-[data-testid="stTabs"] [data-baseweb="tab-list"] {
+/* ── Onglets (radio horizontal, clé 'onglet') ── */
+.st-key-onglet [role="radiogroup"] {
     background: var(--glass) !important;
     border-radius: 12px !important;
     border: 1px solid var(--border) !important;
     padding: 4px !important;
     gap: 4px !important;
 }
-[data-testid="stTabs"] [data-baseweb="tab"] {
+.st-key-onglet label {
     background: transparent !important;
     color: var(--text-muted) !important;
     border-radius: 8px !important;
     font-weight: 500 !important;
     font-size: 0.9rem !important;
     padding: 8px 16px !important;
+    margin: 0 !important;
     transition: all 0.2s ease !important;
 }
-[data-testid="stTabs"] [aria-selected="true"] {
+.st-key-onglet label:has(input:checked) {
     background: var(--primary) !important;
     color: white !important;
     box-shadow: 0 0 16px rgba(230, 92, 92, 0.35) !important;
@@ -205,19 +226,260 @@ hr {
 """, unsafe_allow_html=True)
 
 
+#  Chronométrage des sections (lu par dashboard/banc_de_charge.py)
+st.session_state['chronos'] = {}
+
+@contextmanager
+def chrono(section: str):
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        st.session_state['chronos'][section] = time.perf_counter() - debut
+
+
 #  Chargement des données
+# Parquet si disponible (python src/stockage.py), sinon repli CSV
+# Une seule copie par processus, référencée par toutes les sessions
+COLONNES_DEP = ['dep', 'jour', 'cas_positifs', 'cas_mm7_dep',
+                'taux_incidence', 'taux_positivite']
+
+# Version des données : change à chaque écriture dans data/processed (pipeline,
+# scripts src/). Les tables nationales et leurs index y sont indexés ; les autres
+# chargements et calculs en cache sont vidés une fois, pour toutes les sessions
+VERSION_DONNEES = version_donnees(BASE_PATH / "data" / "processed")
+
+@st.cache_resource
+def version_servie() -> dict:
+    # Dernière version des données servie par ce processus
+    return {}
+
+if version_servie().setdefault('version', VERSION_DONNEES) != VERSION_DONNEES:
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    version_servie()['version'] = VERSION_DONNEES
+# Lue par le cache des figures, partagé entre sessions (voir cache_de_figures)
+st.session_state['version_donnees'] = VERSION_DONNEES
+
+@st.cache_resource
+def charger_donnees(version: str):
+    base = Path(__file__).parent.parent / "data" / "processed"
+    tests_nat = lire_table("indicateurs_tests", base)
+    hosp_nat  = lire_table("indicateurs_hosp",  base)
+    vacc_nat  = lire_table("indicateurs_vacc",  base)
+    vagues    = lire_table("vagues_detectees",  base)
+    deps      = lister_departements("tests_par_dep", base)
+    return tests_nat, hosp_nat, vacc_nat, deps, vagues
+
+@st.cache_resource
+def table_departements():
+    # Table compacte partagée par toutes les sessions (codes dep, int32/float32) :
+    # un département = une tranche contiguë, sans filtre sur des chaînes
+    base = Path(__file__).parent.parent / "data" / "processed"
+    return TableDepartements.depuis_dataframe(lire_table("tests_par_dep", base, colonnes=COLONNES_DEP))
+
+def charger_departement(dep: str):
+    return table_departements().departement(dep)
+
+@st.cache_resource
+def index_vagues_departements():
+    # Produit par le pipeline (ou python src/vagues_departements.py) — None si absent
+    base = Path(__file__).parent.parent / "data" / "processed"
+    if not (base / "vagues_departements.csv").exists():
+        return None
+    return IndexVagues(lire_table("vagues_departements", base))
+
+@st.cache_resource
+def index_rt(dep: str = None):
+    # Produit par le pipeline (ou python src/reproduction.py) — None si absent
+    base = Path(__file__).parent.parent / "data" / "processed"
+    nom = "rt_national" if dep is None else "rt_par_dep"
+    if not (base / f"{nom}.csv").exists():
+        return None
+    rt = lire_table(nom, base) if dep is None else lire_table(nom, base, deps=[dep])
+    return IndexTemporel(rt.dropna(subset=['rt']))
+
+@st.cache_resource
+def index_alertes():
+    # Produit par le pipeline (ou python src/alertes_departements.py) — None si absent.
+    # Niveaux de tous les départements reconstitués une fois : « au jour J » = un masque
+    base = Path(__file__).parent.parent / "data" / "processed"
+    if not (base / "alertes_departements.csv").exists():
+        return None
+    return IndexAlertes(lire_table("alertes_departements", base),
+                        tests_nat['jour'].min(), tests_nat['jour'].max())
+
+@st.cache_resource
+def charger_decalages():
+    # Produit par le pipeline (ou python src/decalages.py) — None si absent
+    base = Path(__file__).parent.parent / "data" / "processed"
+    if not (base / "decalages.csv").exists():
+        return None
+    return lire_table("decalages", base)
+
 @st.cache_data
-def charger_donnees():
+def correlations_nationales(debut, fin) -> pd.DataFrame:
+    """Corrélation cas → cible pour chaque décalage, séries nationales de la période (une FFT)"""
+    series = (index_tests.tranche(debut, fin).set_index('jour')[['cas_mm7']]
+              .join(index_hosp.tranche(debut, fin).set_index('jour'), how='inner'))
+    colonnes = [c for _, c, _ in CIBLES.values()]
+    if len(series) == 0 or not set(colonnes) <= set(series.columns):
+        # Période sans données hospitalières (elles s'arrêtent avant les tests) :
+        # corrélations NaN, affichées « — » comme une série trop courte
+        return pd.DataFrame(np.full((DECALAGE_MAX + 1, len(CIBLES)), np.nan), columns=list(CIBLES))
+    correlations = correlations_croisees(series['cas_mm7'].to_numpy(dtype=float),
+                                         series[colonnes].to_numpy(dtype=float).T)
+    return pd.DataFrame(correlations.T, columns=list(CIBLES))
+
+@st.cache_resource
+def cube_territorial(frequence: str = 'jour'):
+    # Produit par le pipeline (ou python src/cube_territoires.py) — None si absent
     base = Path(__file__).parent.parent / "data" / "processed"
-    tests_nat = pd.read_csv(base / "indicateurs_tests.csv",  parse_dates=['jour'])
-    hosp_nat  = pd.read_csv(base / "indicateurs_hosp.csv",   parse_dates=['jour'])
-    vacc_nat  = pd.read_csv(base / "indicateurs_vacc.csv",   parse_dates=['jour'])
-    tests_dep = pd.read_csv(base / "tests_par_dep.csv",      parse_dates=['jour'])
-    vagues    = pd.read_csv(base / "vagues_detectees.csv",   parse_dates=['debut','fin'])
-    tests_dep['dep'] = tests_dep['dep'].astype(str).str.zfill(2)
-    return tests_nat, hosp_nat, vacc_nat, tests_dep, vagues
+    nom = "cube_jour" if frequence == 'jour' else "cube_semaine"
+    if not (base / f"{nom}.csv").exists():
+        return None
+    return CubeTerritoires(lire_table(nom, base), frequence)
+
+@st.cache_data(max_entries=32)
+def comparaison_territoires(frequence: str, debut, fin) -> pd.DataFrame:
+    """Régions et groupes sur la période, tous en un produit matriciel"""
+    cube = cube_territorial(frequence)
+    return cube.comparer(territoires(cube.deps), debut, fin)
+
+def vagues_departement(dep: str, debut, fin) -> pd.DataFrame:
+    """Vagues locales du département qui chevauchent la période (vide si index absent)"""
+    index = index_vagues_departements()
+    if index is None:
+        return pd.DataFrame(columns=['debut', 'fin', 'pic', 'pic_cas'])
+    return index.vagues(dep, debut, fin)
+
+@st.cache_resource
+def charger_predictions_dep():
+    # Produit par : python src/predictions.py --departements
+    chemin = Path(__file__).parent.parent / "data" / "processed" / "predictions_dep_7j.csv"
+    if not chemin.exists():
+        return None
+    pred_dep = pd.read_csv(chemin, parse_dates=['date'], dtype={'dep': str})
+    if 'moteur' not in pred_dep.columns:
+        # Fichier antérieur à la colonne moteur : seul Prophet les produisait
+        pred_dep['moteur'] = 'prophet'
+    return pred_dep
+
+@st.cache_resource
+def charger_predictions():
+    # Produit par : python src/predictions.py
+    chemin = Path(__file__).parent.parent / "data" / "processed" / "predictions_7j.csv"
+    if not chemin.exists():
+        return None
+    pred = pd.read_csv(chemin, parse_dates=['date'])
+    if 'moteur' not in pred.columns:
+        # Fichier antérieur à la colonne moteur : seul Prophet le produisait
+        pred['moteur'] = 'prophet'
+    return pred
+
+@st.cache_resource
+def charger_artefact_previsions():
+    # Produit par : python src/predictions.py --lot — (predictions, metadonnees)
+    # de la version la plus récente, None si aucun artefact
+    return lire_artefact(Path(__file__).parent.parent / "data" / "processed")
+
+def metriques_lot(metadonnees: dict) -> list:
+    """Indicateurs du lot prévus sans erreur, dans l'ordre d'affichage"""
+    return [m for m in METRIQUES_PREVUES
+            if m in metadonnees['metriques'] and metadonnees['metriques'][m]['erreur'] is None]
+
+def lot_previsions():
+    """Dernier lot s'il contient au moins un indicateur prévu, sinon None (repli predictions_7j.csv)"""
+    artefact = charger_artefact_previsions()
+    if artefact is None or not metriques_lot(artefact[1]):
+        return None
+    return artefact
+
+def moteur_precalcule() -> str:
+    """Moteur des prévisions pré-calculées affichées : celui du lot, sinon celui de predictions_7j.csv"""
+    lot = lot_previsions()
+    if lot is not None:
+        return lot[1]['moteur']
+    pred = charger_predictions()
+    return 'prophet' if pred is None else pred['moteur'].iloc[0]
+
+@st.cache_resource
+def moteur_scenarios(departements: bool = False):
+    # Part de la prévision des cas (python src/predictions.py [--departements]) — None si absente
+    base = Path(__file__).parent.parent / "data" / "processed"
+    if not departements:
+        previsions = charger_predictions()
+        if previsions is None:
+            return None
+        return MoteurScenarios(tests_nat[['jour', 'cas_mm7']].rename(columns={'cas_mm7': 'cas'}).assign(dep=NATIONAL),
+                               hosp_nat[['jour', 'reanimation']].assign(dep=NATIONAL),
+                               previsions.assign(dep=NATIONAL))
+    previsions = charger_predictions_dep()
+    if previsions is None:
+        return None
+    return MoteurScenarios(
+        lire_table("tests_par_dep", base, colonnes=['dep', 'jour', 'cas_mm7_dep']).rename(columns={'cas_mm7_dep': 'cas'}),
+        lire_table("hospitalisations_clean", base, colonnes=['dep', 'jour', 'reanimation']),
+        previsions)
+
+@st.cache_resource
+def populations_departements() -> pd.Series:
+    base = Path(__file__).parent.parent / "data" / "processed"
+    return lire_table("tests_par_dep", base, colonnes=['dep', 'population']).groupby('dep')['population'].first()
+
+def capacite_territoire(territoire: str, capacite: int) -> float:
+    """Lits du territoire : capacité nationale, répartie au prorata de la population par département"""
+    if territoire == NATIONAL:
+        return capacite
+    return capacites_departements(populations_departements(), capacite)[territoire]
+
+@st.cache_data(max_entries=64)
+def scenario_reanimation(territoire: str, multiplicateur: float, duree_sejour: int, capacite: int):
+    """TRAJECTOIRES trajectoires du territoire, mémoïsées par position des curseurs"""
+    moteur = moteur_scenarios(departements=territoire != NATIONAL)
+    return moteur.simuler(multiplicateur, duree_sejour, capacite_territoire(territoire, capacite),
+                          territoires=[territoire])
+
+@st.cache_data(max_entries=16)
+def scenarios_departements(multiplicateur: float, duree_sejour: int, capacite: int) -> pd.DataFrame:
+    """Tous les départements en un lot : pire jour et pic médian de chacun"""
+    moteur = moteur_scenarios(departements=True)
+    capacites = capacites_departements(populations_departements(), capacite)[moteur.territoires]
+    scenario = moteur.simuler(multiplicateur, duree_sejour, capacites.to_numpy(),
+                              trajectoires=TRAJECTOIRES_DEPARTEMENTS, quantiles=(50,))
+    pire = scenario.loc[scenario.groupby('dep')['p_depassement'].idxmax()].set_index('dep')
+    return pd.DataFrame({
+        'capacite': pire['capacite'],
+        'p_max': pire['p_depassement'],
+        'jour_critique': pire['jour'],
+        'pic_median': scenario.groupby('dep')['occupation_q50'].max(),
+    }).sort_values('p_max', ascending=False).reset_index()
 
-tests_nat, hosp_nat, vacc_nat, tests_dep, vagues = charger_donnees()
+@st.cache_data
+def prevision_temps_reel(historique: pd.DataFrame, horizon: int):
+    from prevision_rapide import prevoir
+    return prevoir(historique, horizon, colonne='cas_mm7')
+
+# Index construits une fois par processus et partagés en lecture seule entre sessions :
+# tranches par période et KPI sans masque booléen ni copie à chaque interaction
+@st.cache_resource
+def construire_index(version: str):
+    tests_nat, hosp_nat, vacc_nat, _, _ = charger_donnees(version)
+    return (IndexTemporel(tests_nat, sommes=['cas_positifs'], extremums=['cas_mm7']),
+            IndexTemporel(hosp_nat, extremums=['hospitalises', 'reanimation']),
+            IndexTemporel(vacc_nat, extremums=['couv_complet_pct']))
+
+@st.cache_resource
+def index_departement(dep: str):
+    return IndexTemporel(charger_departement(dep),
+                         sommes=['cas_positifs', 'taux_positivite'],
+                         extremums=['taux_incidence', 'taux_positivite'])
+
+with chrono('chargement'):
+    tests_nat, hosp_nat, vacc_nat, deps, vagues = charger_donnees(VERSION_DONNEES)
+    index_tests, index_hosp, index_vacc = construire_index(VERSION_DONNEES)
+# Pics de vague conservés exactement par le sous-échantillonnage des courbes
+intervalles_vagues = list(zip(vagues['debut'], vagues['fin']))
 
 # Thème Plotly
 PLOTLY_THEME = dict(
@@ -229,6 +491,684 @@ PLOTLY_THEME = dict(
     yaxis=dict(gridcolor="rgba(255,255,255,0.05)", linecolor="rgba(255,255,255,0.1)"),
 )
 
+# Figures mémoïsées : une figure n'est reconstruite que si ses entrées
+# (période, département, moteur…) ou la version des données changent.
+# Le cache vit plus longtemps qu'une exécution du script : la version est relue
+# dans la session à chaque figure, pas capturée à la création du cache
+@st.cache_resource
+def cache_de_figures():
+    return CacheFigures(taille_max_mo=64, version=lambda: st.session_state.get('version_donnees'))
+
+figures = cache_de_figures()
+
+@figures.memoiser
+def figure_cas(debut, fin):
+    t = index_tests.tranche(debut, fin)
+    fig_cas = go.Figure()
+    for _, vague in vagues.iterrows():
+        if vague['debut'] >= debut and vague['fin'] <= fin:
+            fig_cas.add_vrect(x0=vague['debut'], x1=vague['fin'],
+                              fillcolor="rgba(230,92,92,0.07)",
+                              layer="below", line_width=0)
+
+    # Séries longues : ~1 point tous les 2 px envoyé au navigateur
+    brut = decimer(t, 'cas_positifs', methode='min_max')
+    mm7 = decimer(t, 'cas_mm7', intervalles=intervalles_vagues)
+    fig_cas.add_trace(go.Scatter(
+        x=brut['jour'], y=brut['cas_positifs'], mode='lines',
+        line=dict(color='rgba(230,92,92,0.2)', width=1),
+        name='Données brutes',
+        hovertemplate='%{x|%d/%m/%Y}<br>Brut : %{y:,.0f}<extra></extra>'
+    ))
+    fig_cas.add_trace(go.Scatter(
+        x=mm7['jour'], y=mm7['cas_mm7'], mode='lines',
+        line=dict(color='#e65c5c', width=2.5),
+        name='Moyenne mobile 7j',
+        hovertemplate='%{x|%d/%m/%Y}<br>MM7 : %{y:,.0f}<extra></extra>'
+    ))
+    fig_cas.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Cas positifs quotidiens (zones = vagues épidémiques)",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="Cas / jour",
+        hovermode='x unified', height=400,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_cas
+
+@figures.memoiser
+def figure_positivite(debut, fin):
+    tp = decimer(index_tests.tranche(debut, fin), 'tp_mm7', seuils=(5,),
+                 intervalles=intervalles_vagues)
+    fig_tp = go.Figure()
+    fig_tp.add_trace(go.Scatter(
+        x=tp['jour'], y=tp['tp_mm7'], mode='lines',
+        fill='tozeroy',
+        line=dict(color='#f97316', width=2),
+        fillcolor='rgba(249,115,22,0.12)',
+        name='Taux positivité MM7',
+        hovertemplate='%{x|%d/%m/%Y}<br>Taux : %{y:.1f}%<extra></extra>'
+    ))
+    fig_tp.add_hline(y=5, line_dash="dash", line_color="rgba(230,92,92,0.6)",
+                     annotation_text="Seuil alerte 5%",
+                     annotation_font_color="#e65c5c",
+                     annotation_position="bottom right")
+    fig_tp.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Taux de positivité — Moyenne mobile 7 jours",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="Taux (%)",
+        height=340, hovermode='x unified',
+        legend=dict(bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_tp
+
+@figures.memoiser
+def figure_hospitalisations(debut, fin):
+    hosp = decimer(index_hosp.tranche(debut, fin), 'hosp_mm7', largeur_px=LARGEUR_COLONNE,
+                   intervalles=intervalles_vagues)
+    fig_hosp = go.Figure()
+    fig_hosp.add_trace(go.Scatter(
+        x=hosp['jour'], y=hosp['hosp_mm7'], mode='lines',
+        fill='tozeroy',
+        line=dict(color='#3b82f6', width=2),
+        fillcolor='rgba(59,130,246,0.12)',
+        name='Hospitalisés MM7',
+        hovertemplate='%{x|%d/%m/%Y}<br>Hospitalisés : %{y:,.0f}<extra></extra>'
+    ))
+    fig_hosp.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Patients hospitalisés (MM7)",
+                   font=dict(size=13, color="#94a3b8")),
+        height=340, hovermode='x unified',
+        legend=dict(bgcolor="rgba(0,0,0,0)")
+    )
+    return fig_hosp
+
+@figures.memoiser
+def figure_reanimation(debut, fin):
+    rea = decimer(index_hosp.tranche(debut, fin), 'rea_mm7', largeur_px=LARGEUR_COLONNE,
+                  seuils=(5000,), intervalles=intervalles_vagues)
+    fig_rea = go.Figure()
+    fig_rea.add_trace(go.Scatter(
+        x=rea['jour'], y=rea['rea_mm7'], mode='lines',
+        fill='tozeroy',
+        line=dict(color='#a855f7', width=2),
+        fillcolor='rgba(168,85,247,0.12)',
+        name='Réanimation MM7',
+        hovertemplate='%{x|%d/%m/%Y}<br>Réanimation : %{y:,.0f}<extra></extra>'
+    ))
+    fig_rea.add_hline(y=5000, line_dash="dash",
+                      line_color="rgba(230,92,92,0.5)",
+                      annotation_text="Capacité normale (~5 000)",
+                      annotation_font_color="#e65c5c",
+                      annotation_position="bottom right")
+    fig_rea.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Patients en réanimation (MM7)",
+                   font=dict(size=13, color="#94a3b8")),
+        height=340, hovermode='x unified',
+        legend=dict(bgcolor="rgba(0,0,0,0)")
+    )
+    return fig_rea
+
+@figures.memoiser
+def figure_scenario(territoire, multiplicateur, duree_sejour, capacite):
+    from plotly.subplots import make_subplots
+
+    scenario = scenario_reanimation(territoire, multiplicateur, duree_sejour, capacite)
+    observe = moteur_scenarios(departements=territoire != NATIONAL).occupation_recente[territoire]
+    fig_scenario = make_subplots(
+        rows=2, cols=1, shared_xaxes=True, row_heights=[0.68, 0.32],
+        subplot_titles=(f"Patients en réanimation — {TRAJECTOIRES:,} trajectoires".replace(",", " "),
+                        "Probabilité de dépasser la capacité (%)"),
+        vertical_spacing=0.1
+    )
+    fig_scenario.update_layout(
+        **PLOTLY_THEME,
+        height=520, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.04,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    fig_scenario.add_trace(go.Scatter(
+        x=observe.index, y=observe, mode='lines',
+        line=dict(color='#a855f7', width=2),
+        name='Observé',
+        hovertemplate='%{x|%d/%m/%Y}<br>Observé : %{y:,.0f}<extra></extra>'
+    ), row=1, col=1)
+    fig_scenario.add_trace(go.Scatter(
+        x=pd.concat([scenario['jour'], scenario['jour'].iloc[::-1]]),
+        y=pd.concat([scenario['occupation_q95'], scenario['occupation_q05'].iloc[::-1]]),
+        fill='toself',
+        fillcolor='rgba(168,85,247,0.15)',
+        line=dict(color='rgba(255,255,255,0)'),
+        name='90% des trajectoires',
+        hoverinfo='skip'
+    ), row=1, col=1)
+    fig_scenario.add_trace(go.Scatter(
+        x=scenario['jour'], y=scenario['occupation_q50'], mode='lines',
+        line=dict(color='#a855f7', width=2, dash='dot'),
+        name='Médiane simulée',
+        hovertemplate='%{x|%d/%m/%Y}<br>Médiane : %{y:,.0f}<extra></extra>'
+    ), row=1, col=1)
+    fig_scenario.add_hline(y=scenario['capacite'].iloc[0], line_dash="dash",
+                           line_color="rgba(230,92,92,0.6)",
+                           annotation_text=f"Capacité ({scenario['capacite'].iloc[0]:,.0f})".replace(",", " "),
+                           annotation_font_color="#e65c5c",
+                           row=1, col=1)
+    fig_scenario.add_trace(go.Bar(
+        x=scenario['jour'], y=scenario['p_depassement'] * 100,
+        marker_color='rgba(230,92,92,0.6)',
+        name='P(dépassement)',
+        hovertemplate='%{x|%d/%m/%Y}<br>P(dépassement) : %{y:.1f} %<extra></extra>'
+    ), row=2, col=1)
+    fig_scenario.update_yaxes(range=[0, 100], row=2, col=1)
+    return fig_scenario
+
+@figures.memoiser
+def figure_deces(debut, fin):
+    deces = decimer(index_hosp.tranche(debut, fin), 'deces_mm7', intervalles=intervalles_vagues)
+    fig_dc = go.Figure()
+    fig_dc.add_trace(go.Scatter(
+        x=deces['jour'], y=deces['deces_mm7'], mode='lines',
+        fill='tozeroy',
+        line=dict(color='#64748b', width=2),
+        fillcolor='rgba(100,116,139,0.12)',
+        name='Décès MM7',
+        hovertemplate='%{x|%d/%m/%Y}<br>Décès : %{y:.1f}<extra></extra>'
+    ))
+    fig_dc.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Décès quotidiens — Moyenne mobile 7 jours",
+                   font=dict(size=13, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="Décès / jour",
+        height=300, hovermode='x unified',
+        legend=dict(bgcolor="rgba(0,0,0,0)")
+    )
+    return fig_dc
+
+@figures.memoiser
+def figure_vaccination(debut, fin):
+    v = index_vacc.tranche(debut, fin)
+    fig_vacc = go.Figure()
+    couleurs_vacc = ['#10b981', '#34d399', '#6ee7b7']
+    labels_vacc   = ['1ère dose', 'Schéma complet', 'Rappel']
+    cols_vacc     = ['couv_dose1_pct', 'couv_complet_pct', 'couv_rappel_pct']
+
+    for col, label, couleur in zip(cols_vacc, labels_vacc, couleurs_vacc):
+        couverture = decimer(v, col, seuils=(70,))
+        fig_vacc.add_trace(go.Scatter(
+            x=couverture['jour'], y=couverture[col], mode='lines',
+            line=dict(color=couleur, width=2.5),
+            name=label,
+            hovertemplate=f'%{{x|%d/%m/%Y}}<br>{label} : %{{y:.1f}}%<extra></extra>'
+        ))
+
+    fig_vacc.add_hline(y=70, line_dash="dot",
+                       line_color="rgba(255,255,255,0.2)",
+                       annotation_text="Objectif immunité collective 70%",
+                       annotation_font_color="#94a3b8",
+                       annotation_position="bottom right")
+    fig_vacc.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Couverture vaccinale — Population française (%)",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="% population",
+        height=400, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_vacc
+
+@figures.memoiser
+def figure_doses(debut, fin):
+    v = index_vacc.tranche(debut, fin)
+    fig_doses = go.Figure()
+    fig_doses.add_trace(go.Bar(
+        x=v['jour'], y=v['doses_jour'],
+        marker_color='rgba(16,185,129,0.5)',
+        marker_line_color='rgba(16,185,129,0.8)',
+        marker_line_width=0.5,
+        name='Doses quotidiennes',
+        hovertemplate='%{x|%d/%m/%Y}<br>Doses : %{y:,}<extra></extra>'
+    ))
+    fig_doses.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Doses administrées par jour",
+                   font=dict(size=13, color="#94a3b8")),
+        height=280, hovermode='x unified',
+        legend=dict(bgcolor="rgba(0,0,0,0)")
+    )
+    return fig_doses
+
+@figures.memoiser
+def figure_departement(dep, debut, fin):
+    from plotly.subplots import make_subplots
+
+    dep_data = index_departement(dep).tranche(debut, fin)
+    vagues_dep = vagues_departement(dep, debut, fin)
+    fig_dep = make_subplots(
+        rows=2, cols=1, shared_xaxes=True,
+        subplot_titles=('Taux d\'incidence (cas/100k hab., 7j glissants — zones = vagues locales)',
+                        'Taux de positivité (%)'),
+        vertical_spacing=0.12
+    )
+    fig_dep.update_layout(
+        **PLOTLY_THEME,
+        height=520, hovermode='x unified', showlegend=False
+    )
+
+    # Vagues lues dans l'index (aucune détection à l'affichage), bornées à la période
+    for vague in vagues_dep.itertuples():
+        fig_dep.add_vrect(x0=max(vague.debut, debut), x1=min(vague.fin, fin),
+                          fillcolor="rgba(230,92,92,0.07)",
+                          layer="below", line_width=0, row="all", col=1)
+
+    incidence = decimer(dep_data, 'taux_incidence', seuils=(50, 150, 250),
+                        intervalles=list(zip(vagues_dep['debut'], vagues_dep['fin'])))
+    fig_dep.add_trace(go.Scatter(
+        x=incidence['jour'], y=incidence['taux_incidence'],
+        mode='lines', fill='tozeroy',
+        line=dict(color='#e65c5c', width=2),
+        fillcolor='rgba(230,92,92,0.1)',
+        hovertemplate='%{x|%d/%m/%Y}<br>TI : %{y:.1f}/100k<extra></extra>'
+    ), row=1, col=1)
+
+    for seuil, label, couleur in [
+        (50,  "Alerte",          "rgba(249,115,22,0.5)"),
+        (150, "Alerte renforcée","rgba(230,92,92,0.5)"),
+        (250, "Urgence",         "rgba(220,38,38,0.7)")
+    ]:
+        fig_dep.add_hline(y=seuil, line_dash="dash",
+                          line_color=couleur, opacity=0.6,
+                          annotation_text=label,
+                          annotation_font_color=couleur,
+                          row=1, col=1)
+
+    positivite = decimer(dep_data, 'taux_positivite', methode='min_max', seuils=(5,))
+    fig_dep.add_trace(go.Scatter(
+        x=positivite['jour'], y=positivite['taux_positivite'],
+        mode='lines', fill='tozeroy',
+        line=dict(color='#f97316', width=2),
+        fillcolor='rgba(249,115,22,0.1)',
+        hovertemplate='%{x|%d/%m/%Y}<br>TP : %{y:.1f}%<extra></extra>'
+    ), row=2, col=1)
+
+    fig_dep.add_hline(y=5, line_dash="dash",
+                      line_color="rgba(230,92,92,0.5)",
+                      annotation_text="Seuil 5%",
+                      annotation_font_color="#e65c5c",
+                      row=2, col=1)
+    return fig_dep
+
+@figures.memoiser
+def figure_territoire(nom, deps, frequence, debut, fin):
+    from plotly.subplots import make_subplots
+
+    serie = cube_territorial(frequence).territoire(list(deps), debut, fin)
+    unite = "7 j glissants" if frequence == 'jour' else "par semaine"
+    fig_territoire = make_subplots(
+        rows=3, cols=1, shared_xaxes=True,
+        subplot_titles=(f"Taux d'incidence (cas/100k hab., {unite})",
+                        f"Taux de positivité (%, {unite})",
+                        "Patients hospitalisés et en réanimation"),
+        vertical_spacing=0.08
+    )
+    fig_territoire.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text=f"{nom} — {len(deps)} département(s)", font=dict(size=14, color="#94a3b8")),
+        height=700, hovermode='x unified', showlegend=False
+    )
+
+    incidence = decimer(serie, 'taux_incidence', seuils=(50, 150, 250))
+    fig_territoire.add_trace(go.Scatter(
+        x=incidence['jour'], y=incidence['taux_incidence'],
+        mode='lines', fill='tozeroy',
+        line=dict(color='#e65c5c', width=2),
+        fillcolor='rgba(230,92,92,0.1)',
+        hovertemplate='%{x|%d/%m/%Y}<br>TI : %{y:.1f}/100k<extra></extra>'
+    ), row=1, col=1)
+    for seuil, couleur in [(50, "rgba(249,115,22,0.5)"), (150, "rgba(230,92,92,0.5)"),
+                           (250, "rgba(220,38,38,0.7)")]:
+        fig_territoire.add_hline(y=seuil, line_dash="dash", line_color=couleur, opacity=0.6,
+                                 row=1, col=1)
+
+    positivite = decimer(serie, 'taux_positivite', seuils=(5,))
+    fig_territoire.add_trace(go.Scatter(
+        x=positivite['jour'], y=positivite['taux_positivite'],
+        mode='lines', fill='tozeroy',
+        line=dict(color='#f97316', width=2),
+        fillcolor='rgba(249,115,22,0.1)',
+        hovertemplate='%{x|%d/%m/%Y}<br>TP : %{y:.1f}%<extra></extra>'
+    ), row=2, col=1)
+    fig_territoire.add_hline(y=5, line_dash="dash", line_color="rgba(230,92,92,0.5)", row=2, col=1)
+
+    for colonne, libelle, couleur in [('hospitalises', "Hospitalisés", '#3b82f6'),
+                                      ('reanimation', "Réanimation", '#a855f7')]:
+        stock = decimer(serie, colonne)
+        fig_territoire.add_trace(go.Scatter(
+            x=stock['jour'], y=stock[colonne], mode='lines',
+            line=dict(color=couleur, width=2),
+            hovertemplate=f'%{{x|%d/%m/%Y}}<br>{libelle} : %{{y:,.0f}}<extra></extra>'
+        ), row=3, col=1)
+    return fig_territoire
+
+@figures.memoiser
+def figure_prediction_departement(dep):
+    pred_dep = charger_predictions_dep()
+    pred_dep = pred_dep[pred_dep['dep'] == dep]
+    nom_moteur = NOMS_MOTEURS.get(pred_dep['moteur'].iloc[0], pred_dep['moteur'].iloc[0])
+    historique_dep = index_departement(dep).df.tail(30)
+
+    fig_pred_dep = go.Figure()
+    fig_pred_dep.add_trace(go.Scatter(
+        x=historique_dep['jour'], y=historique_dep['cas_mm7_dep'],
+        mode='lines', line=dict(color='#e65c5c', width=2.5),
+        name='Historique (MM7)',
+        hovertemplate='%{x|%d/%m/%Y}<br>Réel : %{y:,.0f}<extra></extra>'
+    ))
+    fig_pred_dep.add_trace(go.Scatter(
+        x=pd.concat([pred_dep['date'], pred_dep['date'].iloc[::-1]]),
+        y=pd.concat([pred_dep['borne_haute'], pred_dep['borne_basse'].iloc[::-1]]),
+        fill='toself',
+        fillcolor='rgba(59,130,246,0.12)',
+        line=dict(color='rgba(255,255,255,0)'),
+        name='Intervalle confiance 95%',
+        hoverinfo='skip'
+    ))
+    fig_pred_dep.add_trace(go.Scatter(
+        x=pred_dep['date'], y=pred_dep['prediction'],
+        mode='lines+markers',
+        line=dict(color='#3b82f6', width=2.5, dash='dash'),
+        marker=dict(size=7, color='#3b82f6'),
+        name=f'Prédiction {nom_moteur}',
+        hovertemplate='%{x|%d/%m/%Y}<br>Prédit : %{y:,.0f}<extra></extra>'
+    ))
+    fig_pred_dep.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text=f"Prédiction des cas positifs — département {dep}, 7 prochains jours",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="Cas / jour (MM7)",
+        height=360, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_pred_dep
+
+@figures.memoiser
+def figure_rt(dep, debut, fin):
+    rt = decimer(index_rt(dep).tranche(debut, fin), 'rt', seuils=(1,))
+    territoire = "France entière" if dep is None else f"département {dep}"
+    fig_rt = go.Figure()
+    fig_rt.add_trace(go.Scatter(
+        x=pd.concat([rt['jour'], rt['jour'].iloc[::-1]]),
+        y=pd.concat([rt['rt_haut'], rt['rt_bas'].iloc[::-1]]),
+        fill='toself',
+        fillcolor='rgba(168,85,247,0.15)',
+        line=dict(color='rgba(255,255,255,0)'),
+        name='Intervalle de crédibilité 95%',
+        hoverinfo='skip'
+    ))
+    fig_rt.add_trace(go.Scatter(
+        x=rt['jour'], y=rt['rt'], mode='lines',
+        line=dict(color='#a855f7', width=2),
+        name='Rt',
+        hovertemplate='%{x|%d/%m/%Y}<br>Rt : %{y:.2f}<extra></extra>'
+    ))
+    fig_rt.add_hline(y=1, line_dash="dash", line_color="rgba(230,92,92,0.6)",
+                     annotation_text="Rt = 1",
+                     annotation_font_color="#e65c5c",
+                     annotation_position="bottom right")
+    fig_rt.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text=f"Nombre de reproduction effectif Rt — {territoire} (Cori, fenêtre 7 jours)",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="Rt",
+        height=320, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_rt
+
+@figures.memoiser
+def figure_alertes(debut, fin, jour):
+    historique = index_alertes().historique
+    h = historique[(historique['jour'] >= debut) & (historique['jour'] <= fin)]
+
+    fig_alertes = go.Figure()
+    for libelle, couleur in [("Alerte",           "rgba(249,115,22,0.5)"),
+                             ("Alerte renforcée", "rgba(230,92,92,0.5)"),
+                             ("Urgence",          "rgba(220,38,38,0.7)")]:
+        fig_alertes.add_trace(go.Scatter(
+            x=h['jour'], y=h[libelle], mode='lines', stackgroup='incidence',
+            line=dict(color=couleur, width=1), fillcolor=couleur,
+            name=f"Incidence — {libelle}",
+            hovertemplate=f'%{{x|%d/%m/%Y}}<br>{libelle} : %{{y}} dép.<extra></extra>'
+        ))
+    fig_alertes.add_trace(go.Scatter(
+        x=h['jour'], y=h['> 5 %'], mode='lines',
+        line=dict(color='#f97316', width=2, dash='dot'),
+        name='Positivité > 5 %',
+        hovertemplate='%{x|%d/%m/%Y}<br>Positivité > 5 % : %{y} dép.<extra></extra>'
+    ))
+    if debut <= jour <= fin:
+        fig_alertes.add_vline(x=jour, line_dash="dash", line_color="rgba(255,255,255,0.4)")
+    fig_alertes.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Départements au-dessus des seuils — historique",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="Départements",
+        height=380, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_alertes
+
+COULEURS_CIBLES = {'hosp': '#3b82f6', 'rea': '#e65c5c', 'deces': '#94a3b8'}
+
+@figures.memoiser
+def figure_correlations(debut, fin):
+    correlations = correlations_nationales(debut, fin)
+    fig_ccf = go.Figure()
+    for cible, (libelle, _, _) in CIBLES.items():
+        if cible not in correlations or correlations[cible].isna().all():
+            continue
+        fig_ccf.add_trace(go.Scatter(
+            x=correlations.index, y=correlations[cible], mode='lines+markers',
+            line=dict(color=COULEURS_CIBLES[cible], width=2), marker=dict(size=4),
+            name=libelle.capitalize(),
+            hovertemplate=f'{libelle} à J+%{{x}}<br>r = %{{y:.2f}}<extra></extra>'
+        ))
+    fig_ccf.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text="Corrélation cas (MM7) → cible décalée de k jours — France, période affichée",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title="Décalage (jours)", yaxis_title="Corrélation",
+        height=340, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_ccf
+
+@figures.memoiser
+def figure_decalages_glissants(territoire, debut, fin):
+    decalages = charger_decalages()
+    glissants = decalages[(decalages['dep'] == territoire) & (decalages['portee'] == 'glissante')]
+    # Chaque fenêtre est placée à son milieu
+    milieu = glissants['debut'] + (glissants['fin'] - glissants['debut']) / 2
+    glissants = glissants[(milieu >= debut) & (milieu <= fin)].assign(milieu=milieu)
+
+    if territoire == NATIONAL:
+        zones = vagues[(vagues['fin'] >= debut) & (vagues['debut'] <= fin)]
+    else:
+        zones = vagues_departement(territoire, debut, fin)
+    fig_glissant = go.Figure()
+    for vague in zones.itertuples():
+        fig_glissant.add_vrect(x0=max(vague.debut, debut), x1=min(vague.fin, fin),
+                               fillcolor="rgba(230,92,92,0.07)",
+                               layer="below", line_width=0)
+    for cible, (libelle, _, _) in CIBLES.items():
+        serie = glissants[glissants['cible'] == cible]
+        if serie['decalage_jours'].isna().all():
+            continue
+        fig_glissant.add_trace(go.Scatter(
+            x=serie['milieu'], y=serie['decalage_jours'], mode='lines',
+            line=dict(color=COULEURS_CIBLES[cible], width=2, shape='hv'),
+            customdata=serie['correlation'],
+            name=libelle.capitalize(),
+            hovertemplate=f'%{{x|%d/%m/%Y}}<br>{libelle} : J+%{{y:.0f}} (r = %{{customdata:.2f}})<extra></extra>'
+        ))
+    nom = "France entière" if territoire == NATIONAL else f"département {territoire}"
+    fig_glissant.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text=f"Meilleur décalage sur fenêtres glissantes de 120 jours — {nom} (zones = vagues)",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title="Décalage (jours)",
+        height=340, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    fig_glissant.update_yaxes(range=[-1, DECALAGE_MAX + 1])
+    return fig_glissant
+
+@figures.memoiser
+def figure_distribution_decalages(territoire):
+    decalages = charger_decalages()
+    historiques = decalages[(decalages['portee'] == 'historique') & (decalages['dep'] != NATIONAL)]
+    fig_distribution = go.Figure()
+    for cible, (libelle, _, _) in CIBLES.items():
+        serie = historiques[historiques['cible'] == cible]['decalage_jours'].dropna()
+        if len(serie) == 0:
+            continue
+        fig_distribution.add_trace(go.Histogram(
+            x=serie, xbins=dict(start=-0.5, end=DECALAGE_MAX + 0.5, size=1),
+            marker_color=COULEURS_CIBLES[cible], opacity=0.6,
+            name=libelle.capitalize(),
+            hovertemplate=f'{libelle} à J+%{{x}} : %{{y}} dép.<extra></extra>'
+        ))
+        if territoire != NATIONAL:
+            propre = historiques[(historiques['cible'] == cible) & (historiques['dep'] == territoire)]
+            if len(propre) > 0 and pd.notna(propre['decalage_jours'].iloc[0]):
+                fig_distribution.add_vline(x=propre['decalage_jours'].iloc[0], line_dash="dash",
+                                           line_color=COULEURS_CIBLES[cible])
+    fig_distribution.update_layout(
+        **PLOTLY_THEME,
+        barmode='overlay',
+        title=dict(text="Meilleur décalage par département, historique complet"
+                        + ("" if territoire == NATIONAL else f" (tirets = {territoire})"),
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title="Décalage (jours)", yaxis_title="Départements",
+        height=320,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_distribution
+
+# Indicateur prévu → (titre, axe, colonne du tableau, format)
+METRIQUES_PREVUES = {
+    'cas_mm7':   ("cas positifs",        "Cas / jour (MM7)",           "cas/j",    ',.0f'),
+    'tp_mm7':    ("taux de positivité",  "Taux de positivité (%, MM7)", "%",       '.2f'),
+    'hosp_mm7':  ("hospitalisations",    "Patients hospitalisés (MM7)", "patients", ',.0f'),
+    'rea_mm7':   ("patients en réanimation", "Patients en réa (MM7)",   "patients", ',.0f'),
+    'deces_mm7': ("décès hospitaliers",  "Décès / jour (MM7)",          "décès/j",  ',.0f'),
+}
+
+# Moteur → (nom complet, ce qu'il modélise) pour l'encadré de l'onglet Prédiction
+DESCRIPTIONS_MOTEURS = {
+    'prophet':      ("Prophet (Meta/Facebook)", "Détecte tendances, saisonnalités hebdo et annuelles"),
+    'holt_winters': ("Holt-Winters (lissage exponentiel, NumPy)", "Tendance amortie + saisonnalité hebdomadaire"),
+}
+
+def donnees_prediction(temps_reel, serie_prevue, horizon, debut, fin, metrique='cas_mm7'):
+    """
+    (historique, pred) de l'onglet Prédiction — pred vaut None si indisponible
+
+    Prophet : lecture de l'artefact du lot (indicateur × horizon, sans réentraînement),
+    repli sur predictions_7j.csv (cas, 7 jours) s'il n'a pas encore été produit
+    """
+    pred = None
+    if temps_reel:
+        if serie_prevue == "France entière":
+            historique = index_tests.tranche(debut, fin)[['jour', 'cas_mm7']]
+        else:
+            historique = index_departement(serie_prevue.split()[-1]).tranche(debut, fin)
+            historique = historique[['jour', 'cas_mm7_dep']].rename(columns={'cas_mm7_dep': 'cas_mm7'})
+        if len(historique) >= 14:
+            pred = prevision_temps_reel(historique, horizon)
+    else:
+        source = tests_nat if metrique in tests_nat.columns else hosp_nat
+        historique = source[['jour', metrique]].dropna()
+        artefact = lot_previsions()
+        if artefact is not None:
+            previsions, _ = artefact
+            pred = previsions[(previsions['metrique'] == metrique) & (previsions['echeance'] <= horizon)]
+            pred = pred[['date', 'prediction', 'borne_basse', 'borne_haute']].reset_index(drop=True)
+        elif metrique == 'cas_mm7' and charger_predictions() is not None:
+            pred = charger_predictions()[['date', 'prediction', 'borne_basse', 'borne_haute']]
+    return historique, pred
+
+@figures.memoiser
+def figure_prediction(temps_reel, serie_prevue, horizon, debut, fin, metrique='cas_mm7'):
+    historique, pred = donnees_prediction(temps_reel, serie_prevue, horizon, debut, fin, metrique)
+    nom_moteur = NOMS_MOTEURS['holt_winters' if temps_reel else moteur_precalcule()]
+    titre, axe, _, format_valeur = METRIQUES_PREVUES[metrique]
+    derniers_30j = historique.sort_values('jour').tail(30)
+    date_limite  = historique['jour'].max()
+
+    fig_pred = go.Figure()
+
+    # Historique
+    fig_pred.add_trace(go.Scatter(
+        x=derniers_30j['jour'], y=derniers_30j[metrique],
+        mode='lines', line=dict(color='#e65c5c', width=2.5),
+        name='Historique (MM7)',
+        hovertemplate=f'%{{x|%d/%m/%Y}}<br>Réel : %{{y:{format_valeur}}}<extra></extra>'
+    ))
+
+    # Intervalle de confiance
+    fig_pred.add_trace(go.Scatter(
+        x=pd.concat([pred['date'], pred['date'].iloc[::-1]]),
+        y=pd.concat([pred['borne_haute'], pred['borne_basse'].iloc[::-1]]),
+        fill='toself',
+        fillcolor='rgba(59,130,246,0.12)',
+        line=dict(color='rgba(255,255,255,0)'),
+        name='Intervalle confiance 95%',
+        hoverinfo='skip'
+    ))
+
+    # Prédiction centrale
+    fig_pred.add_trace(go.Scatter(
+        x=pred['date'], y=pred['prediction'],
+        mode='lines+markers',
+        line=dict(color='#3b82f6', width=2.5, dash='dash'),
+        marker=dict(size=8, color='#3b82f6',
+                    line=dict(color='#0a0e1a', width=2)),
+        name=f'Prédiction {nom_moteur}',
+        hovertemplate=f'%{{x|%d/%m/%Y}}<br>Prédit : %{{y:{format_valeur}}}<extra></extra>'
+    ))
+
+    # Ligne séparation réel / prédit
+    fig_pred.add_trace(go.Scatter(
+        x=[date_limite, date_limite],
+        y=[0, historique[metrique].max()],
+        mode='lines',
+        line=dict(color='rgba(255,255,255,0.2)', width=1.5, dash='dot'),
+        name='Fin données réelles',
+        hoverinfo='skip'
+    ))
+
+    fig_pred.update_layout(
+        **PLOTLY_THEME,
+        title=dict(text=f"Prédiction des {titre} — {horizon} prochains jours",
+                   font=dict(size=14, color="#94a3b8")),
+        xaxis_title=None, yaxis_title=axe,
+        height=420, hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02,
+                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
+    )
+    return fig_pred
+
 #  Sidebar
 with st.sidebar:
     # Logo / titre
@@ -261,12 +1201,7 @@ with st.sidebar:
     date_min = tests_nat['jour'].min().date()
     date_max = tests_nat['jour'].max().date()
     periode = st.date_input("📅 Période", value=(date_min, date_max),
-                             min_value=date_min, max_value=date_max)
-
-    deps = sorted(tests_dep['dep'].unique().tolist())
-    dep_selectionne = st.selectbox("🗺️ Département",
-                                    options=deps,
-                                    index=deps.index('75') if '75' in deps else 0)
+                             min_value=date_min, max_value=date_max, key='periode')
 
     st.markdown("---")
     st.markdown("### 🌊 Vagues détectées")
@@ -303,15 +1238,12 @@ with st.sidebar:
     )
 
 #  Filtre temporel
+# Les tranches de la période sont prises dans chaque onglet, à l'affichage
 if len(periode) == 2:
     debut, fin = pd.Timestamp(periode[0]), pd.Timestamp(periode[1])
 else:
     debut, fin = tests_nat['jour'].min(), tests_nat['jour'].max()
 
-t = tests_nat[(tests_nat['jour'] >= debut) & (tests_nat['jour'] <= fin)].copy()
-h = hosp_nat[(hosp_nat['jour']  >= debut) & (hosp_nat['jour']  <= fin)].copy()
-v = vacc_nat[(vacc_nat['jour']  >= debut) & (vacc_nat['jour']  <= fin)].copy()
-
 #  En-tête
 st.markdown("""
 <div style="text-align:center; padding: 2rem 0 1rem 0;">
@@ -335,378 +1267,469 @@ st.markdown("""
 #  KPI Cards
 st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
 
-col1, col2, col3, col4, col5 = st.columns(5)
-with col1:
-    st.metric("🦠 Cas positifs",
-              f"{int(t['cas_positifs'].sum()):,}".replace(",", " "))
-with col2:
-    st.metric("📈 Pic MM7",
-              f"{int(t['cas_mm7'].max()):,}".replace(",", " "))
-with col3:
-    st.metric("🏥 Pic hospitalisations",
-              f"{int(h['hospitalises'].max()) if len(h) > 0 else 0:,}".replace(",", " "))
-with col4:
-    st.metric("🚨 Pic réanimation",
-              f"{int(h['reanimation'].max()) if len(h) > 0 else 0:,}".replace(",", " "))
-with col5:
-    couv = v['couv_complet_pct'].max() if len(v) > 0 else 0
-    st.metric("💉 Couverture vaccinale", f"{couv:.1f}%")
+with chrono('filtrage'):
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("🦠 Cas positifs",
+                  f"{int(index_tests.somme('cas_positifs', debut, fin)):,}".replace(",", " "))
+    with col2:
+        st.metric("📈 Pic MM7",
+                  f"{int(index_tests.maximum('cas_mm7', debut, fin, defaut=0)):,}".replace(",", " "))
+    with col3:
+        st.metric("🏥 Pic hospitalisations",
+                  f"{int(index_hosp.maximum('hospitalises', debut, fin, defaut=0)):,}".replace(",", " "))
+    with col4:
+        st.metric("🚨 Pic réanimation",
+                  f"{int(index_hosp.maximum('reanimation', debut, fin, defaut=0)):,}".replace(",", " "))
+    with col5:
+        couv = index_vacc.maximum('couv_complet_pct', debut, fin, defaut=0)
+        st.metric("💉 Couverture vaccinale", f"{couv:.1f}%")
 
 st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
 st.markdown("<hr style='border-color:rgba(255,255,255,0.06);'>",
             unsafe_allow_html=True)
 
 #  Onglets
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
+# Seul l'onglet affiché est calculé (st.tabs exécute les cinq à chaque rerun).
+# Chaque onglet est un fragment : ses propres widgets (département, moteur,
+# horizon) ne relancent que lui, pas les KPI ni les autres graphiques.
+ONGLETS = [
     "📈 Évolution temporelle",
     "🏥 Hospitalisations",
     "💉 Vaccination",
     "🗺️ Analyse départementale",
+    "🧭 Territoires",
+    "🚨 Alertes",
+    "⏱️ Décalages",
     "🔮 Prédiction IA"
-])
+]
+
+# Les widgets d'un onglet masqué ne sont pas exécutés et Streamlit oublierait
+# leur valeur : elle est conservée pour être retrouvée au retour sur l'onglet
+for cle, defaut in {'departement': '75' if '75' in deps else deps[0],
+                    'moteur': "Prophet (pré-calculé)",
+                    'serie_prevue': "France entière",
+                    'horizon': 7,
+                    'metrique_prevue': 'cas_mm7',
+                    'horizon_prevu': 7,
+                    'jour_alerte': date_max,
+                    'territoire_decalage': NATIONAL,
+                    'territoire_scenario': NATIONAL,
+                    'multiplicateur_admission': 1.0,
+                    'duree_sejour': DUREE_SEJOUR,
+                    'capacite_rea': CAPACITE_REA_NORMALE,
+                    'scenarios_departements': False,
+                    'territoire': "Île-de-France",
+                    'frequence_territoire': "jour",
+                    'deps_personnalises': [d for d in ['75', '92', '93', '94'] if d in deps]}.items():
+    st.session_state[cle] = st.session_state.get(cle, defaut)
+
+onglet = st.radio("Onglet", ONGLETS, horizontal=True, key='onglet',
+                  label_visibility='collapsed')
 
 # ONGLET 1 — Évolution temporelle
-with tab1:
-    st.markdown("#### Évolution de l'épidémie — France entière")
-
-    fig_cas = go.Figure()
-    for _, vague in vagues.iterrows():
-        if vague['debut'] >= debut and vague['fin'] <= fin:
-            fig_cas.add_vrect(x0=vague['debut'], x1=vague['fin'],
-                              fillcolor="rgba(230,92,92,0.07)",
-                              layer="below", line_width=0)
-
-    fig_cas.add_trace(go.Scatter(
-        x=t['jour'], y=t['cas_positifs'], mode='lines',
-        line=dict(color='rgba(230,92,92,0.2)', width=1),
-        name='Données brutes',
-        hovertemplate='%{x|%d/%m/%Y}<br>Brut : %{y:,.0f}<extra></extra>'
-    ))
-    fig_cas.add_trace(go.Scatter(
-        x=t['jour'], y=t['cas_mm7'], mode='lines',
-        line=dict(color='#e65c5c', width=2.5),
-        name='Moyenne mobile 7j',
-        hovertemplate='%{x|%d/%m/%Y}<br>MM7 : %{y:,.0f}<extra></extra>'
-    ))
-    fig_cas.update_layout(
-        **PLOTLY_THEME,
-        title=dict(text="Cas positifs quotidiens (zones = vagues épidémiques)",
-                   font=dict(size=14, color="#94a3b8")),
-        xaxis_title=None, yaxis_title="Cas / jour",
-        hovermode='x unified', height=400,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02,
-                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
-    )
-    st.plotly_chart(fig_cas, width='stretch')
-
-    fig_tp = go.Figure()
-    fig_tp.add_trace(go.Scatter(
-        x=t['jour'], y=t['tp_mm7'], mode='lines',
-        fill='tozeroy',
-        line=dict(color='#f97316', width=2),
-        fillcolor='rgba(249,115,22,0.12)',
-        name='Taux positivité MM7',
-        hovertemplate='%{x|%d/%m/%Y}<br>Taux : %{y:.1f}%<extra></extra>'
-    ))
-    fig_tp.add_hline(y=5, line_dash="dash", line_color="rgba(230,92,92,0.6)",
-                     annotation_text="Seuil alerte 5%",
-                     annotation_font_color="#e65c5c",
-                     annotation_position="bottom right")
-    fig_tp.update_layout(
-        **PLOTLY_THEME,
-        title=dict(text="Taux de positivité — Moyenne mobile 7 jours",
-                   font=dict(size=14, color="#94a3b8")),
-        xaxis_title=None, yaxis_title="Taux (%)",
-        height=340, hovermode='x unified',
-        legend=dict(bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
-    )
-    st.plotly_chart(fig_tp, width='stretch')
+@st.fragment
+def onglet_evolution(debut, fin):
+    with chrono('onglet_evolution'):
+        st.markdown("#### Évolution de l'épidémie — France entière")
+        st.plotly_chart(figure_cas(debut, fin), width='stretch')
+        st.plotly_chart(figure_positivite(debut, fin), width='stretch')
+        if index_rt() is not None:
+            st.plotly_chart(figure_rt(None, debut, fin), width='stretch')
 
 # ONGLET 2 — Hospitalisations
-with tab2:
-    st.markdown("#### Pression hospitalière")
-
-    col_h1, col_h2 = st.columns(2)
-
-    with col_h1:
-        fig_hosp = go.Figure()
-        fig_hosp.add_trace(go.Scatter(
-            x=h['jour'], y=h['hosp_mm7'], mode='lines',
-            fill='tozeroy',
-            line=dict(color='#3b82f6', width=2),
-            fillcolor='rgba(59,130,246,0.12)',
-            name='Hospitalisés MM7',
-            hovertemplate='%{x|%d/%m/%Y}<br>Hospitalisés : %{y:,.0f}<extra></extra>'
-        ))
-        fig_hosp.update_layout(
-            **PLOTLY_THEME,
-            title=dict(text="Patients hospitalisés (MM7)",
-                       font=dict(size=13, color="#94a3b8")),
-            height=340, hovermode='x unified',
-            legend=dict(bgcolor="rgba(0,0,0,0)")
-        )
-        st.plotly_chart(fig_hosp, width='stretch')
-
-    with col_h2:
-        fig_rea = go.Figure()
-        fig_rea.add_trace(go.Scatter(
-            x=h['jour'], y=h['rea_mm7'], mode='lines',
-            fill='tozeroy',
-            line=dict(color='#a855f7', width=2),
-            fillcolor='rgba(168,85,247,0.12)',
-            name='Réanimation MM7',
-            hovertemplate='%{x|%d/%m/%Y}<br>Réanimation : %{y:,.0f}<extra></extra>'
-        ))
-        fig_rea.add_hline(y=5000, line_dash="dash",
-                          line_color="rgba(230,92,92,0.5)",
-                          annotation_text="Capacité normale (~5 000)",
-                          annotation_font_color="#e65c5c",
-                          annotation_position="bottom right")
-        fig_rea.update_layout(
-            **PLOTLY_THEME,
-            title=dict(text="Patients en réanimation (MM7)",
-                       font=dict(size=13, color="#94a3b8")),
-            height=340, hovermode='x unified',
-            legend=dict(bgcolor="rgba(0,0,0,0)")
-        )
-        st.plotly_chart(fig_rea, width='stretch')
-
-    if 'deces_mm7' in h.columns:
-        fig_dc = go.Figure()
-        fig_dc.add_trace(go.Scatter(
-            x=h['jour'], y=h['deces_mm7'], mode='lines',
-            fill='tozeroy',
-            line=dict(color='#64748b', width=2),
-            fillcolor='rgba(100,116,139,0.12)',
-            name='Décès MM7',
-            hovertemplate='%{x|%d/%m/%Y}<br>Décès : %{y:.1f}<extra></extra>'
-        ))
-        fig_dc.update_layout(
-            **PLOTLY_THEME,
-            title=dict(text="Décès quotidiens — Moyenne mobile 7 jours",
-                       font=dict(size=13, color="#94a3b8")),
-            xaxis_title=None, yaxis_title="Décès / jour",
-            height=300, hovermode='x unified',
-            legend=dict(bgcolor="rgba(0,0,0,0)")
-        )
-        st.plotly_chart(fig_dc, width='stretch')
+@st.fragment
+def onglet_hospitalisations(debut, fin):
+    with chrono('onglet_hospitalisations'):
+        st.markdown("#### Pression hospitalière")
+
+        col_h1, col_h2 = st.columns(2)
+
+        with col_h1:
+            st.plotly_chart(figure_hospitalisations(debut, fin), width='stretch')
+
+        with col_h2:
+            st.plotly_chart(figure_reanimation(debut, fin), width='stretch')
+
+        if 'deces_mm7' in hosp_nat.columns:
+            st.plotly_chart(figure_deces(debut, fin), width='stretch')
+
+        st.markdown("#### 🧪 Scénarios de pression en réanimation")
+        moteur = moteur_scenarios()
+        if moteur is None:
+            st.info("Les scénarios partent de la prévision des cas (predictions_7j.csv), introuvable.")
+            st.code("python src/predictions.py", language="bash")
+            return
+
+        moteur_dep = moteur_scenarios(departements=True)
+        territoires = [NATIONAL] + ([] if moteur_dep is None else list(moteur_dep.territoires))
+        if st.session_state['territoire_scenario'] not in territoires:
+            st.session_state['territoire_scenario'] = NATIONAL
+        col_s1, col_s2, col_s3, col_s4 = st.columns(4)
+        with col_s1:
+            territoire = st.selectbox("Territoire", territoires, key='territoire_scenario')
+        with col_s2:
+            multiplicateur = st.slider("Fraction admise (×)", min_value=0.5, max_value=5.0,
+                                       step=0.25, key='multiplicateur_admission')
+        with col_s3:
+            duree_sejour = st.slider("Durée de séjour (jours)", min_value=5, max_value=25,
+                                     key='duree_sejour')
+        with col_s4:
+            capacite = st.slider("Capacité nationale (lits)", min_value=2_000, max_value=12_000,
+                                 step=250, key='capacite_rea')
+
+        scenario = scenario_reanimation(territoire, multiplicateur, duree_sejour, capacite)
+        pire = scenario.loc[scenario['p_depassement'].idxmax()]
+        col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+        with col_m1:
+            st.metric("P(dépassement) max", f"{pire['p_depassement'] * 100:.1f} %")
+        with col_m2:
+            st.metric("Jour le plus critique",
+                      f"{pire['jour']:%d/%m/%Y}" if pire['p_depassement'] > 0 else "—")
+        with col_m3:
+            st.metric("Pic médian", f"{scenario['occupation_q50'].max():,.0f} lits".replace(",", " "))
+        with col_m4:
+            st.metric("Capacité du territoire", f"{pire['capacite']:,.0f} lits".replace(",", " "))
+
+        st.plotly_chart(figure_scenario(territoire, multiplicateur, duree_sejour, capacite),
+                        width='stretch')
+        moteur_territoire = moteur if territoire == NATIONAL else moteur_dep
+        fraction = moteur_territoire.fraction_admission(duree_sejour)[
+            list(moteur_territoire.territoires).index(territoire)]
+        st.caption(f"Admissions ~ Poisson(fraction admise × cas 7 jours plus tôt), fraction calibrée sur "
+                   f"les 28 derniers jours de flux ({fraction * 100:.2f} % × {multiplicateur:g}) · "
+                   f"sorties binomiales (1 / durée de séjour) · bande de la prévision, fraction et durée "
+                   f"tirées par trajectoire · capacité départementale au prorata de la population")
+
+        if moteur_dep is not None and st.toggle("Tous les départements", key='scenarios_departements'):
+            par_dep = scenarios_departements(multiplicateur, duree_sejour, capacite)
+            st.dataframe(pd.DataFrame({
+                'Département': par_dep['dep'],
+                'Capacité (lits)': par_dep['capacite'].map(lambda c: f"{c:.0f}"),
+                'P(dépassement) max': par_dep['p_max'].map(lambda p: f"{p * 100:.1f} %"),
+                'Jour le plus critique': par_dep['jour_critique'].dt.strftime('%d/%m/%Y'),
+                'Pic médian (lits)': par_dep['pic_median'].map(lambda c: f"{c:.0f}"),
+            }), hide_index=True, width='stretch', height=280)
+            st.caption(f"{TRAJECTOIRES_DEPARTEMENTS} trajectoires par département, simulées en un seul lot.")
 
 # ONGLET 3 — Vaccination
-with tab3:
-    st.markdown("#### Campagne de vaccination nationale")
+@st.fragment
+def onglet_vaccination(debut, fin):
+    with chrono('onglet_vaccination'):
+        st.markdown("#### Campagne de vaccination nationale")
+        st.plotly_chart(figure_vaccination(debut, fin), width='stretch')
 
-    fig_vacc = go.Figure()
-    couleurs_vacc = ['#10b981', '#34d399', '#6ee7b7']
-    labels_vacc   = ['1ère dose', 'Schéma complet', 'Rappel']
-    cols_vacc     = ['couv_dose1_pct', 'couv_complet_pct', 'couv_rappel_pct']
-
-    for col, label, couleur in zip(cols_vacc, labels_vacc, couleurs_vacc):
-        fig_vacc.add_trace(go.Scatter(
-            x=v['jour'], y=v[col], mode='lines',
-            line=dict(color=couleur, width=2.5),
-            name=label,
-            hovertemplate=f'%{{x|%d/%m/%Y}}<br>{label} : %{{y:.1f}}%<extra></extra>'
-        ))
-
-    fig_vacc.add_hline(y=70, line_dash="dot",
-                       line_color="rgba(255,255,255,0.2)",
-                       annotation_text="Objectif immunité collective 70%",
-                       annotation_font_color="#94a3b8",
-                       annotation_position="bottom right")
-    fig_vacc.update_layout(
-        **PLOTLY_THEME,
-        title=dict(text="Couverture vaccinale — Population française (%)",
-                   font=dict(size=14, color="#94a3b8")),
-        xaxis_title=None, yaxis_title="% population",
-        height=400, hovermode='x unified',
-        legend=dict(orientation="h", yanchor="bottom", y=1.02,
-                    bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
-    )
-    st.plotly_chart(fig_vacc, width='stretch')
-
-    if 'doses_jour' in v.columns:
-        fig_doses = go.Figure()
-        fig_doses.add_trace(go.Bar(
-            x=v['jour'], y=v['doses_jour'],
-            marker_color='rgba(16,185,129,0.5)',
-            marker_line_color='rgba(16,185,129,0.8)',
-            marker_line_width=0.5,
-            name='Doses quotidiennes',
-            hovertemplate='%{x|%d/%m/%Y}<br>Doses : %{y:,}<extra></extra>'
-        ))
-        fig_doses.update_layout(
-            **PLOTLY_THEME,
-            title=dict(text="Doses administrées par jour",
-                       font=dict(size=13, color="#94a3b8")),
-            height=280, hovermode='x unified',
-            legend=dict(bgcolor="rgba(0,0,0,0)")
-        )
-        st.plotly_chart(fig_doses, width='stretch')
+        if 'doses_jour' in vacc_nat.columns:
+            st.plotly_chart(figure_doses(debut, fin), width='stretch')
 
 # ONGLET 4 — Analyse départementale
-with tab4:
-    st.markdown(f"#### Analyse locale — Département **{dep_selectionne}**")
-
-    dep_data = tests_dep[
-        (tests_dep['dep'] == dep_selectionne) &
-        (tests_dep['jour'] >= debut) &
-        (tests_dep['jour'] <= fin)
-    ].sort_values('jour').copy()
-
-    if len(dep_data) > 0:
-        dep_data['cas_mm7_dep'] = dep_data['cas_positifs'].rolling(7, min_periods=1).mean()
-
-        col_d1, col_d2, col_d3 = st.columns(3)
-        with col_d1:
-            st.metric("Cas totaux",
-                      f"{int(dep_data['cas_positifs'].sum()):,}".replace(",", " "))
-        with col_d2:
-            st.metric("Taux incidence max",
-                      f"{dep_data['taux_incidence'].max():.0f} /100k hab.")
-        with col_d3:
-            st.metric("Taux positivité moyen",
-                      f"{dep_data['taux_positivite'].mean():.1f}%")
-
-        fig_dep = make_subplots(
-            rows=2, cols=1, shared_xaxes=True,
-            subplot_titles=('Taux d\'incidence (cas/100k hab., 7j glissants)',
-                            'Taux de positivité (%)'),
-            vertical_spacing=0.12
-        )
-        fig_dep.update_layout(
-            **PLOTLY_THEME,
-            height=520, hovermode='x unified', showlegend=False
-        )
-
-        fig_dep.add_trace(go.Scatter(
-            x=dep_data['jour'], y=dep_data['taux_incidence'],
-            mode='lines', fill='tozeroy',
-            line=dict(color='#e65c5c', width=2),
-            fillcolor='rgba(230,92,92,0.1)',
-            hovertemplate='%{x|%d/%m/%Y}<br>TI : %{y:.1f}/100k<extra></extra>'
-        ), row=1, col=1)
-
-        for seuil, label, couleur in [
-            (50,  "Alerte",          "rgba(249,115,22,0.5)"),
-            (150, "Alerte renforcée","rgba(230,92,92,0.5)"),
-            (250, "Urgence",         "rgba(220,38,38,0.7)")
-        ]:
-            fig_dep.add_hline(y=seuil, line_dash="dash",
-                              line_color=couleur, opacity=0.6,
-                              annotation_text=label,
-                              annotation_font_color=couleur,
-                              row=1, col=1)
-
-        fig_dep.add_trace(go.Scatter(
-            x=dep_data['jour'], y=dep_data['taux_positivite'],
-            mode='lines', fill='tozeroy',
-            line=dict(color='#f97316', width=2),
-            fillcolor='rgba(249,115,22,0.1)',
-            hovertemplate='%{x|%d/%m/%Y}<br>TP : %{y:.1f}%<extra></extra>'
-        ), row=2, col=1)
-
-        fig_dep.add_hline(y=5, line_dash="dash",
-                          line_color="rgba(230,92,92,0.5)",
-                          annotation_text="Seuil 5%",
-                          annotation_font_color="#e65c5c",
-                          row=2, col=1)
-
-        st.plotly_chart(fig_dep, width='stretch')
-    else:
-        st.warning(f"Aucune donnée pour le département {dep_selectionne} sur cette période.")
-
-# ONGLET 5 — Prédiction IA
-with tab5:
-    st.markdown("#### 🔮 Prédiction IA — 7 prochains jours")
-
-    st.info("""
-    **Modèle : Prophet (Meta/Facebook)**  
-    Entraîné sur 1 141 jours de données Covid · Détecte tendances, saisonnalités hebdo et annuelles · Intervalle de confiance à 95%
-    """)
-
-    predictions_path = (Path(__file__).parent.parent
-                        / "data" / "processed" / "predictions_7j.csv")
-
-    if predictions_path.exists():
-        pred = pd.read_csv(predictions_path, parse_dates=['date'])
-
-        # Tableau
-        st.markdown("##### Prévisions quotidiennes")
-        pred_affich = pred.copy()
-        pred_affich.columns = ['Date', 'Prédiction (cas/j)',
-                                'Borne basse (95%)', 'Borne haute (95%)']
-        pred_affich['Date'] = pred_affich['Date'].dt.strftime('%A %d %b %Y')
-        for col in ['Prédiction (cas/j)', 'Borne basse (95%)', 'Borne haute (95%)']:
-            pred_affich[col] = pred_affich[col].apply(
-                lambda x: f"{int(x):,}".replace(",", " "))
-        st.dataframe(pred_affich, use_container_width=False, hide_index=True)
-
-        # Graphique prédiction
-        derniers_30j = tests_nat.sort_values('jour').tail(30)
-        date_limite  = tests_nat['jour'].max()
-
-        fig_pred = go.Figure()
-
-        # Historique
-        fig_pred.add_trace(go.Scatter(
-            x=derniers_30j['jour'], y=derniers_30j['cas_mm7'],
-            mode='lines', line=dict(color='#e65c5c', width=2.5),
-            name='Historique (MM7)',
-            hovertemplate='%{x|%d/%m/%Y}<br>Réel : %{y:,.0f}<extra></extra>'
-        ))
-
-        # Intervalle de confiance
-        fig_pred.add_trace(go.Scatter(
-            x=pd.concat([pred['date'], pred['date'].iloc[::-1]]),
-            y=pd.concat([pred['borne_haute'], pred['borne_basse'].iloc[::-1]]),
-            fill='toself',
-            fillcolor='rgba(59,130,246,0.12)',
-            line=dict(color='rgba(255,255,255,0)'),
-            name='Intervalle confiance 95%',
-            hoverinfo='skip'
-        ))
-
-        # Prédiction centrale
-        fig_pred.add_trace(go.Scatter(
-            x=pred['date'], y=pred['prediction'],
-            mode='lines+markers',
-            line=dict(color='#3b82f6', width=2.5, dash='dash'),
-            marker=dict(size=8, color='#3b82f6',
-                        line=dict(color='#0a0e1a', width=2)),
-            name='Prédiction Prophet',
-            hovertemplate='%{x|%d/%m/%Y}<br>Prédit : %{y:,.0f}<extra></extra>'
-        ))
-
-        # Ligne séparation réel / prédit
-        fig_pred.add_trace(go.Scatter(
-            x=[date_limite, date_limite],
-            y=[0, tests_nat['cas_mm7'].max()],
-            mode='lines',
-            line=dict(color='rgba(255,255,255,0.2)', width=1.5, dash='dot'),
-            name='Fin données réelles',
-            hoverinfo='skip'
-        ))
-
-        fig_pred.update_layout(
-            **PLOTLY_THEME,
-            title=dict(text="Prédiction des cas positifs — 7 prochains jours",
-                       font=dict(size=14, color="#94a3b8")),
-            xaxis_title=None, yaxis_title="Cas / jour (MM7)",
-            height=420, hovermode='x unified',
-            legend=dict(orientation="h", yanchor="bottom", y=1.02,
-                        bgcolor="rgba(0,0,0,0)", font=dict(color="#94a3b8"))
-        )
-        st.plotly_chart(fig_pred, width='stretch')
-
-        st.warning("""
-        ⚠️ **Limite du modèle** : Prophet prolonge les tendances passées.
-        Il ne peut anticiper un nouveau variant ou un changement comportemental brutal.
-        Ces prédictions sont à caractère **démonstratif** — données jusqu'en juin 2023.
-        """)
-    else:
-        st.error("Fichier predictions_7j.csv introuvable.")
-        st.code("python src/predictions.py", language="bash")
-        st.markdown("Lance cette commande dans ton terminal pour générer les prédictions.")
+@st.fragment
+def onglet_departemental(debut, fin):
+    with chrono('onglet_departemental'):
+        dep_selectionne = st.selectbox("🗺️ Département", options=deps, key='departement')
+        st.markdown(f"#### Analyse locale — Département **{dep_selectionne}**")
+
+        index_dep = index_departement(dep_selectionne)
+        dep_data = index_dep.tranche(debut, fin)
+
+        if len(dep_data) > 0:
+            col_d1, col_d2, col_d3, col_d4 = st.columns(4)
+            with col_d1:
+                st.metric("Cas totaux",
+                          f"{int(index_dep.somme('cas_positifs', debut, fin)):,}".replace(",", " "))
+            with col_d2:
+                st.metric("Taux incidence max",
+                          f"{index_dep.maximum('taux_incidence', debut, fin, defaut=0):.0f} /100k hab.")
+            with col_d3:
+                st.metric("Taux positivité moyen",
+                          f"{index_dep.moyenne('taux_positivite', debut, fin, defaut=0):.1f}%")
+            with col_d4:
+                st.metric("Taux positivité max",
+                          f"{index_dep.maximum('taux_positivite', debut, fin, defaut=0):.1f}%")
+
+            st.plotly_chart(figure_departement(dep_selectionne, debut, fin), width='stretch')
+
+            vagues_dep = vagues_departement(dep_selectionne, debut, fin)
+            if len(vagues_dep) > 0:
+                pics = " · ".join(f"{v.pic:%d/%m/%Y} ({v.pic_cas:,.0f} cas/j)".replace(",", " ")
+                                  for v in vagues_dep.itertuples())
+                st.caption(f"🌊 {len(vagues_dep)} vague(s) locale(s) sur la période — pics : {pics}")
+
+            if index_rt(dep_selectionne) is not None:
+                st.plotly_chart(figure_rt(dep_selectionne, debut, fin), width='stretch')
+        else:
+            st.warning(f"Aucune donnée pour le département {dep_selectionne} sur cette période.")
+
+        pred_dep = charger_predictions_dep()
+        if pred_dep is not None and (pred_dep['dep'] == dep_selectionne).any():
+            st.plotly_chart(figure_prediction_departement(dep_selectionne), width='stretch')
+
+# ONGLET 5 — Territoires
+@st.fragment
+def onglet_territoires(debut, fin):
+    with chrono('onglet_territoires'):
+        if cube_territorial() is None:
+            st.error("Cube territorial (cube_jour, cube_semaine) introuvable.")
+            st.code("python src/cube_territoires.py", language="bash")
+            return
+
+        col_t1, col_t2 = st.columns([3, 1])
+        with col_t2:
+            frequence = st.radio("Pas de temps", ["jour", "semaine"], horizontal=True,
+                                 key='frequence_territoire')
+        cube = cube_territorial(frequence)
+        groupes = territoires(cube.deps)
+        with col_t1:
+            nom = st.selectbox("🧭 Territoire", list(groupes) + ["Sélection personnalisée"],
+                               key='territoire')
+        if nom == "Sélection personnalisée":
+            deps_choisis = st.multiselect("Départements", options=list(cube.deps),
+                                          key='deps_personnalises')
+        else:
+            deps_choisis = groupes[nom]
+        if not deps_choisis:
+            st.info("Choisis au moins un département.")
+            return
+
+        debut_requete = time.perf_counter()
+        serie = cube.territoire(deps_choisis, debut, fin)
+        duree_requete = (time.perf_counter() - debut_requete) * 1000
+        st.markdown(f"#### {nom}")
+
+        col_k1, col_k2, col_k3, col_k4, col_k5 = st.columns(5)
+        with col_k1:
+            st.metric("Cas sur la période",
+                      f"{int(np.nansum(serie['cas_positifs'])):,}".replace(",", " "))
+        with col_k2:
+            tests = np.nansum(serie['total_tests'])
+            st.metric("Positivité de la période",
+                      f"{np.nansum(serie['cas_positifs']) / tests * 100:.1f}%" if tests > 0 else "—")
+        with col_k3:
+            st.metric("Taux incidence max", f"{np.nanmax(serie['taux_incidence'], initial=0):.0f} /100k hab.")
+        with col_k4:
+            couverture = serie['couv_complet'].dropna()
+            st.metric("Couverture complète",
+                      f"{couverture.iloc[-1]:.1f}%" if len(couverture) > 0 else "—")
+        with col_k5:
+            st.metric("Pic réanimation", f"{np.nanmax(serie['reanimation'], initial=0):,.0f}".replace(",", " "))
+
+        st.plotly_chart(figure_territoire(nom, tuple(deps_choisis), frequence, debut, fin),
+                        width='stretch')
+        st.caption(f"Réponse du cube : {duree_requete:.1f} ms · taux recalculés à partir des sommes "
+                   f"(cas / population, cas / tests, doses cumulées / population), pas moyennés")
+
+        st.markdown("##### Régions et groupes sur la période")
+        comparaison = comparaison_territoires(frequence, debut, fin)
+        st.dataframe(pd.DataFrame({
+            'Territoire': comparaison['territoire'],
+            'Cas': comparaison['cas_positifs'].map(lambda c: f"{c:,.0f}".replace(",", " ")),
+            'Positivité': comparaison['taux_positivite'].map(lambda t: f"{t:.1f}%"),
+            'Incidence (fin)': comparaison['taux_incidence_fin'].round(0),
+            'Incidence max': comparaison['taux_incidence_max'].round(0),
+            'Couverture complète': comparaison['couv_complet'].map(lambda t: f"{t:.1f}%"),
+            'Pic réanimation': comparaison['pic_reanimation'].round(0),
+        }), hide_index=True, width='stretch', height=320)
+
+# ONGLET 6 — Alertes
+@st.fragment
+def onglet_alertes(debut, fin):
+    with chrono('onglet_alertes'):
+        index = index_alertes()
+        if index is None:
+            st.error("Index des alertes (alertes_departements) introuvable.")
+            st.code("python src/alertes_departements.py", language="bash")
+            return
+
+        jour = pd.Timestamp(st.date_input("📅 Jour J", min_value=date_min, max_value=date_max,
+                                          key='jour_alerte'))
+        st.markdown(f"#### Départements en alerte au {jour:%d/%m/%Y}")
+
+        alertes = index.en_alerte(jour)
+        niveaux = alertes['niveau_incidence']
+        col_a1, col_a2, col_a3, col_a4 = st.columns(4)
+        with col_a1:
+            st.metric("Incidence > 50", int((niveaux >= 1).sum()))
+        with col_a2:
+            st.metric("Incidence > 150", int((niveaux >= 2).sum()))
+        with col_a3:
+            st.metric("Incidence > 250", int((niveaux >= 3).sum()))
+        with col_a4:
+            st.metric("Positivité > 5 %", int(alertes['positivite_depuis'].notna().sum()))
+
+        if len(alertes) > 0:
+            st.dataframe(pd.DataFrame({
+                'Département': alertes['dep'],
+                'Incidence': [NIVEAUX['taux_incidence'][n] for n in niveaux],
+                'Niveau depuis': alertes['incidence_depuis'].dt.strftime('%d/%m/%Y').fillna("—"),
+                'Positivité > 5 % depuis': alertes['positivite_depuis'].dt.strftime('%d/%m/%Y').fillna("—"),
+            }), hide_index=True, width='stretch', height=280)
+        else:
+            st.success("Aucun département au-dessus des seuils ce jour-là.")
+
+        st.plotly_chart(figure_alertes(debut, fin, jour), width='stretch')
+
+        du_jour = index.franchissements(jour)
+        if len(du_jour) > 0:
+            libelles = {'taux_incidence': "incidence", 'taux_positivite': "positivité"}
+            st.caption("Franchissements du jour : " + " · ".join(
+                f"{f.dep} {'↑' if f.sens > 0 else '↓'} {libelles[f.indicateur]} {f.seuil}"
+                for f in du_jour.itertuples()))
+
+# ONGLET 7 — Décalages
+@st.fragment
+def onglet_decalages(debut, fin):
+    with chrono('onglet_decalages'):
+        st.markdown("#### Délai entre les cas et l'hôpital — France entière, période affichée")
+        correlations = correlations_nationales(debut, fin)
+        colonnes_metriques = st.columns(len(CIBLES))
+        for colonne, (cible, (libelle, _, _)) in zip(colonnes_metriques, CIBLES.items()):
+            decalage, correlation = (meilleurs_decalages(correlations[cible].to_numpy())
+                                     if cible in correlations else (np.nan, np.nan))
+            with colonne:
+                if np.isnan(decalage):
+                    st.metric(f"Cas → {libelle}", "—")
+                else:
+                    st.metric(f"Cas → {libelle}", f"J+{decalage:.0f}", f"r = {correlation:.2f}",
+                              delta_color="off")
+        st.plotly_chart(figure_correlations(debut, fin), width='stretch')
+
+        if charger_decalages() is None:
+            st.error("Table des décalages (decalages) introuvable.")
+            st.code("python src/decalages.py", language="bash")
+            return
+
+        territoire = st.selectbox("🗺️ Territoire", options=[NATIONAL] + list(deps),
+                                  key='territoire_decalage')
+        st.plotly_chart(figure_decalages_glissants(territoire, debut, fin), width='stretch')
+
+        decalages = charger_decalages()
+        par_vague = decalages[(decalages['dep'] == territoire) & (decalages['portee'] == 'vague')
+                              & (decalages['fin'] >= debut) & (decalages['debut'] <= fin)]
+        if len(par_vague) > 0:
+            st.markdown("##### Par vague (cible suivie jusqu'à 30 jours après la fin de la vague)")
+            tableau = (par_vague.set_index(['debut', 'fin', 'cible'])['decalage_jours']
+                       .unstack('cible').reset_index())
+            st.dataframe(pd.DataFrame({
+                'Début': tableau['debut'].dt.strftime('%d/%m/%Y'),
+                'Fin (+30 j)': tableau['fin'].dt.strftime('%d/%m/%Y'),
+                **{f"Cas → {libelle}": tableau[cible].map(lambda d: "—" if pd.isna(d) else f"J+{d:.0f}")
+                   for cible, (libelle, _, _) in CIBLES.items() if cible in tableau},
+            }), hide_index=True, width='stretch')
+
+        st.plotly_chart(figure_distribution_decalages(territoire), width='stretch')
+
+# ONGLET 8 — Prédiction IA
+@st.fragment
+def onglet_prediction(debut, fin):
+    with chrono('onglet_prediction'):
+        moteur = st.radio("Moteur de prévision",
+                          ["Prophet (pré-calculé)", "Holt-Winters (temps réel)"],
+                          horizontal=True, key='moteur')
+        temps_reel = moteur.startswith("Holt-Winters")
+        # Pré-calculé : le moteur est lu dans le lot ou predictions_7j.csv (--moteur)
+        code_moteur = 'holt_winters' if temps_reel else moteur_precalcule()
+        nom_moteur = NOMS_MOTEURS[code_moteur]
+
+        horizon = 7
+        serie_prevue = "France entière"
+        metrique = 'cas_mm7'
+        if not temps_reel and charger_artefact_previsions() is not None and lot_previsions() is None:
+            st.warning(f"Le lot {charger_artefact_previsions()[1]['version']} ne contient aucune "
+                       "prévision réussie : affichage de predictions_7j.csv.")
+        artefact = None if temps_reel else lot_previsions()
+        if artefact is not None:
+            # Lot pré-calculé : indicateur et horizon au choix, sans réentraînement
+            previsions, metadonnees = artefact
+            metriques = metriques_lot(metadonnees)
+            if st.session_state['metrique_prevue'] not in metriques:
+                st.session_state['metrique_prevue'] = metriques[0]
+            if st.session_state['horizon_prevu'] not in metadonnees['horizons']:
+                st.session_state['horizon_prevu'] = metadonnees['horizons'][0]
+            col_p1, col_p2 = st.columns(2)
+            with col_p1:
+                metrique = st.selectbox("Indicateur", metriques, key='metrique_prevue',
+                                        format_func=lambda m: METRIQUES_PREVUES[m][0].capitalize())
+            with col_p2:
+                horizon = st.select_slider("Horizon (jours)", options=metadonnees['horizons'],
+                                           key='horizon_prevu')
+        elif temps_reel:
+            series = ["France entière", f"Département {st.session_state['departement']}"]
+            if st.session_state['serie_prevue'] not in series:
+                st.session_state['serie_prevue'] = series[0]
+            col_p1, col_p2 = st.columns(2)
+            with col_p1:
+                serie_prevue = st.selectbox("Série", series, key='serie_prevue')
+            with col_p2:
+                horizon = st.slider("Horizon (jours)", min_value=7, max_value=28, key='horizon')
+
+        st.markdown(f"#### 🔮 Prédiction IA — {horizon} prochains jours")
+
+        if temps_reel:
+            st.info("""
+            **Modèle : Holt-Winters (lissage exponentiel, NumPy)**  
+            Entraîné à la volée sur la période sélectionnée · Tendance amortie + saisonnalité hebdomadaire · Intervalle de confiance à 95%
+            """)
+            cle_prediction = (True, serie_prevue, horizon, debut, fin)
+        else:
+            jours = (f"{metadonnees['metriques'][metrique]['jours']:,}".replace(",", " ")
+                     if artefact is not None else "1 141")
+            modele, description = DESCRIPTIONS_MOTEURS[code_moteur]
+            st.info(f"""
+            **Modèle : {modele}**  
+            Entraîné sur {jours} jours de données Covid · {description} · Intervalle de confiance à 95%
+            """)
+            if artefact is not None:
+                st.caption(f"Lot {metadonnees['version']} · {nom_moteur} · "
+                           f"données {metadonnees['empreinte_donnees'][:8]} · "
+                           f"calculé en {metadonnees['durees_s']['total']:.0f} s")
+            # Prévision pré-calculée : indépendante de la période affichée
+            cle_prediction = (False, serie_prevue, horizon, None, None, metrique)
+        _, pred = donnees_prediction(*cle_prediction)
+
+        if pred is not None:
+            # Tableau
+            st.markdown("##### Prévisions quotidiennes")
+            _, _, unite, format_valeur = METRIQUES_PREVUES[metrique]
+            pred_affich = pred.copy()
+            pred_affich.columns = ['Date', f'Prédiction ({unite})',
+                                    'Borne basse (95%)', 'Borne haute (95%)']
+            pred_affich['Date'] = pred_affich['Date'].dt.strftime('%A %d %b %Y')
+            for col in [f'Prédiction ({unite})', 'Borne basse (95%)', 'Borne haute (95%)']:
+                pred_affich[col] = pred_affich[col].apply(
+                    lambda x: f"{x:{format_valeur}}".replace(",", " "))
+            st.dataframe(pred_affich, use_container_width=False, hide_index=True)
+
+            # Graphique prédiction
+            st.plotly_chart(figure_prediction(*cle_prediction), width='stretch')
+
+            st.warning(f"""
+            ⚠️ **Limite du modèle** : {nom_moteur} prolonge les tendances passées.
+            Il ne peut anticiper un nouveau variant ou un changement comportemental brutal.
+            Ces prédictions sont à caractère **démonstratif** — données jusqu'en juin 2023.
+            """)
+        elif temps_reel:
+            st.warning("Période trop courte : au moins 14 jours de données sont nécessaires.")
+        else:
+            st.error("Aucune prévision pré-calculée (artefact de lot ou predictions_7j.csv) introuvable.")
+            st.code("python src/predictions.py --lot", language="bash")
+            st.markdown("Lance cette commande dans ton terminal pour générer les prédictions.")
+
+{
+    ONGLETS[0]: onglet_evolution,
+    ONGLETS[1]: onglet_hospitalisations,
+    ONGLETS[2]: onglet_vaccination,
+    ONGLETS[3]: onglet_departemental,
+    ONGLETS[4]: onglet_territoires,
+    ONGLETS[5]: onglet_alertes,
+    ONGLETS[6]: onglet_decalages,
+    ONGLETS[7]: onglet_prediction,
+}[onglet](debut, fin)
+
+#  Cache des figures (succès / échecs depuis le démarrage du serveur)
+with st.expander("⚡ Cache des figures"):
+    st.caption(f"{len(figures)} figures en mémoire · {figures.taille / 1e6:.1f} Mo · "
+               f"{figures.evictions} évictions")
+    st.dataframe(figures.statistiques(), hide_index=True)
 
 #  FOOTER
 st.markdown("<div style='height:32px'></div>", unsafe_allow_html=True)
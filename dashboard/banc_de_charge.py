@@ -0,0 +1,268 @@
+#  EpiSight — Banc de charge du dashboard
+#  N sessions AppTest simultanées (période, département, onglet) sur data/processed :
+#  latence des reruns (p50/p95/p99), temps par section, mémoire du processus
+#  Rapport JSON à comparer d'une version à l'autre
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+BASE_PATH = Path(__file__).parent.parent
+APP = Path(__file__).parent / "app.py"
+PROCESSED = BASE_PATH / "data" / "processed"
+RAPPORTS = BASE_PATH / "rapports"      # hors de data/processed : un rapport n'est pas une donnée
+
+# Sans ces tables, app.py lancerait le pipeline (téléchargement) : le banc reste hors ligne
+TABLES_REQUISES = ["indicateurs_tests", "indicateurs_hosp", "indicateurs_vacc",
+                   "vagues_detectees", "tests_par_dep"]
+
+ACTIONS = ["periode", "onglet", "departement", "moteur"]
+MOTEURS = ["Prophet (pré-calculé)", "Holt-Winters (temps réel)"]
+
+# Widgets propres à un onglet : (libellé de l'onglet, section chronométrée du fragment).
+# Sur le serveur, les changer ne relance que le fragment ; AppTest relance tout
+# le script, le coût du fragment est donc lu dans sa section.
+FRAGMENTS = {"departement": ("Analyse départementale", "onglet_departemental"),
+             "moteur": ("Prédiction", "onglet_prediction")}
+
+
+def rss_mo() -> float:
+    """Mémoire résidente actuelle du processus (Linux), en Mo"""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def pic_rss_mo() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def verifier_donnees(dossier: Path = PROCESSED) -> None:
+    manquantes = [nom for nom in TABLES_REQUISES
+                  if not (dossier / f"{nom}.csv").exists() and not (dossier / nom).exists()]
+    if manquantes:
+        raise FileNotFoundError(
+            f"Tables absentes de {dossier} : {', '.join(manquantes)} "
+            "(python src/data_loader.py puis python src/indicators.py)")
+
+
+@contextmanager
+def runtime_partage():
+    """
+    AppTest règle pour la durée de chaque run un état global du processus
+    (Runtime factice, option global.appTest) et recompile le script : avec
+    plusieurs sessions simultanées, la première qui termine rétablirait cet
+    état sous les autres, et les compilations concurrentes échouent (SystemError
+    de l'analyseur sous CPython 3.11). Le banc fixe cet état pour toute la durée
+    du test et partage le bytecode, comme le serveur Streamlit pour ses sessions.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import patch_config_options
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    cache_script = ScriptCache()
+    with patch_config_options({"global.appTest": True}), \
+         mock.patch.object(Runtime, "instance", classmethod(lambda cls: cls._instance or runtime)), \
+         mock.patch.object(Runtime, "exists", classmethod(lambda cls: True)), \
+         mock.patch("streamlit.testing.v1.app_test.ScriptCache", lambda: cache_script), \
+         mock.patch("streamlit.testing.v1.local_script_runner.ScriptCache", lambda: cache_script):
+        yield
+
+
+def scenario(rng: np.random.Generator, interactions: int, deps: list,
+             date_min: pd.Timestamp, date_max: pd.Timestamp) -> list:
+    """Suite d'interactions (action, valeur) d'une session, tirée au hasard"""
+    jours = (date_max - date_min).days
+    etapes = []
+    for action in rng.choice(ACTIONS, size=interactions):
+        if action == "periode":
+            # Au moins 14 jours : la prévision temps réel reste calculable
+            a = int(rng.integers(0, jours - 13))
+            b = int(rng.integers(a + 13, jours + 1))
+            valeur = ((date_min + pd.Timedelta(days=a)).date(),
+                      (date_min + pd.Timedelta(days=b)).date())
+        elif action == "onglet":
+            valeur = int(rng.integers(0, 1000))       # rang modulo le nombre d'onglets
+        elif action == "departement":
+            valeur = str(rng.choice(deps))
+        else:
+            valeur = str(rng.choice(MOTEURS))
+        etapes.append((str(action), valeur))
+    return etapes
+
+
+def executer_session(numero: int, etapes: list, timeout: float) -> list:
+    """
+    Une session : premier affichage puis chaque interaction suivie d'un rerun.
+    Un widget d'onglet (département, moteur) n'existe que sur son onglet :
+    la session y navigue d'abord, comme le ferait un utilisateur.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP), default_timeout=timeout)
+    mesures = []
+
+    def rerun(etape: int, action: str, appliquer) -> None:
+        debut = time.perf_counter()
+        erreur = None
+        try:
+            appliquer()
+            app.run()
+            if app.exception:
+                erreur = app.exception[0].value
+        except Exception as exc:
+            erreur = repr(exc)
+        duree = time.perf_counter() - debut
+        chronos = app.session_state["chronos"] if "chronos" in app.session_state else {}
+        mesures.append({"session": numero, "etape": etape, "action": action,
+                        "duree_s": duree, "sections": dict(chronos),
+                        "rss_mo": rss_mo(), "erreur": erreur})
+
+    def choisir_onglet(choix) -> None:
+        navigation = app.radio(key="onglet")
+        navigation.set_value(choix(navigation.options))
+
+    def aller_sur(libelle: str) -> None:
+        if "onglet" in app.session_state and libelle not in app.session_state["onglet"]:
+            rerun(etape, "onglet", lambda: choisir_onglet(
+                lambda options: next(option for option in options if libelle in option)))
+
+    etape = 0
+    rerun(etape, "premier_affichage", lambda: None)
+    for etape, (action, valeur) in enumerate(etapes, start=1):
+        if action == "periode":
+            rerun(etape, action, lambda: app.date_input(key="periode").set_value(valeur))
+        elif action == "onglet":
+            rerun(etape, action, lambda: choisir_onglet(lambda options: options[valeur % len(options)]))
+        elif action == "departement":
+            aller_sur(FRAGMENTS[action][0])
+            rerun(etape, action, lambda: app.selectbox(key="departement").set_value(valeur))
+        else:
+            aller_sur(FRAGMENTS[action][0])
+            rerun(etape, action, lambda: app.radio(key="moteur").set_value(valeur))
+    return mesures
+
+
+def _quantiles(valeurs) -> dict:
+    valeurs = np.asarray(valeurs, dtype=float) * 1000
+    if len(valeurs) == 0:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(valeurs, [50, 95, 99])
+    return {"n": int(len(valeurs)), "p50_ms": round(p50, 2), "p95_ms": round(p95, 2),
+            "p99_ms": round(p99, 2), "moyenne_ms": round(valeurs.mean(), 2),
+            "max_ms": round(valeurs.max(), 2)}
+
+
+def _version_code() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=BASE_PATH,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+
+def lancer_banc(sessions: int = 8, interactions: int = 20, graine: int = 0,
+                timeout: float = 120) -> dict:
+    """
+    Lance `sessions` sessions simultanées (un thread chacune, comme le serveur
+    Streamlit) et agrège leurs mesures. Les caches st.cache_resource et le
+    cache de figures sont partagés entre sessions, comme en production ;
+    le premier affichage (caches froids) est donc compté à part.
+    """
+    verifier_donnees()
+    sys.path.insert(0, str(BASE_PATH / "src"))
+    from stockage import lire_table, lister_departements
+
+    jours = lire_table("indicateurs_tests", PROCESSED)['jour']
+    deps = lister_departements("tests_par_dep", PROCESSED)
+    rng = np.random.default_rng(graine)
+    scenarios = [scenario(rng, interactions, deps, jours.min(), jours.max())
+                 for _ in range(sessions)]
+
+    rss_debut = rss_mo()
+    debut = time.perf_counter()
+    with runtime_partage(), ThreadPoolExecutor(max_workers=sessions) as executeur:
+        resultats = list(executeur.map(executer_session, range(sessions), scenarios,
+                                       [timeout] * sessions))
+    duree_totale = time.perf_counter() - debut
+    mesures = [mesure for session in resultats for mesure in session]
+
+    interactions_ok = [m for m in mesures if m["action"] != "premier_affichage" and not m["erreur"]]
+    sections = sorted({nom for m in interactions_ok for nom in m["sections"]})
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "version_code": _version_code(),
+        "environnement": {"python": platform.python_version(), "cpu": os.cpu_count()},
+        "configuration": {"sessions": sessions, "interactions": interactions, "graine": graine},
+        "duree_totale_s": round(duree_totale, 2),
+        "reruns_par_s": round(len(mesures) / duree_totale, 2),
+        "erreurs": [{"session": m["session"], "etape": m["etape"], "erreur": m["erreur"]}
+                    for m in mesures if m["erreur"]],
+        "premier_affichage": _quantiles([m["duree_s"] for m in mesures
+                                         if m["action"] == "premier_affichage"]),
+        "reruns": _quantiles([m["duree_s"] for m in interactions_ok]),
+        "reruns_par_action": {action: _quantiles([m["duree_s"] for m in interactions_ok
+                                                  if m["action"] == action])
+                              for action in ACTIONS},
+        "reruns_fragment": {action: _quantiles([m["sections"][section] for m in interactions_ok
+                                                if m["action"] == action and section in m["sections"]])
+                             for action, (_, section) in FRAGMENTS.items()},
+        "sections": {nom: _quantiles([m["sections"][nom] for m in interactions_ok
+                                      if nom in m["sections"]])
+                     for nom in sections},
+        "memoire_mo": {"rss_debut": round(rss_debut, 1),
+                       "rss_max_pendant": round(max((m["rss_mo"] for m in mesures), default=0), 1),
+                       "rss_fin": round(rss_mo(), 1),
+                       "pic_processus": round(pic_rss_mo(), 1)},
+    }
+
+
+def afficher(rapport: dict) -> None:
+    config = rapport["configuration"]
+    print(f"BANC DE CHARGE — {config['sessions']} sessions × {config['interactions']} interactions")
+    print("=" * 50)
+    lignes = [{"mesure": "premier affichage", **rapport["premier_affichage"]},
+              {"mesure": "reruns (toutes actions)", **rapport["reruns"]}]
+    lignes += [{"mesure": f"  {action}", **q} for action, q in rapport["reruns_par_action"].items()]
+    lignes += [{"mesure": f"  {action} (fragment seul)", **q}
+               for action, q in rapport["reruns_fragment"].items()]
+    lignes += [{"mesure": f"section {nom}", **q} for nom, q in rapport["sections"].items()]
+    print(pd.DataFrame(lignes).to_string(index=False))
+    memoire = rapport["memoire_mo"]
+    print(f"\nRSS : {memoire['rss_debut']} Mo au départ · {memoire['rss_max_pendant']} Mo max · "
+          f"pic processus {memoire['pic_processus']} Mo")
+    print(f"{rapport['reruns_par_s']} reruns/s · {len(rapport['erreurs'])} erreur(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc de charge du dashboard EpiSight (hors ligne)")
+    parser.add_argument("--sessions", type=int, default=8, help="sessions simultanées")
+    parser.add_argument("--interactions", type=int, default=20, help="interactions par session")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="secondes max par rerun")
+    parser.add_argument("--sortie", type=Path, default=RAPPORTS / "banc_de_charge.json")
+    args = parser.parse_args()
+
+    rapport = lancer_banc(args.sessions, args.interactions, args.graine, args.timeout)
+    afficher(rapport)
+    args.sortie.parent.mkdir(parents=True, exist_ok=True)
+    args.sortie.write_text(json.dumps(rapport, indent=2, ensure_ascii=False))
+    print(f"\nRapport : {args.sortie}")
@@ -0,0 +1,133 @@
+#  EpiSight — Profil du démarrage à froid du dashboard
+#  Dans un processus neuf : coût des imports (-X importtime), séparé entre
+#  Streamlit et l'application, et temps jusqu'au premier rendu de app.py
+#  Code de sortie 1 si un budget est dépassé
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from banc_de_charge import APP, verifier_donnees
+
+# Budgets par défaut (ms), environ deux fois les valeurs mesurées sur un poste de dev
+BUDGET_IMPORTS_MS = 1500
+BUDGET_RENDU_MS = 3000
+
+REPERE = "@@ episight: application"
+
+# Exécuté avec -X importtime : tout ce qui est importé après REPERE
+# l'est par app.py (modules de src/, plotly, pyarrow…) ou pour son premier rendu
+_SONDE = """
+import json, sys, time
+debut = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+cadre = time.perf_counter()
+sys.stderr.write({repere!r} + "\\n")
+app = AppTest.from_file({app!r}, default_timeout=300).run()
+fin = time.perf_counter()
+print(json.dumps({{"cadre_ms": (cadre - debut) * 1000, "premier_rendu_ms": (fin - cadre) * 1000,
+                  "exceptions": [e.value for e in app.exception]}}))
+"""
+
+
+def lire_importtime(lignes: list) -> pd.DataFrame:
+    """
+    Lignes « import time: self [us] | cumulative | module » → DataFrame
+    (module, profondeur, propre_ms, cumule_ms). Profondeur 0 : import direct,
+    son cumul inclut tous les modules qu'il a entraînés.
+    """
+    modules = []
+    for ligne in lignes:
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        propre, cumule, nom = ligne[len("import time:"):].split("|")
+        modules.append({"module": nom.strip(),
+                        "profondeur": (len(nom) - len(nom.lstrip()) - 1) // 2,
+                        "propre_ms": int(propre) / 1000,
+                        "cumule_ms": int(cumule) / 1000})
+    return pd.DataFrame(modules, columns=["module", "profondeur", "propre_ms", "cumule_ms"])
+
+
+def _demarrage(top: int) -> dict:
+    """Un démarrage à froid de app.py dans un sous-processus, décomposé"""
+    sonde = _SONDE.format(repere=REPERE, app=str(APP))
+    resultat = subprocess.run([sys.executable, "-X", "importtime", "-c", sonde],
+                              capture_output=True, text=True, check=True)
+    mesures = json.loads(resultat.stdout.strip().splitlines()[-1])
+
+    lignes = resultat.stderr.splitlines()
+    coupure = lignes.index(REPERE) if REPERE in lignes else len(lignes)
+    cadre, application = lire_importtime(lignes[:coupure]), lire_importtime(lignes[coupure + 1:])
+    directs = application[application["profondeur"] == 0]
+
+    # Regroupement par paquet racine (plotly.graph_objs… → plotly)
+    paquets = (directs.assign(paquet=directs["module"].str.split(".").str[0])
+               .groupby("paquet", as_index=False)["cumule_ms"].sum()
+               .sort_values("cumule_ms", ascending=False).head(top))
+    return {
+        "imports_streamlit_ms": round(cadre.loc[cadre["profondeur"] == 0, "cumule_ms"].sum(), 1),
+        "imports_application_ms": round(directs["cumule_ms"].sum(), 1),
+        "premier_rendu_ms": round(mesures["premier_rendu_ms"], 1),
+        "modules_importes": int(len(application)),
+        "paquets": [{"paquet": p, "cumule_ms": round(ms, 1)}
+                    for p, ms in zip(paquets["paquet"], paquets["cumule_ms"])],
+        "exceptions": mesures["exceptions"],
+    }
+
+
+def profiler_demarrage(repetitions: int = 3, top: int = 15) -> dict:
+    """
+    Médiane de `repetitions` démarrages à froid (les temps d'un démarrage
+    isolé varient trop pour un budget) ; détail par paquet du dernier
+    """
+    verifier_donnees()
+    profils = [_demarrage(top) for _ in range(repetitions)]
+    profil = dict(profils[-1], repetitions=repetitions)
+    for cle in ["imports_streamlit_ms", "imports_application_ms", "premier_rendu_ms"]:
+        profil[cle] = round(float(np.median([p[cle] for p in profils])), 1)
+    profil["exceptions"] = sorted({e for p in profils for e in p["exceptions"]})
+    return profil
+
+
+def depassements(profil: dict, budget_imports_ms: float, budget_rendu_ms: float) -> list:
+    erreurs = [f"exception au premier rendu : {e}" for e in profil["exceptions"]]
+    if profil["imports_application_ms"] > budget_imports_ms:
+        erreurs.append(f"imports de l'application {profil['imports_application_ms']} ms "
+                       f"> budget {budget_imports_ms} ms")
+    if profil["premier_rendu_ms"] > budget_rendu_ms:
+        erreurs.append(f"premier rendu {profil['premier_rendu_ms']} ms > budget {budget_rendu_ms} ms")
+    return erreurs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profil du démarrage à froid du dashboard EpiSight")
+    parser.add_argument("--budget-imports-ms", type=float, default=BUDGET_IMPORTS_MS)
+    parser.add_argument("--budget-rendu-ms", type=float, default=BUDGET_RENDU_MS)
+    parser.add_argument("--repetitions", type=int, default=3, help="démarrages (médiane)")
+    parser.add_argument("--top", type=int, default=15, help="paquets les plus coûteux affichés")
+    parser.add_argument("--sortie", type=Path, default=None, help="rapport JSON (optionnel)")
+    args = parser.parse_args()
+
+    profil = profiler_demarrage(args.repetitions, args.top)
+    print(f"DÉMARRAGE À FROID — DASHBOARD (médiane de {args.repetitions})")
+    print("=" * 50)
+    print(f"Imports Streamlit (hors application) : {profil['imports_streamlit_ms']:>8.1f} ms")
+    print(f"Imports de l'application             : {profil['imports_application_ms']:>8.1f} ms "
+          f"({profil['modules_importes']} modules, budget {args.budget_imports_ms:.0f})")
+    print(f"Premier rendu (imports compris)      : {profil['premier_rendu_ms']:>8.1f} ms "
+          f"(budget {args.budget_rendu_ms:.0f})")
+    print("\nPaquets importés par l'application (cumul)")
+    print(pd.DataFrame(profil["paquets"]).to_string(index=False))
+
+    if args.sortie:
+        args.sortie.write_text(json.dumps(profil, indent=2, ensure_ascii=False))
+
+    erreurs = depassements(profil, args.budget_imports_ms, args.budget_rendu_ms)
+    for erreur in erreurs:
+        print(f"\n❌ {erreur}")
+    sys.exit(1 if erreurs else 0)
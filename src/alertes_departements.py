@@ -0,0 +1,270 @@
+#  EpiSight — Index des alertes départementales
+#  Franchissements (montée / descente) des seuils d'incidence et de positivité,
+#  tous départements en une passe matricielle, prolongés jour par jour
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indicators import construire_grille, vers_matrice
+
+# Seuils officiels tracés dans l'onglet départemental
+SEUILS = {'taux_incidence': (50, 150, 250), 'taux_positivite': (5,)}
+NIVEAUX = {'taux_incidence': ["—", "Alerte", "Alerte renforcée", "Urgence"],
+           'taux_positivite': ["—", "> 5 %"]}
+
+COLONNES = ['jour', 'dep', 'indicateur', 'seuil', 'sens']
+COLONNES_DEP = ['dep', 'jour', 'taux_incidence', 'taux_positivite']
+
+
+def etats_courants(evenements: pd.DataFrame) -> pd.Series:
+    """(indicateur, seuil, dep) → seuil dépassé après le dernier franchissement"""
+    derniers = evenements.sort_values('jour', kind='stable').groupby(
+        ['indicateur', 'seuil', 'dep'])['sens'].last()
+    return derniers > 0
+
+
+def detecter_franchissements(tests_dep: pd.DataFrame, etats: pd.Series = None) -> pd.DataFrame:
+    """
+    Franchissements de tous les seuils, tous départements, une matrice (dep × jour)
+    par indicateur : sens = +1 quand la valeur passe au-dessus du seuil, -1 en dessous.
+
+    - etats : seuils dépassés avant le premier jour de tests_dep (etats_courants
+              de l'index existant) ; par défaut aucun
+    Un jour absent conserve l'état de la veille. Trié par (jour, dep).
+    """
+    if tests_dep.empty:
+        return pd.DataFrame(columns=COLONNES)
+    deps, jours, i, j = construire_grille(tests_dep)
+    forme = (len(deps), len(jours))
+    rang = np.broadcast_to(np.arange(forme[1]), forme)
+
+    morceaux = []
+    for indicateur, seuils in SEUILS.items():
+        valeurs = vers_matrice(tests_dep[indicateur].to_numpy(dtype=float), i, j, forme)
+        # Dernier jour renseigné (≤ t) de chaque case : un trou prolonge l'état précédent
+        dernier = np.maximum.accumulate(np.where(np.isnan(valeurs), -1, rang), axis=1)
+        connu = dernier >= 0
+        valeurs = np.take_along_axis(valeurs, np.maximum(dernier, 0), axis=1)
+        for seuil in seuils:
+            initial = np.zeros(len(deps), dtype=bool)
+            if etats is not None:
+                cles = pd.MultiIndex.from_product([[indicateur], [seuil], deps])
+                initial = etats.reindex(cles, fill_value=False).to_numpy(dtype=bool)
+            depasse = np.where(connu, valeurs > seuil, initial[:, None])
+            transitions = np.diff(np.column_stack([initial, depasse]).astype(np.int8), axis=1)
+            lignes, colonnes = np.nonzero(transitions)
+            morceaux.append(pd.DataFrame({
+                'jour': jours[colonnes], 'dep': deps[lignes], 'indicateur': indicateur,
+                'seuil': seuil, 'sens': transitions[lignes, colonnes],
+            }))
+    evenements = pd.concat(morceaux, ignore_index=True)
+    return evenements.sort_values(['jour', 'dep', 'indicateur', 'seuil']).reset_index(drop=True)
+
+
+def prolonger_franchissements(evenements: pd.DataFrame, nouveaux: pd.DataFrame) -> pd.DataFrame:
+    """Franchissements des seuls nouveaux jours, à partir des états de l'index existant"""
+    return detecter_franchissements(nouveaux, etats_courants(evenements))
+
+
+def mettre_a_jour_alertes(dossier_processed: Path, nouveaux: pd.DataFrame = None,
+                          etiquette: str = None) -> pd.DataFrame:
+    """
+    Met à jour la table alertes_departements :
+    - nouveaux=None ou index absent : détection sur tout tests_par_dep
+    - sinon : franchissements des nouvelles lignes, ajoutés en fin de table
+    Retourne les franchissements écrits.
+    """
+    from stockage import ajouter_lignes, lire_table, sauvegarder_table
+
+    dossier_processed = Path(dossier_processed)
+    if nouveaux is None or not (dossier_processed / "alertes_departements.csv").exists():
+        evenements = detecter_franchissements(lire_table("tests_par_dep", dossier_processed,
+                                                         colonnes=COLONNES_DEP))
+        sauvegarder_table(evenements, "alertes_departements", dossier_processed)
+        return evenements
+
+    evenements = prolonger_franchissements(lire_table("alertes_departements", dossier_processed),
+                                           nouveaux[COLONNES_DEP])
+    if not evenements.empty:
+        ajouter_lignes(evenements, "alertes_departements", dossier_processed, etiquette)
+    return evenements
+
+
+class IndexAlertes:
+    """
+    Niveaux d'alerte de chaque département, reconstitués une fois depuis les
+    franchissements, en lecture seule
+
+    - par jour        : périodes [debut, fin) à niveau constant (jours en int32),
+                        « en alerte au jour J » = un masque NumPy, sans filtre par département
+    - par département : franchissements du département (dictionnaire)
+    - historique      : nombre de départements par niveau et par jour
+    Niveau = nombre de seuils de l'indicateur dépassés (0 à 3 pour l'incidence).
+    """
+
+    def __init__(self, evenements: pd.DataFrame, premier_jour, dernier_jour):
+        self.origine = pd.Timestamp(premier_jour)
+        self.nb_jours = (pd.Timestamp(dernier_jour) - self.origine).days + 1
+        self.evenements = evenements.sort_values(['jour', 'dep']).reset_index(drop=True)
+        self._jours_evenements = self._decalages(self.evenements['jour'])
+        self._par_dep = {dep: groupe.reset_index(drop=True)
+                         for dep, groupe in self.evenements.groupby('dep', sort=False)}
+
+        # Variation de niveau par (dep, indicateur, jour), puis niveau cumulé
+        variations = (self.evenements.groupby(['dep', 'indicateur', 'jour'], sort=True)['sens']
+                      .sum().reset_index())
+        variations = variations[variations['sens'] != 0]
+        niveaux = variations.groupby(['dep', 'indicateur'])['sens'].cumsum()
+        suivant = variations.groupby(['dep', 'indicateur'])['jour'].shift(-1)
+        self.periodes = pd.DataFrame({
+            'dep': variations['dep'].to_numpy(),
+            'indicateur': variations['indicateur'].to_numpy(),
+            'niveau': niveaux.to_numpy(dtype=np.int8),
+            'debut': self._decalages(variations['jour']),
+            'fin': np.where(suivant.isna(), self.nb_jours,
+                            self._decalages(suivant.fillna(self.origine))),
+        })
+        self.periodes = self.periodes[self.periodes['niveau'] > 0].reset_index(drop=True)
+        self._debut = self.periodes['debut'].to_numpy()
+        self._fin = self.periodes['fin'].to_numpy()
+        self.historique = self._compter()
+
+    def _decalages(self, jours: pd.Series) -> np.ndarray:
+        return ((pd.to_datetime(jours) - self.origine).dt.days).to_numpy(dtype=np.int32)
+
+    def _compter(self) -> pd.DataFrame:
+        """Départements par niveau et par jour : +1 au début, -1 à la fin de chaque période"""
+        colonnes = {}
+        for indicateur, libelles in NIVEAUX.items():
+            for niveau, libelle in enumerate(libelles[1:], start=1):
+                periodes = self.periodes[(self.periodes['indicateur'] == indicateur)
+                                         & (self.periodes['niveau'] == niveau)]
+                variation = np.zeros(self.nb_jours + 1, dtype=np.int32)
+                np.add.at(variation, periodes['debut'].to_numpy(), 1)
+                np.add.at(variation, periodes['fin'].to_numpy(), -1)
+                colonnes[libelle] = np.cumsum(variation)[:-1]
+        jours = pd.date_range(self.origine, periods=self.nb_jours, freq='D')
+        return pd.DataFrame({'jour': jours, **colonnes})
+
+    def en_alerte(self, jour) -> pd.DataFrame:
+        """
+        Départements au-dessus d'au moins un seuil au jour J :
+        dep, niveau_incidence, incidence_depuis, positivite_depuis (NaT si sous le seuil)
+        """
+        j = (pd.Timestamp(jour) - self.origine).days
+        actives = self.periodes[(self._debut <= j) & (j < self._fin)]
+        depuis = self.origine + pd.to_timedelta(actives['debut'], unit='D')
+        actives = actives.assign(depuis=depuis.to_numpy())
+        incidence = actives[actives['indicateur'] == 'taux_incidence'].set_index('dep')
+        positivite = actives[actives['indicateur'] == 'taux_positivite'].set_index('dep')
+        tableau = pd.DataFrame(index=incidence.index.union(positivite.index).rename('dep'))
+        tableau['niveau_incidence'] = incidence['niveau'].reindex(tableau.index).fillna(0).astype(int)
+        tableau['incidence_depuis'] = incidence['depuis'].reindex(tableau.index)
+        tableau['positivite_depuis'] = positivite['depuis'].reindex(tableau.index)
+        return (tableau.reset_index()
+                .sort_values(['niveau_incidence', 'dep'], ascending=[False, True])
+                .reset_index(drop=True))
+
+    def franchissements(self, debut, fin=None) -> pd.DataFrame:
+        """Franchissements entre debut et fin inclus (un seul jour si fin=None)"""
+        fin = debut if fin is None else fin
+        bornes = np.searchsorted(self._jours_evenements,
+                                 [(pd.Timestamp(debut) - self.origine).days,
+                                  (pd.Timestamp(fin) - self.origine).days + 1])
+        return self.evenements.iloc[bornes[0]:bornes[1]]
+
+    def departement(self, dep: str) -> pd.DataFrame:
+        """Historique des franchissements d'un département"""
+        return self._par_dep.get(dep, self.evenements.iloc[0:0])
+
+
+#  Vérification
+def en_alerte_par_filtres(tests_dep: pd.DataFrame, jour) -> pd.DataFrame:
+    """Réponse historique : un filtre par département, dernière valeur connue au jour J"""
+    lignes = []
+    for dep in tests_dep['dep'].unique():
+        serie = tests_dep[(tests_dep['dep'] == dep) & (tests_dep['jour'] <= jour)]
+        if serie.empty:
+            continue
+        derniere = serie.iloc[-1]
+        niveau = sum(derniere['taux_incidence'] > s for s in SEUILS['taux_incidence'])
+        positif = derniere['taux_positivite'] > SEUILS['taux_positivite'][0]
+        if niveau or positif:
+            lignes.append({'dep': dep, 'niveau_incidence': niveau, 'positivite': positif})
+    return pd.DataFrame(lignes, columns=['dep', 'niveau_incidence', 'positivite'])
+
+
+def verifier_alertes(tests_dep: pd.DataFrame, jours_incrementaux: int = 30,
+                     requetes: int = 20) -> pd.DataFrame:
+    """
+    - prolongements jour par jour == détection complète
+    - « en alerte au jour J » de l'index == filtres par département, sur des jours tirés au hasard
+    Lève AssertionError sinon ; retourne les temps.
+    """
+    tests_dep = tests_dep[COLONNES_DEP].sort_values(['dep', 'jour']).reset_index(drop=True)
+    jours = np.sort(tests_dep['jour'].unique())
+
+    debut = time.perf_counter()
+    complet = detecter_franchissements(tests_dep)
+    duree_complete = time.perf_counter() - debut
+
+    evenements = detecter_franchissements(tests_dep[tests_dep['jour'] <= jours[-jours_incrementaux - 1]])
+    durees = []
+    for jour in jours[-jours_incrementaux:]:
+        debut = time.perf_counter()
+        nouveaux = prolonger_franchissements(evenements, tests_dep[tests_dep['jour'] == jour])
+        durees.append(time.perf_counter() - debut)
+        evenements = pd.concat([evenements, nouveaux], ignore_index=True)
+    pd.testing.assert_frame_equal(evenements, complet, check_dtype=False, obj="prolongements")
+
+    debut = time.perf_counter()
+    index = IndexAlertes(complet, jours[0], jours[-1])
+    duree_index = time.perf_counter() - debut
+
+    tirage = np.random.default_rng(0).choice(jours, size=requetes)
+    temps_index, temps_filtres = [], []
+    for jour in tirage:
+        debut = time.perf_counter()
+        reponse = index.en_alerte(jour)
+        temps_index.append(time.perf_counter() - debut)
+        debut = time.perf_counter()
+        attendu = en_alerte_par_filtres(tests_dep, jour)
+        temps_filtres.append(time.perf_counter() - debut)
+
+        obtenu = pd.DataFrame({'dep': reponse['dep'],
+                               'niveau_incidence': reponse['niveau_incidence'],
+                               'positivite': reponse['positivite_depuis'].notna()})
+        pd.testing.assert_frame_equal(
+            obtenu.sort_values('dep').reset_index(drop=True),
+            attendu.sort_values('dep').reset_index(drop=True),
+            check_dtype=False, obj=f"en alerte au {pd.Timestamp(jour).date()}")
+
+    return pd.DataFrame([
+        {"calcul": "détection complète (matrice dep × jour)", "temps_ms": round(duree_complete * 1000, 1)},
+        {"calcul": "prolongement d'un jour (médiane)", "temps_ms": round(float(np.median(durees)) * 1000, 1)},
+        {"calcul": "construction de l'index", "temps_ms": round(duree_index * 1000, 1)},
+        {"calcul": "en alerte au jour J : index (médiane)",
+         "temps_ms": round(float(np.median(temps_index)) * 1000, 2)},
+        {"calcul": "en alerte au jour J : filtres par département (médiane)",
+         "temps_ms": round(float(np.median(temps_filtres)) * 1000, 2)},
+    ])
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    tests_dep = lire_table("tests_par_dep", PROCESSED, colonnes=COLONNES_DEP)
+
+    print("ALERTES DÉPARTEMENTALES — VÉRIFICATION")
+    print("=" * 50)
+    print(verifier_alertes(tests_dep).to_string(index=False))
+
+    evenements = mettre_a_jour_alertes(PROCESSED)
+    print(f"\n{len(evenements)} franchissements "
+          f"({(evenements['sens'] > 0).sum()} montées) → alertes_departements")
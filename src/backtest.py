@@ -0,0 +1,208 @@
+#  EpiSight — Backtesting du modèle prédictif
+#  Origine glissante : entraînement jusqu'à chaque date de coupure,
+#  évaluation sur les jours suivants (horizon) — plis entraînés en parallèle
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictions import PARAMETRES_PROPHET, creer_modele, preparer_donnees_prophet
+
+
+def generer_coupures(df_prophet: pd.DataFrame, horizon: int = 7,
+                     pas_jours: int = 30, min_entrainement: int = 180) -> list:
+    """
+    Dates de coupure de l'origine glissante : la première laisse min_entrainement
+    jours d'historique, la dernière laisse horizon jours à évaluer
+    """
+    premier = df_prophet['ds'].min() + pd.Timedelta(days=min_entrainement)
+    dernier = df_prophet['ds'].max() - pd.Timedelta(days=horizon)
+    if premier > dernier:
+        return []
+    return list(pd.date_range(premier, dernier, freq=f'{pas_jours}D'))
+
+
+def _cle_pli(df_prophet: pd.DataFrame, coupure: pd.Timestamp, horizon: int,
+             parametres: dict) -> str:
+    # Données vues par le pli (entraînement + évaluation) + configuration
+    fenetre = df_prophet[df_prophet['ds'] <= coupure + pd.Timedelta(days=horizon)]
+    h = hashlib.sha256()
+    h.update(fenetre['ds'].to_numpy(dtype='datetime64[ns]').astype(np.int64).tobytes())
+    h.update(fenetre['y'].to_numpy(dtype=float).tobytes())
+    h.update(json.dumps({'coupure': str(coupure.date()), 'horizon': horizon,
+                         'parametres': parametres}, sort_keys=True).encode())
+    return h.hexdigest()[:32]
+
+
+def evaluer_pli(df_prophet: pd.DataFrame, coupure: pd.Timestamp, horizon: int,
+                surcharge: dict) -> dict:
+    """
+    Entraîne sur ds <= coupure, prédit les 'horizon' jours suivants
+    et mesure erreurs, couverture de l'intervalle et temps de calcul
+
+    - surcharge : paramètres qui remplacent ceux de PARAMETRES_PROPHET (creer_modele)
+    """
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    entrainement = df_prophet[df_prophet['ds'] <= coupure]
+    reel = df_prophet[(df_prophet['ds'] > coupure) &
+                      (df_prophet['ds'] <= coupure + pd.Timedelta(days=horizon))]
+
+    debut = time.perf_counter()
+    modele = creer_modele(**surcharge)
+    modele.fit(entrainement)
+    duree_fit = time.perf_counter() - debut
+
+    # Seules les dates de l'horizon sont prédites
+    debut = time.perf_counter()
+    prediction = modele.predict(reel[['ds']])
+    duree_predict = time.perf_counter() - debut
+
+    y = reel['y'].to_numpy()
+    yhat = prediction['yhat'].clip(lower=0).to_numpy()
+    basse = prediction['yhat_lower'].clip(lower=0).to_numpy()
+    haute = prediction['yhat_upper'].clip(lower=0).to_numpy()
+    non_nuls = y > 0
+
+    return {
+        'coupure': coupure,
+        'mae': float(np.mean(np.abs(y - yhat))),
+        'mape': float(np.mean(np.abs(y - yhat)[non_nuls] / y[non_nuls]) * 100) if non_nuls.any() else np.nan,
+        'couverture': float(np.mean((y >= basse) & (y <= haute)) * 100),
+        'duree_fit_s': duree_fit,
+        'duree_predict_s': duree_predict,
+    }
+
+
+def _lire_cache(chemin: Path):
+    if not chemin.exists():
+        return None
+    resultat = json.loads(chemin.read_text())
+    resultat['coupure'] = pd.Timestamp(resultat['coupure'])
+    return resultat
+
+
+def _ecrire_cache(chemin: Path, resultat: dict) -> None:
+    contenu = {**resultat, 'coupure': resultat['coupure'].strftime('%Y-%m-%d')}
+    temporaire = chemin.with_name(f".{chemin.name}.{os.getpid()}.tmp")
+    temporaire.write_text(json.dumps(contenu))
+    os.replace(temporaire, chemin)
+
+
+def backtester(df_tests_nat: pd.DataFrame,
+               configurations: list = None,
+               colonne: str = 'cas_mm7',
+               horizon: int = 7,
+               pas_jours: int = 30,
+               min_entrainement: int = 180,
+               n_jobs: int = None,
+               dossier_cache: Path = None,
+               vagues: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Backtest en origine glissante pour une ou plusieurs configurations Prophet
+
+    - configurations : liste de surcharges de PARAMETRES_PROPHET ([{}] = configuration actuelle)
+    - dossier_cache  : un fichier JSON par (coupure, configuration) — seuls les plis
+                       absents du cache sont entraînés
+    - vagues         : vagues_detectees, pour rattacher chaque coupure à une vague
+
+    Retourne un pli par ligne : configuration, coupure, vague, mae, mape,
+    couverture, duree_fit_s, duree_predict_s, depuis_cache
+    ValueError si l'historique ne laisse aucune coupure (min_entrainement + horizon)
+    """
+    from joblib import Parallel, delayed
+
+    configurations = configurations or [{}]
+    df_prophet = preparer_donnees_prophet(df_tests_nat, colonne)
+    coupures = generer_coupures(df_prophet, horizon, pas_jours, min_entrainement)
+    if not coupures:
+        raise ValueError(f"Historique trop court : {len(df_prophet)} jours, il en faut plus de "
+                         f"min_entrainement + horizon = {min_entrainement} + {horizon}")
+    if dossier_cache is not None:
+        dossier_cache = Path(dossier_cache)
+        dossier_cache.mkdir(parents=True, exist_ok=True)
+
+    # Répartition : plis déjà en cache / plis à entraîner
+    plis, a_calculer = [], []
+    for surcharge in configurations:
+        parametres = {**PARAMETRES_PROPHET, **surcharge}
+        nom = json.dumps(surcharge, sort_keys=True)
+        for coupure in coupures:
+            chemin = None
+            if dossier_cache is not None:
+                chemin = dossier_cache / f"{_cle_pli(df_prophet, coupure, horizon, parametres)}.json"
+            resultat = _lire_cache(chemin) if chemin is not None else None
+            if resultat is not None:
+                plis.append({'configuration': nom, **resultat, 'depuis_cache': True})
+            else:
+                a_calculer.append((nom, surcharge, coupure, chemin))
+
+    print(f"{len(plis) + len(a_calculer)} plis ({len(configurations)} configuration(s) × "
+          f"{len(coupures)} coupures) — {len(a_calculer)} à entraîner, {len(plis)} en cache")
+
+    if a_calculer:
+        n_jobs = min(n_jobs or os.cpu_count() or 1, len(a_calculer))
+        resultats = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(evaluer_pli)(df_prophet, coupure, horizon, surcharge)
+            for _, surcharge, coupure, _ in a_calculer
+        )
+        for (nom, _, _, chemin), resultat in zip(a_calculer, resultats):
+            if chemin is not None:
+                _ecrire_cache(chemin, resultat)
+            plis.append({'configuration': nom, **resultat, 'depuis_cache': False})
+
+    resultats = pd.DataFrame(plis).sort_values(['configuration', 'coupure']).reset_index(drop=True)
+    resultats.insert(2, 'vague', pd.NA)
+    if vagues is not None:
+        for numero, vague in enumerate(vagues.itertuples(), start=1):
+            dans_vague = (resultats['coupure'] >= vague.debut) & (resultats['coupure'] <= vague.fin)
+            resultats.loc[dans_vague, 'vague'] = numero
+    return resultats
+
+
+def resumer(resultats: pd.DataFrame) -> pd.DataFrame:
+    """Moyennes par configuration, en vague / hors vague"""
+    resultats = resultats.assign(periode=np.where(resultats['vague'].notna(), 'en vague', 'hors vague'))
+    return (
+        resultats.groupby(['configuration', 'periode'])
+        .agg(plis=('mae', 'size'), mae=('mae', 'mean'), mape=('mape', 'mean'),
+             couverture=('couverture', 'mean'),
+             duree_fit_s=('duree_fit_s', 'mean'), duree_predict_s=('duree_predict_s', 'mean'))
+        .round(2)
+        .reset_index()
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backtest du modèle Prophet EpiSight")
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--pas", type=int, default=30, help="jours entre deux coupures")
+    parser.add_argument("--cps", type=float, nargs="*", default=[],
+                        help="valeurs de changepoint_prior_scale à comparer à la configuration actuelle")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    BASE = Path(__file__).parent.parent
+    PROCESSED = BASE / "data" / "processed"
+    tests_nat = pd.read_csv(PROCESSED / "indicateurs_tests.csv", parse_dates=['jour'])
+    vagues = pd.read_csv(PROCESSED / "vagues_detectees.csv", parse_dates=['debut', 'fin'])
+
+    BACKTESTS = BASE / "models" / "backtests"
+    configurations = [{}] + [{'changepoint_prior_scale': cps} for cps in args.cps]
+    resultats = backtester(tests_nat, configurations, horizon=args.horizon,
+                           pas_jours=args.pas, n_jobs=args.n_jobs,
+                           dossier_cache=BACKTESTS, vagues=vagues)
+
+    print("\nRÉSULTATS DU BACKTEST")
+    print("=" * 50)
+    print(resumer(resultats).to_string(index=False))
+    # À côté du cache des plis : un résultat de backtest n'est pas une donnée du dashboard
+    resultats.to_csv(BACKTESTS / "backtest_resultats.csv", index=False)
+    print(f"\nRésultats par pli : {BACKTESTS / 'backtest_resultats.csv'}")
@@ -0,0 +1,110 @@
+#  EpiSight — Cache des figures du dashboard
+#  Figures Plotly construites une fois par (graphique, entrées, version des données)
+#  et partagées entre sessions, avec éviction LRU bornée en mémoire
+
+import functools
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def taille_figure(figure) -> int:
+    """
+    Octets occupés par les données d'une figure : tableaux NumPy des traces
+    (nbytes), 8 octets par élément de liste ou valeur isolée — sans sérialiser
+    la figure en JSON, dix à cent fois plus long
+    """
+    def taille(valeur) -> int:
+        if isinstance(valeur, np.ndarray):
+            return valeur.nbytes
+        if isinstance(valeur, dict):
+            return sum(taille(v) for v in valeur.values())
+        if isinstance(valeur, (list, tuple)):
+            if valeur and isinstance(valeur[0], (dict, list, tuple, np.ndarray)):
+                return sum(taille(v) for v in valeur)
+            return 8 * len(valeur)
+        return 8
+
+    return sum(taille(trace.to_plotly_json()) for trace in figure.data) + taille(figure.layout.to_plotly_json())
+
+
+class CacheFigures:
+    """
+    Cache LRU de figures, borné par la taille de leurs données en mémoire
+    (taille_figure : tableaux des traces, sans sérialisation JSON)
+
+    - obtenir(graphique, cle, construire) : figure en cache, sinon construite puis stockée
+    - memoiser                             : décorateur, clé = (nom de la fonction, arguments, version)
+    - statistiques()                       : succès / échecs / temps de construction par graphique
+
+    Les figures stockées sont partagées entre sessions : elles ne doivent
+    pas être modifiées après construction (st.plotly_chart ne les modifie pas).
+    """
+
+    def __init__(self, taille_max_mo: float = 64, version=None):
+        self.taille_max = taille_max_mo * 1024 * 1024
+        self.version = version or (lambda: None)
+        self._entrees = OrderedDict()         # cle -> (figure, octets)
+        self._verrou = threading.Lock()
+        self.taille = 0
+        self.succes, self.echecs = Counter(), Counter()
+        self.duree_construction = Counter()
+        self.evictions = 0
+
+    def obtenir(self, graphique: str, cle: tuple, construire):
+        cle = (graphique, cle, self.version())
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.succes[graphique] += 1
+                return self._entrees[cle][0]
+
+        # Construction hors verrou : les autres sessions ne sont pas bloquées
+        # (deux sessions peuvent construire la même figure, la seconde remplace la première)
+        debut = time.perf_counter()
+        figure = construire()
+        octets = taille_figure(figure)
+        duree = time.perf_counter() - debut
+
+        with self._verrou:
+            self.echecs[graphique] += 1
+            self.duree_construction[graphique] += duree
+            if cle in self._entrees:
+                self.taille -= self._entrees.pop(cle)[1]
+            self._entrees[cle] = (figure, octets)
+            self.taille += octets
+            while self.taille > self.taille_max and len(self._entrees) > 1:
+                _, (_, octets_evinces) = self._entrees.popitem(last=False)
+                self.taille -= octets_evinces
+                self.evictions += 1
+        return figure
+
+    def memoiser(self, fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args):
+            return self.obtenir(fonction.__name__, args, lambda: fonction(*args))
+        return enveloppe
+
+    def __len__(self) -> int:
+        return len(self._entrees)
+
+    def vider(self) -> None:
+        with self._verrou:
+            self._entrees.clear()
+            self.taille = 0
+
+    def statistiques(self) -> pd.DataFrame:
+        with self._verrou:
+            graphiques = sorted(set(self.succes) | set(self.echecs))
+            lignes = [{
+                'graphique': nom,
+                'succes': self.succes[nom],
+                'echecs': self.echecs[nom],
+                'taux_succes_pct': round(100 * self.succes[nom] / (self.succes[nom] + self.echecs[nom]), 1),
+                'construction_ms': round(1000 * self.duree_construction[nom] / max(self.echecs[nom], 1), 1),
+            } for nom in graphiques]
+        return pd.DataFrame(lignes, columns=['graphique', 'succes', 'echecs',
+                                             'taux_succes_pct', 'construction_ms'])
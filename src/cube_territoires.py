@@ -0,0 +1,341 @@
+#  EpiSight — Cube d'agrégats territoriaux
+#  Blocs pré-agrégés (département × jour / semaine × mesure) : toute région ou tout
+#  groupe de départements se résout par une somme de blocs, taux recalculés ensuite
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indicators import construire_grille, somme_glissante, vers_matrice
+
+# Régions (code INSEE 2016) → nom, départements
+REGIONS = {
+    "84": ("Auvergne-Rhône-Alpes", ["01", "03", "07", "15", "26", "38", "42", "43", "63", "69", "73", "74"]),
+    "27": ("Bourgogne-Franche-Comté", ["21", "25", "39", "58", "70", "71", "89", "90"]),
+    "53": ("Bretagne", ["22", "29", "35", "56"]),
+    "24": ("Centre-Val de Loire", ["18", "28", "36", "37", "41", "45"]),
+    "94": ("Corse", ["2A", "2B"]),
+    "44": ("Grand Est", ["08", "10", "51", "52", "54", "55", "57", "67", "68", "88"]),
+    "32": ("Hauts-de-France", ["02", "59", "60", "62", "80"]),
+    "11": ("Île-de-France", ["75", "77", "78", "91", "92", "93", "94", "95"]),
+    "28": ("Normandie", ["14", "27", "50", "61", "76"]),
+    "75": ("Nouvelle-Aquitaine", ["16", "17", "19", "23", "24", "33", "40", "47", "64", "79", "86", "87"]),
+    "76": ("Occitanie", ["09", "11", "12", "30", "31", "32", "34", "46", "48", "65", "66", "81", "82"]),
+    "52": ("Pays de la Loire", ["44", "49", "53", "72", "85"]),
+    "93": ("Provence-Alpes-Côte d'Azur", ["04", "05", "06", "13", "83", "84"]),
+    "01": ("Guadeloupe", ["971"]),
+    "02": ("Martinique", ["972"]),
+    "03": ("Guyane", ["973"]),
+    "04": ("La Réunion", ["974"]),
+    "06": ("Mayotte", ["976"]),
+}
+OUTRE_MER = ["971", "972", "973", "974", "976", "978"]
+
+# Mesure → agrégation dans le temps (semaine) ; toutes s'additionnent entre départements
+#   somme   : flux quotidiens          moyenne : stocks et dénominateurs
+#   dernier : cumuls (valeur du dernier jour de la semaine)
+MESURES = {
+    'cas_positifs': 'somme', 'total_tests': 'somme', 'population': 'moyenne', 'deps_tests': 'moyenne',
+    'hospitalises': 'moyenne', 'reanimation': 'moyenne', 'deces': 'somme', 'deps_hosp': 'moyenne',
+    'n_dose1': 'somme', 'n_complet': 'somme', 'n_rappel': 'somme',
+    'n_cum_dose1': 'dernier', 'n_cum_complet': 'dernier', 'n_cum_rappel': 'dernier',
+    'population_vacc': 'moyenne', 'deps_vacc': 'moyenne',
+}
+# Flux et stocks d'une source : NaN pour un territoire dont aucun département n'y figure ce jour-là
+PRESENCE = {'cas_positifs': 'deps_tests', 'total_tests': 'deps_tests',
+            'hospitalises': 'deps_hosp', 'reanimation': 'deps_hosp', 'deces': 'deps_hosp',
+            'n_dose1': 'deps_vacc', 'n_complet': 'deps_vacc', 'n_rappel': 'deps_vacc'}
+TAUX = ['taux_incidence', 'taux_positivite', 'couv_dose1', 'couv_complet', 'couv_rappel']
+
+
+def territoires(deps_connus=None) -> dict:
+    """
+    Nom → départements : régions, puis groupes (France entière, métropole, outre-mer).
+    deps_connus : départements présents dans les données (défaut : ceux des régions)
+    """
+    regions = {nom: deps for nom, deps in REGIONS.values()}
+    tous = sorted(set(deps_connus) if deps_connus is not None else
+                  {dep for deps in regions.values() for dep in deps})
+    return {
+        **dict(sorted(regions.items())),
+        "France entière": tous,
+        "France métropolitaine": [dep for dep in tous if dep not in OUTRE_MER],
+        "Outre-mer": [dep for dep in tous if dep in OUTRE_MER],
+    }
+
+
+def table_territoires(deps_connus=None) -> pd.DataFrame:
+    """Table de correspondance territoire, niveau ('region' / 'groupe'), dep"""
+    noms_regions = {nom for nom, _ in REGIONS.values()}
+    return pd.DataFrame([
+        {'territoire': nom, 'niveau': 'region' if nom in noms_regions else 'groupe', 'dep': dep}
+        for nom, deps in territoires(deps_connus).items() for dep in deps
+    ])
+
+
+#  Construction des blocs
+def construire_cube(tests_dep: pd.DataFrame, hosp_dep: pd.DataFrame,
+                    vacc_dep: pd.DataFrame) -> tuple:
+    """
+    (cube_jour, cube_semaine) au format long dep, jour, MESURES — une passe matricielle.
+
+    - cas, tests, vaccinations : flux quotidiens ; décès : différence des cumuls
+    - cumuls vaccinaux prolongés jusqu'au dernier jour, 0 avant la campagne
+    - population / population_vacc : population du département les jours où il
+      figure dans tests / vaccination, dénominateurs des taux du groupe
+    - deps_* : départements présents ce jour-là dans chaque source
+    Semaine : du lundi au dimanche, 'jour' = lundi.
+    """
+    sources = [tests_dep[['dep', 'jour']], hosp_dep[['dep', 'jour']], vacc_dep[['dep', 'jour']]]
+    deps, jours, i, j = construire_grille(pd.concat(sources, ignore_index=True))
+    forme = (len(deps), len(jours))
+    bornes = np.cumsum([0] + [len(s) for s in sources])
+    matrice = lambda k, valeurs: vers_matrice(np.asarray(valeurs, dtype=float),
+                                              i[bornes[k]:bornes[k + 1]], j[bornes[k]:bornes[k + 1]], forme)
+
+    presents = {source: ~np.isnan(matrice(k, np.zeros(len(s))))
+                for k, (source, s) in enumerate(zip(['tests', 'hosp', 'vacc'], sources))}
+    population = np.nanmax(matrice(0, tests_dep['population']), axis=1, keepdims=True)
+    population = np.nan_to_num(population)
+
+    deces = matrice(1, hosp_dep['deces'])
+    cumuls = {c: pd.DataFrame(matrice(2, vacc_dep[c]).T).ffill().fillna(0).to_numpy().T
+              for c in ['n_cum_dose1', 'n_cum_complet', 'n_cum_rappel']}
+    blocs = {
+        'cas_positifs': matrice(0, tests_dep['cas_positifs']),
+        'total_tests': matrice(0, tests_dep['total_tests']),
+        'population': np.where(presents['tests'], population, 0.0),
+        'deps_tests': presents['tests'],
+        'hospitalises': matrice(1, hosp_dep['hospitalises']),
+        'reanimation': matrice(1, hosp_dep['reanimation']),
+        'deces': np.clip(np.diff(deces, axis=1, prepend=np.nan), 0, None),
+        'deps_hosp': presents['hosp'],
+        'n_dose1': matrice(2, vacc_dep['n_dose1']),
+        'n_complet': matrice(2, vacc_dep['n_complet']),
+        'n_rappel': matrice(2, vacc_dep['n_rappel']),
+        **cumuls,
+        'population_vacc': np.where(presents['vacc'] | (cumuls['n_cum_dose1'] > 0), population, 0.0),
+        'deps_vacc': presents['vacc'],
+    }
+    valeurs = np.stack([np.nan_to_num(np.asarray(blocs[m], dtype=float)) for m in MESURES], axis=-1)
+
+    # Semaines : jours regroupés par lundi, agrégation propre à chaque mesure
+    lundis = jours - pd.to_timedelta(jours.dayofweek, unit='D')
+    semaines, debuts = np.unique(lundis, return_index=True)
+    fins = np.append(debuts[1:], len(jours)) - 1
+    nb_jours = (fins - debuts + 1)[None, :]
+    hebdo = np.empty((len(deps), len(semaines), len(MESURES)))
+    for k, agregation in enumerate(MESURES.values()):
+        if agregation == 'dernier':
+            hebdo[..., k] = valeurs[:, fins, k]
+        else:
+            sommes = np.add.reduceat(valeurs[..., k], debuts, axis=1)
+            hebdo[..., k] = sommes if agregation == 'somme' else sommes / nb_jours
+
+    def en_table(blocs, periodes):
+        table = pd.DataFrame(blocs.reshape(-1, len(MESURES)), columns=list(MESURES))
+        table.insert(0, 'jour', np.tile(periodes, len(deps)))
+        table.insert(0, 'dep', np.repeat(deps, len(periodes)))
+        return table
+
+    return en_table(valeurs, jours), en_table(hebdo, pd.DatetimeIndex(semaines))
+
+
+def mettre_a_jour_cube(dossier_processed: Path) -> None:
+    """Reconstruit cube_jour, cube_semaine et territoires depuis les tables départementales"""
+    from stockage import lire_table, sauvegarder_table
+
+    dossier_processed = Path(dossier_processed)
+    cube_jour, cube_semaine = construire_cube(
+        lire_table("tests_par_dep", dossier_processed,
+                   colonnes=['dep', 'jour', 'population', 'cas_positifs', 'total_tests']),
+        lire_table("hospitalisations_clean", dossier_processed,
+                   colonnes=['dep', 'jour', 'hospitalises', 'reanimation', 'deces']),
+        lire_table("vaccination_clean", dossier_processed,
+                   colonnes=['dep', 'jour', 'n_dose1', 'n_complet', 'n_rappel',
+                             'n_cum_dose1', 'n_cum_complet', 'n_cum_rappel']))
+    sauvegarder_table(cube_jour, "cube_jour", dossier_processed)
+    sauvegarder_table(cube_semaine, "cube_semaine", dossier_processed)
+    sauvegarder_table(table_territoires(cube_jour['dep'].unique()), "territoires", dossier_processed)
+
+
+#  Requêtes
+class CubeTerritoires:
+    """
+    Blocs (département × période × mesure) en mémoire, une fréquence ('jour' ou
+    'semaine'). Un territoire = un vecteur d'appartenance sur les départements :
+    ses sommes sont un produit matriciel avec les blocs, tous les territoires
+    demandés en une fois ; les taux sont recalculés à partir des sommes
+    (numérateurs / dénominateurs), jamais moyennés entre départements.
+    """
+
+    def __init__(self, cube: pd.DataFrame, frequence: str = 'jour'):
+        deps, periodes, i, j = construire_grille(cube)
+        self.frequence = frequence
+        self.deps = deps
+        # Semaines : la grille continue contient aussi les jours intermédiaires
+        self.periodes = pd.DatetimeIndex(np.unique(cube['jour']))
+        colonnes = periodes.get_indexer(self.periodes)
+        self.valeurs = np.zeros((len(deps), len(periodes), len(MESURES)))
+        self.valeurs[i, j] = cube[list(MESURES)].to_numpy(dtype=float)
+        self.valeurs = np.ascontiguousarray(self.valeurs[:, colonnes])
+        self._rang = {dep: k for k, dep in enumerate(deps)}
+
+    def appartenance(self, groupes: dict) -> np.ndarray:
+        """Matrice (territoire × département) à partir de {nom: départements}"""
+        matrice = np.zeros((len(groupes), len(self.deps)))
+        for ligne, deps in enumerate(groupes.values()):
+            matrice[ligne, [self._rang[dep] for dep in deps if dep in self._rang]] = 1.0
+        return matrice
+
+    def sommes(self, groupes: dict) -> np.ndarray:
+        """Sommes des blocs (territoire × période × mesure), un produit matriciel"""
+        return np.tensordot(self.appartenance(groupes), self.valeurs, axes=1)
+
+    def taux(self, sommes: np.ndarray) -> dict:
+        """Taux (territoire × période) recalculés depuis les sommes"""
+        mesure = {m: sommes[..., k] for k, m in enumerate(MESURES)}
+        cas, tests = mesure['cas_positifs'], mesure['total_tests']
+        if self.frequence == 'jour':
+            # Incidence et positivité sur 7 jours glissants, comme pour les départements
+            cas, _ = somme_glissante(cas)
+            tests, _ = somme_glissante(tests)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            resultat = {
+                'taux_incidence': np.where(mesure['deps_tests'] > 0, cas / mesure['population'] * 1e5, np.nan),
+                'taux_positivite': np.where(tests > 0, cas / tests * 100, np.nan),
+            }
+            for dose in ['dose1', 'complet', 'rappel']:
+                resultat[f'couv_{dose}'] = np.where(mesure['population_vacc'] > 0,
+                                                    mesure[f'n_cum_{dose}'] / mesure['population_vacc'] * 100,
+                                                    np.nan)
+        return resultat
+
+    def agreger(self, groupes: dict, debut=None, fin=None) -> pd.DataFrame:
+        """
+        Format long territoire, jour, MESURES (sommes), TAUX pour chaque
+        territoire de {nom: départements}, bornes incluses
+        """
+        sommes = self.sommes(groupes)
+        taux = self.taux(sommes)
+        garder = np.ones(len(self.periodes), dtype=bool)
+        if debut is not None:
+            garder &= self.periodes >= pd.Timestamp(debut)
+        if fin is not None:
+            garder &= self.periodes <= pd.Timestamp(fin)
+        sommes = sommes[:, garder]
+
+        colonnes = {'territoire': np.repeat(list(groupes), int(garder.sum())),
+                    'jour': np.tile(self.periodes[garder], len(groupes))}
+        for k, mesure in enumerate(MESURES):
+            valeurs = sommes[..., k]
+            if mesure in PRESENCE:
+                # Aucun département présent dans la source : inconnu, pas zéro
+                valeurs = np.where(sommes[..., list(MESURES).index(PRESENCE[mesure])] > 0, valeurs, np.nan)
+            colonnes[mesure] = valeurs.ravel()
+        for nom, valeurs in taux.items():
+            colonnes[nom] = valeurs[:, garder].ravel()
+        return pd.DataFrame(colonnes)
+
+    def territoire(self, deps: list, debut=None, fin=None) -> pd.DataFrame:
+        """Série d'un seul groupe de départements (sans colonne territoire)"""
+        return self.agreger({'groupe': deps}, debut, fin).drop(columns='territoire')
+
+    def comparer(self, groupes: dict, debut, fin) -> pd.DataFrame:
+        """
+        Une ligne par territoire sur [debut, fin] : cas, positivité de la période
+        (Σ cas / Σ tests), incidence au dernier jour et maximale, couverture
+        complète en fin de période, pic de réanimation
+        """
+        periode = self.agreger(groupes, debut, fin)
+        par_territoire = periode.groupby('territoire', sort=False)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            positivite = par_territoire['cas_positifs'].sum() / par_territoire['total_tests'].sum() * 100
+        return pd.DataFrame({
+            'cas_positifs': par_territoire['cas_positifs'].sum(),
+            'taux_positivite': positivite,
+            'taux_incidence_fin': par_territoire['taux_incidence'].last(),
+            'taux_incidence_max': par_territoire['taux_incidence'].max(),
+            'couv_complet': par_territoire['couv_complet'].last(),
+            'pic_reanimation': par_territoire['reanimation'].max(),
+        }).reset_index()
+
+
+#  Vérification
+def reference_pandas(tests_dep: pd.DataFrame, vacc_dep: pd.DataFrame, deps: list) -> pd.DataFrame:
+    """Réagrégation des lignes brutes : filtre, groupby jour, fenêtres 7 j, ratios"""
+    tests = tests_dep[tests_dep['dep'].isin(deps)].groupby('jour')[
+        ['cas_positifs', 'total_tests', 'population']].sum().asfreq('D', fill_value=0)
+    cas_7j = tests['cas_positifs'].rolling(7, min_periods=1).sum()
+    tests_7j = tests['total_tests'].rolling(7, min_periods=1).sum()
+    vacc = vacc_dep[vacc_dep['dep'].isin(deps)].groupby('jour')['n_cum_complet'].sum()
+    population = tests_dep[tests_dep['dep'].isin(deps)].groupby('dep')['population'].max().sum()
+    return pd.DataFrame({
+        'taux_incidence': (cas_7j / tests['population'] * 1e5).replace(np.inf, np.nan),
+        'taux_positivite': cas_7j / tests_7j * 100,
+        'couv_complet': vacc / population * 100,
+    })
+
+
+def verifier_cube(cube: CubeTerritoires, tests_dep: pd.DataFrame, vacc_dep: pd.DataFrame,
+                  repetitions: int = 20) -> pd.DataFrame:
+    """
+    Taux de chaque région par le cube == réagrégation pandas des lignes brutes
+    (jours où tous ses départements sont présents) ; temps d'une requête et de
+    toutes les régions en un lot vs la réagrégation. Lève AssertionError sinon.
+    """
+    groupes = territoires(cube.deps)
+    for nom, deps in groupes.items():
+        attendu = reference_pandas(tests_dep, vacc_dep, deps)
+        obtenu = cube.territoire(deps).set_index('jour')
+        for colonne in attendu.columns:
+            a = attendu[colonne].dropna()
+            o = obtenu[colonne].reindex(a.index)
+            np.testing.assert_allclose(o, a, rtol=1e-9, err_msg=f"{nom} / {colonne}")
+
+    mesures = {}
+    idf = groupes["Île-de-France"]
+    for libelle, requete in [
+        ("réagrégation pandas, Île-de-France", lambda: reference_pandas(tests_dep, vacc_dep, idf)),
+        ("cube, Île-de-France", lambda: cube.territoire(idf)),
+        (f"cube, {len(groupes)} territoires en un lot", lambda: cube.agreger(groupes)),
+    ]:
+        debut = time.perf_counter()
+        for _ in range(repetitions):
+            requete()
+        mesures[libelle] = (time.perf_counter() - debut) / repetitions * 1000
+    return pd.DataFrame({'requete': list(mesures), 'temps_ms': np.round(list(mesures.values()), 2)})
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    tests_dep = lire_table("tests_par_dep", PROCESSED)
+    vacc_dep = lire_table("vaccination_clean", PROCESSED)
+
+    print("CUBE TERRITORIAL — VÉRIFICATION")
+    print("=" * 50)
+    debut = time.perf_counter()
+    mettre_a_jour_cube(PROCESSED)
+    print(f"Blocs jour + semaine construits : {time.perf_counter() - debut:.1f} s\n")
+
+    cube = CubeTerritoires(lire_table("cube_jour", PROCESSED))
+    print(verifier_cube(cube, tests_dep, vacc_dep).to_string(index=False))
+
+    # Moyenne des taux départementaux ≠ taux de la région (pondération par la population)
+    idf = territoires(cube.deps)["Île-de-France"]
+    dernier = tests_dep['jour'].max()
+    moyenne = tests_dep[(tests_dep['dep'].isin(idf)) & (tests_dep['jour'] == dernier)]['taux_incidence'].mean()
+    region = cube.territoire(idf, dernier, dernier)['taux_incidence'].iloc[0]
+    print(f"\nÎle-de-France au {dernier:%d/%m/%Y} : incidence {region:.1f}/100k "
+          f"(moyenne simple des départements : {moyenne:.1f})")
+
+    hebdo = CubeTerritoires(lire_table("cube_semaine", PROCESSED), frequence='semaine')
+    print("\nDernière semaine par territoire")
+    print(hebdo.comparer(territoires(hebdo.deps), hebdo.periodes[-1], hebdo.periodes[-1])
+          .round(1).to_string(index=False))
@@ -0,0 +1,483 @@
+#  EpiSight — Pipeline ETL automatisé
+#  Téléchargement SPF → nettoyage → agrégation nationale → indicateurs (data/processed)
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from alertes_departements import mettre_a_jour_alertes
+from cube_territoires import mettre_a_jour_cube
+from decalages import calculer_decalages
+from indicators import calculer_indicateurs_dep
+from reproduction import mettre_a_jour_rt
+from stockage import ajouter_lignes, lire_table, sauvegarder_table
+from telechargement import telecharger_en_parallele
+from vagues_departements import mettre_a_jour_vagues_dep
+
+# URL officielles data.gouv.fr Santé Publique France
+DATASETS = {
+    "tests": {
+        "url": "https://www.data.gouv.fr/api/1/datasets/r/426bab53-e3f5-4c6a-9d54-dba4442b3dbc",
+        "fichier": "sp_tests_quotidiens.csv"
+    },
+    "hospitalisations": {
+        "url": "https://www.data.gouv.fr/fr/datasets/r/63352e38-d353-4b54-bfd1-f1b3ee1cabd7",
+        "fichier": "sp_hospitalisations.csv"
+    },
+    "vaccination": {
+        "url": "https://www.data.gouv.fr/fr/datasets/r/83cbbdb9-23cb-455e-8231-69fc25d58111",
+        "fichier": "sp_vaccination.csv"
+    }
+}
+
+SEUIL_VAGUE = 10_000            # cas/jour (MM7) au niveau national
+DUREE_MIN_VAGUE = 14            # jours
+CAPACITE_REA_NORMALE = 5_000    # lits de réanimation
+POP_FRANCE = 68_000_000         # métropole + DOM
+FENETRE_MM = 7                  # moyennes mobiles et taux d'incidence
+
+# Recouvrement pour le mode incrémental : 6 jours pour les fenêtres de 7 jours,
+# +1 jour pour le diff des décès cumulés
+RECOUVREMENT = FENETRE_MM
+
+FICHIER_WATERMARKS = "watermarks.json"
+
+# Lecture en flux des fichiers bruts : colonnes utiles, types, filtre par dataset
+TAILLE_LOT = 4 * 1024 * 1024    # octets de CSV décodés par lot
+LECTURE = {
+    "tests": {
+        "colonnes": {'dep': pa.string(), 'jour': pa.timestamp('ns'), 'pop': pa.int64(),
+                     'P': pa.int64(), 'T': pa.int64(), 'Tp': pa.float64(),
+                     'cl_age90': pa.int64()},
+        "filtre": ('cl_age90', 0),      # tous âges confondus (évite double comptage)
+    },
+    "hospitalisations": {
+        "colonnes": {'dep': pa.string(), 'jour': pa.timestamp('ns'), 'sexe': pa.int64(),
+                     'hosp': pa.int64(), 'rea': pa.int64(), 'rad': pa.int64(), 'dc': pa.int64()},
+        "filtre": ('sexe', 0),          # tous sexes confondus
+    },
+    "vaccination": {
+        "colonnes": {'dep': pa.string(), 'jour': pa.timestamp('ns'), 'clage_vacsi': pa.int64(),
+                     'n_dose1': pa.int64(), 'n_complet': pa.int64(), 'n_rappel': pa.int64(),
+                     'n_cum_dose1': pa.int64(), 'n_cum_complet': pa.int64(),
+                     'n_cum_rappel': pa.int64(),
+                     'couv_dose1': pa.float64(), 'couv_complet': pa.float64(),
+                     'couv_rappel': pa.float64()},
+        "filtre": ('clage_vacsi', 0),   # tous âges confondus
+    },
+}
+
+
+#  Nettoyage (cf. notebooks/02_nettoyage.ipynb)
+def lire_brut(chemin: Path, dataset: str, depuis=None) -> pd.DataFrame:
+    """
+    Lecture en flux d'un fichier SPF (pyarrow, lots de TAILLE_LOT octets) :
+    - seules les colonnes de LECTURE[dataset] sont décodées, déjà typées
+      (virgule décimale comprise : plus de conversion texte des couv_*)
+    - le filtre tous âges / tous sexes et le watermark (jour > depuis)
+      sont appliqués lot par lot
+
+    La mémoire est bornée par un lot + les lignes retenues, quelle que soit
+    la taille du fichier (classes d'âge et de sexe jamais matérialisées).
+    """
+    lecture = LECTURE[dataset]
+    colonne_filtre, valeur = lecture['filtre']
+    gardees = [col for col in lecture['colonnes'] if col != colonne_filtre]
+    lecteur = pacsv.open_csv(
+        chemin,
+        read_options=pacsv.ReadOptions(block_size=TAILLE_LOT),
+        parse_options=pacsv.ParseOptions(delimiter=';'),
+        convert_options=pacsv.ConvertOptions(column_types=lecture['colonnes'],
+                                             include_columns=list(lecture['colonnes']),
+                                             decimal_point=','),
+    )
+    borne = None if depuis is None else pa.scalar(pd.Timestamp(depuis), type=pa.timestamp('ns'))
+
+    lots = []
+    for lot in lecteur:
+        masque = pc.equal(lot[colonne_filtre], valeur)
+        if borne is not None:
+            masque = pc.and_(masque, pc.greater(lot['jour'], borne))
+        lots.append(lot.filter(masque).select(gardees))
+    schema = pa.schema([(col, lecture['colonnes'][col]) for col in gardees])
+    return pa.Table.from_batches(lots, schema=schema).to_pandas()
+
+
+def nettoyer_tests(df: pd.DataFrame) -> pd.DataFrame:
+    # Tp manquant : recalculé depuis P et T, puis 0 si aucun test
+    masque_tp_manquant = df['Tp'].isna()
+    df.loc[masque_tp_manquant, 'Tp'] = (
+        df.loc[masque_tp_manquant, 'P'] / df.loc[masque_tp_manquant, 'T'] * 100
+    ).round(2)
+    df['Tp'] = df['Tp'].fillna(0)
+
+    df = df[['dep', 'jour', 'pop', 'P', 'T', 'Tp']].rename(columns={
+        'P': 'cas_positifs',
+        'T': 'total_tests',
+        'Tp': 'taux_positivite',
+        'pop': 'population'
+    })
+    return df.sort_values(['dep', 'jour']).reset_index(drop=True)
+
+
+def nettoyer_hosp(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[['dep', 'jour', 'hosp', 'rea', 'rad', 'dc']].rename(columns={
+        'hosp': 'hospitalises',
+        'rea': 'reanimation',
+        'rad': 'retour_domicile',
+        'dc': 'deces'
+    })
+    return df.sort_values(['dep', 'jour']).reset_index(drop=True)
+
+
+def nettoyer_vacc(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[[
+        'dep', 'jour',
+        'n_dose1', 'n_complet', 'n_rappel',
+        'n_cum_dose1', 'n_cum_complet', 'n_cum_rappel',
+        'couv_dose1', 'couv_complet', 'couv_rappel'
+    ]]
+    return df.sort_values(['dep', 'jour']).reset_index(drop=True)
+
+
+#  Agrégation nationale
+def agreger_tests(df_tests: pd.DataFrame) -> pd.DataFrame:
+    tests_nat = df_tests.groupby('jour').agg(
+        cas_positifs=('cas_positifs', 'sum'),
+        total_tests=('total_tests', 'sum')
+    ).reset_index().sort_values('jour')
+    tests_nat['taux_positivite'] = (
+        tests_nat['cas_positifs'] / tests_nat['total_tests'] * 100
+    ).round(2)
+    return tests_nat
+
+
+def agreger_hosp(df_hosp: pd.DataFrame) -> pd.DataFrame:
+    return df_hosp.groupby('jour').agg(
+        hospitalises=('hospitalises', 'sum'),
+        reanimation=('reanimation', 'sum'),
+        deces=('deces', 'sum')
+    ).reset_index().sort_values('jour')
+
+
+def agreger_vacc(df_vacc: pd.DataFrame) -> pd.DataFrame:
+    return df_vacc.groupby('jour').agg(
+        doses_jour=('n_dose1', 'sum'),
+        complet_jour=('n_complet', 'sum'),
+        cum_dose1=('n_cum_dose1', 'sum'),
+        cum_complet=('n_cum_complet', 'sum'),
+        cum_rappel=('n_cum_rappel', 'sum')
+    ).reset_index().sort_values('jour')
+
+
+#  Indicateurs (cf. notebooks/03_analyse_indicateurs.ipynb)
+def calculer_indicateurs_tests(tests_nat: pd.DataFrame) -> pd.DataFrame:
+    tests_nat = tests_nat.sort_values('jour').reset_index(drop=True)
+    tests_nat['cas_mm7'] = tests_nat['cas_positifs'].rolling(FENETRE_MM, min_periods=1).mean().round(0)
+    tests_nat['tp_mm7'] = tests_nat['taux_positivite'].rolling(FENETRE_MM, min_periods=1).mean().round(2)
+    tests_nat['en_vague'] = tests_nat['cas_mm7'] > SEUIL_VAGUE
+    tests_nat['groupe'] = (tests_nat['en_vague'] != tests_nat['en_vague'].shift()).cumsum()
+    return tests_nat
+
+
+def calculer_indicateurs_hosp(hosp_nat: pd.DataFrame) -> pd.DataFrame:
+    hosp_nat = hosp_nat.sort_values('jour').reset_index(drop=True)
+    hosp_nat['hosp_mm7'] = hosp_nat['hospitalises'].rolling(FENETRE_MM, min_periods=1).mean().round(0)
+    hosp_nat['rea_mm7'] = hosp_nat['reanimation'].rolling(FENETRE_MM, min_periods=1).mean().round(0)
+    hosp_nat['taux_occupation_rea'] = (hosp_nat['reanimation'] / CAPACITE_REA_NORMALE * 100).round(1)
+    # dc = total cumulé depuis le début → différence entre jours consécutifs
+    hosp_nat['nouveaux_deces'] = hosp_nat['deces'].diff().clip(lower=0)
+    hosp_nat['deces_mm7'] = hosp_nat['nouveaux_deces'].rolling(FENETRE_MM, min_periods=1).mean().round(1)
+    return hosp_nat
+
+
+def calculer_indicateurs_vacc(vacc_nat: pd.DataFrame) -> pd.DataFrame:
+    vacc_nat = vacc_nat.sort_values('jour').reset_index(drop=True)
+    vacc_nat['couv_dose1_pct'] = (vacc_nat['cum_dose1'] / POP_FRANCE * 100).round(1)
+    vacc_nat['couv_complet_pct'] = (vacc_nat['cum_complet'] / POP_FRANCE * 100).round(1)
+    vacc_nat['couv_rappel_pct'] = (vacc_nat['cum_rappel'] / POP_FRANCE * 100).round(1)
+    return vacc_nat
+
+
+def detecter_vagues(tests_nat: pd.DataFrame) -> pd.DataFrame:
+    """
+    Une vague = période où la MM7 des cas dépasse SEUIL_VAGUE
+    pendant au moins DUREE_MIN_VAGUE jours consécutifs
+    """
+    vagues = (
+        tests_nat[tests_nat['en_vague']]
+        .groupby('groupe')
+        .agg(debut=('jour', 'min'), fin=('jour', 'max'), pic_cas=('cas_mm7', 'max'))
+        .reset_index(drop=True)
+    )
+    vagues['duree_jours'] = (vagues['fin'] - vagues['debut']).dt.days
+    return vagues[vagues['duree_jours'] >= DUREE_MIN_VAGUE].reset_index(drop=True)
+
+
+#  Mode incrémental
+def lire_watermarks(dossier_processed: Path) -> dict:
+    """Dernier 'jour' traité par dataset ({} si aucun traitement antérieur)"""
+    chemin = Path(dossier_processed) / FICHIER_WATERMARKS
+    if not chemin.exists():
+        return {}
+    return {nom: pd.Timestamp(jour) for nom, jour in json.loads(chemin.read_text()).items()}
+
+
+def ecrire_watermarks(watermarks: dict, dossier_processed: Path) -> None:
+    chemin = Path(dossier_processed) / FICHIER_WATERMARKS
+    chemin.write_text(json.dumps(
+        {nom: jour.strftime('%Y-%m-%d') for nom, jour in watermarks.items()}, indent=2
+    ))
+
+
+def _watermark(watermarks: dict, dataset: str, tables: list, dossier_processed: Path):
+    """
+    High-water mark d'un dataset, None si une de ses tables manque (reconstruction).
+    Sans watermarks.json, on repart du dernier jour des tables déjà présentes.
+    """
+    dossier_processed = Path(dossier_processed)
+    if not all((dossier_processed / f"{nom}.csv").exists() for nom in tables):
+        return None
+    if dataset in watermarks:
+        return watermarks[dataset]
+    return min(lire_table(nom, dossier_processed, colonnes=['jour'])['jour'].max()
+               for nom in tables)
+
+
+def prolonger(existant: pd.DataFrame, nouveau: pd.DataFrame, calcul,
+              par_dep: bool = False) -> pd.DataFrame:
+    """
+    Calcule les indicateurs des seules nouvelles lignes :
+    les RECOUVREMENT dernières lignes existantes (par département si par_dep)
+    servent d'amorce aux fenêtres glissantes, puis sont retirées du résultat.
+    """
+    colonnes = list(nouveau.columns)
+    if par_dep:
+        amorce = existant.sort_values(['dep', 'jour']).groupby('dep').tail(RECOUVREMENT)
+    else:
+        amorce = existant.sort_values('jour').tail(RECOUVREMENT)
+    combine = calcul(pd.concat([amorce[colonnes], nouveau], ignore_index=True))
+    return combine[combine['jour'] >= nouveau['jour'].min()].reset_index(drop=True)
+
+
+#  Traitement par dataset
+def traiter_tests(df_tests: pd.DataFrame, dossier_processed: Path, watermark=None):
+    if watermark is None:
+        tests_nat = calculer_indicateurs_tests(agreger_tests(df_tests))
+        sauvegarder_table(tests_nat, "indicateurs_tests", dossier_processed)
+        sauvegarder_table(tests_nat.drop(columns=['en_vague', 'groupe']),
+                          "tests_national", dossier_processed)
+        sauvegarder_table(calculer_indicateurs_dep(df_tests), "tests_par_dep", dossier_processed)
+        sauvegarder_table(detecter_vagues(tests_nat), "vagues_detectees", dossier_processed)
+        mettre_a_jour_vagues_dep(dossier_processed)
+        mettre_a_jour_alertes(dossier_processed)
+        mettre_a_jour_rt(dossier_processed)
+        return tests_nat['jour'].max()
+
+    df_tests = df_tests[df_tests['jour'] > watermark]
+    if df_tests.empty:
+        return watermark
+    etiquette = df_tests['jour'].min().strftime('%Y%m%d')
+
+    # National : en_vague/groupe prolongent la numérotation existante
+    existant = lire_table("indicateurs_tests", dossier_processed)
+    nouveau = prolonger(existant, agreger_tests(df_tests), calculer_indicateurs_tests)
+    nouveau['groupe'] += existant['groupe'].iloc[-RECOUVREMENT:].iloc[0] - 1
+    ajouter_lignes(nouveau, "indicateurs_tests", dossier_processed, etiquette)
+    ajouter_lignes(nouveau, "tests_national", dossier_processed, etiquette)
+
+    # Département : seule la fin de l'historique est relue
+    debut_amorce = watermark - pd.Timedelta(days=RECOUVREMENT)
+    existant_dep = lire_table("tests_par_dep", dossier_processed, debut=debut_amorce)
+    nouveau_dep = prolonger(existant_dep, df_tests, calculer_indicateurs_dep, par_dep=True)
+    ajouter_lignes(nouveau_dep, "tests_par_dep", dossier_processed, etiquette)
+    mettre_a_jour_alertes(dossier_processed, nouveau_dep, etiquette)
+    mettre_a_jour_rt(dossier_processed, dernier_jour=watermark, etiquette=etiquette)
+
+    # Vagues : recalcul sur la série nationale complète (~1 000 lignes) ;
+    # par département, seules les vagues encore ouvertes au watermark sont réévaluées
+    tests_nat = pd.concat([existant, nouveau], ignore_index=True)
+    sauvegarder_table(detecter_vagues(tests_nat), "vagues_detectees", dossier_processed)
+    mettre_a_jour_vagues_dep(dossier_processed, dernier_jour=watermark)
+    return nouveau['jour'].max()
+
+
+def traiter_hosp(df_hosp: pd.DataFrame, dossier_processed: Path, watermark=None):
+    if watermark is None:
+        hosp_nat = calculer_indicateurs_hosp(agreger_hosp(df_hosp))
+        sauvegarder_table(hosp_nat, "indicateurs_hosp", dossier_processed)
+        sauvegarder_table(hosp_nat[['jour', 'hospitalises', 'reanimation', 'deces',
+                                    'hosp_mm7', 'rea_mm7']],
+                          "hospitalisations_national", dossier_processed)
+        sauvegarder_table(df_hosp, "hospitalisations_clean", dossier_processed)
+        return hosp_nat['jour'].max()
+
+    df_hosp = df_hosp[df_hosp['jour'] > watermark]
+    if df_hosp.empty:
+        return watermark
+    etiquette = df_hosp['jour'].min().strftime('%Y%m%d')
+
+    existant = lire_table("indicateurs_hosp", dossier_processed)
+    nouveau = prolonger(existant, agreger_hosp(df_hosp), calculer_indicateurs_hosp)
+    ajouter_lignes(nouveau, "indicateurs_hosp", dossier_processed, etiquette)
+    ajouter_lignes(nouveau, "hospitalisations_national", dossier_processed, etiquette)
+    ajouter_lignes(df_hosp, "hospitalisations_clean", dossier_processed, etiquette)
+    return nouveau['jour'].max()
+
+
+def traiter_vacc(df_vacc: pd.DataFrame, dossier_processed: Path, watermark=None):
+    if watermark is None:
+        vacc_nat = calculer_indicateurs_vacc(agreger_vacc(df_vacc))
+        sauvegarder_table(vacc_nat, "indicateurs_vacc", dossier_processed)
+        sauvegarder_table(df_vacc, "vaccination_clean", dossier_processed)
+        return vacc_nat['jour'].max()
+
+    df_vacc = df_vacc[df_vacc['jour'] > watermark]
+    if df_vacc.empty:
+        return watermark
+    etiquette = df_vacc['jour'].min().strftime('%Y%m%d')
+
+    # Couvertures : calcul ligne à ligne, aucune fenêtre à amorcer
+    nouveau = calculer_indicateurs_vacc(agreger_vacc(df_vacc))
+    ajouter_lignes(nouveau, "indicateurs_vacc", dossier_processed, etiquette)
+    ajouter_lignes(df_vacc, "vaccination_clean", dossier_processed, etiquette)
+    return nouveau['jour'].max()
+
+
+TRAITEMENTS = {
+    "tests":            (nettoyer_tests, traiter_tests,
+                         ["indicateurs_tests", "tests_national", "tests_par_dep"]),
+    "hospitalisations": (nettoyer_hosp, traiter_hosp,
+                         ["indicateurs_hosp", "hospitalisations_national",
+                          "hospitalisations_clean"]),
+    "vaccination":      (nettoyer_vacc, traiter_vacc,
+                         ["indicateurs_vacc", "vaccination_clean"]),
+}
+
+
+def pipeline_complet(base_path: Path, incremental: bool = True,
+                     retelecharger: bool = False, urls: dict = None) -> dict:
+    """
+    Télécharge les 3 datasets SPF et produit data/processed.
+
+    - téléchargements simultanés et conditionnels (cf. telechargement.py) ;
+      chaque dataset est traité dès que son fichier est arrivé
+    - incremental=True : seuls les jours postérieurs au watermark de chaque dataset
+      sont traités et ajoutés aux tables existantes
+    - incremental=False ou tables absentes : reconstruction complète
+    - urls : {dataset: url} à la place des URL data.gouv.fr (ex. serveur local)
+
+    Retourne les watermarks mis à jour.
+    """
+    base_path = Path(base_path)
+    dossier_raw = base_path / "data" / "raw"
+    dossier_processed = base_path / "data" / "processed"
+    dossier_raw.mkdir(parents=True, exist_ok=True)
+    dossier_processed.mkdir(parents=True, exist_ok=True)
+
+    watermarks = lire_watermarks(dossier_processed) if incremental else {}
+    urls = {nom: info["url"] for nom, info in DATASETS.items()} | (urls or {})
+    sources = {nom: (urls[nom], DATASETS[nom]["fichier"]) for nom in TRAITEMENTS}
+
+    for nom, chemin, _ in telecharger_en_parallele(sources, dossier_raw, forcer=retelecharger):
+        nettoyer, traiter, tables = TRAITEMENTS[nom]
+        debut_chrono = time.perf_counter()
+        watermark = _watermark(watermarks, nom, tables, dossier_processed) if incremental else None
+        df = nettoyer(lire_brut(chemin, nom, depuis=watermark))
+        watermarks[nom] = traiter(df, dossier_processed, watermark)
+
+        # Enregistré dataset par dataset : un échec de téléchargement
+        # n'oblige pas à retraiter ceux déjà terminés
+        ecrire_watermarks(watermarks, dossier_processed)
+        mode = "complet" if watermark is None else f"incrémental depuis {watermark.date()}"
+        print(f"{nom:<17} : {mode} → {watermarks[nom].date()} "
+              f"(traitement {time.perf_counter() - debut_chrono:.1f} s)")
+
+    # Décalages cas → hospitalisations : croisent deux datasets, recalculés en entier
+    if all((dossier_processed / f"{nom}.csv").exists()
+           for nom in ("tests_par_dep", "hospitalisations_clean", "indicateurs_tests", "indicateurs_hosp")):
+        debut_chrono = time.perf_counter()
+        calculer_decalages(dossier_processed)
+        print(f"{'décalages':<17} : recalculés (traitement {time.perf_counter() - debut_chrono:.1f} s)")
+
+    # Cube territorial : blocs des trois sources départementales, reconstruit en entier
+    if all((dossier_processed / f"{nom}.csv").exists()
+           for nom in ("tests_par_dep", "hospitalisations_clean", "vaccination_clean")):
+        debut_chrono = time.perf_counter()
+        mettre_a_jour_cube(dossier_processed)
+        print(f"{'cube territorial':<17} : reconstruit (traitement {time.perf_counter() - debut_chrono:.1f} s)")
+
+    return watermarks
+
+
+#  Mémoire de la lecture des fichiers bruts
+_CODE_MEMOIRE = """
+import resource, sys
+sys.path.insert(0, {src!r})
+import pandas as pd
+from data_loader import LECTURE, lire_brut
+{lecture}
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+_LECTURES = {
+    "imports seuls": "pass",
+    "pandas, fichier complet": (
+        "df = pd.read_csv({chemin!r}, sep=';', decimal=',', low_memory=False, dtype={{'dep': str}})\n"
+        "colonne, valeur = LECTURE[{dataset!r}]['filtre']\n"
+        "df = df[df[colonne] == valeur]"),
+    "flux pyarrow": "df = lire_brut({chemin!r}, {dataset!r})",
+    "flux pyarrow, incrémental 30 j": "df = lire_brut({chemin!r}, {dataset!r}, depuis={depuis!r})",
+}
+
+
+def mesurer_memoire_lecture(dossier_raw: Path) -> pd.DataFrame:
+    """
+    Pic de mémoire (RSS max du processus, Mo) de la lecture de chaque fichier
+    brut, dans un processus neuf par mesure : lecture pandas historique vs
+    lecture en flux (complète et incrémentale), « imports seuls » en référence
+    """
+    src = str(Path(__file__).parent.resolve())
+    lignes = []
+    for nom, dataset in DATASETS.items():
+        chemin = Path(dossier_raw).resolve() / dataset["fichier"]
+        if not chemin.exists():
+            continue
+        depuis = str(lire_brut(chemin, nom)['jour'].max() - pd.Timedelta(days=30))
+        ligne = {"dataset": nom, "fichier_mo": round(chemin.stat().st_size / 1024 ** 2, 1)}
+        for methode, lecture in _LECTURES.items():
+            code = _CODE_MEMOIRE.format(src=src, lecture=lecture.format(
+                chemin=str(chemin), dataset=nom, depuis=depuis))
+            sortie = subprocess.run([sys.executable, "-c", code],
+                                    capture_output=True, text=True, check=True)
+            ligne[methode] = round(float(sortie.stdout.strip().splitlines()[-1]), 1)
+        lignes.append(ligne)
+    return pd.DataFrame(lignes)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline ETL EpiSight")
+    parser.add_argument("--complet", action="store_true",
+                        help="reconstruit toutes les tables au lieu du mode incrémental")
+    parser.add_argument("--mesurer-memoire", action="store_true",
+                        help="compare le pic mémoire des lectures des fichiers de data/raw")
+    args = parser.parse_args()
+
+    if args.mesurer_memoire:
+        print("PIC MÉMOIRE DE LECTURE DES FICHIERS BRUTS (Mo)")
+        print("=" * 50)
+        print(mesurer_memoire_lecture(Path(__file__).parent.parent / "data" / "raw").to_string(index=False))
+        raise SystemExit
+
+    # Mise à jour quotidienne : les fichiers SPF sont retéléchargés
+    pipeline_complet(Path(__file__).parent.parent,
+                     incremental=not args.complet, retelecharger=True)
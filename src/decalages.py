@@ -0,0 +1,267 @@
+#  EpiSight — Décalages entre cas, hospitalisations et décès
+#  Corrélations croisées par FFT, France et tous les départements en une passe :
+#  historique complet, fenêtres glissantes et vagues, meilleur décalage par série
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indicators import construire_grille, moyenne_glissante, vers_matrice
+
+DECALAGE_MAX = 30               # jours : la cible suit les cas de 0 à 30 jours
+LARGEUR_FENETRE = 120           # jours par fenêtre glissante
+PAS_FENETRE = 7                 # jours entre deux fenêtres
+COUPLES_MIN = 30                # jours renseignés (cas et cible) pour une corrélation
+
+# Séries comparées aux cas (MM7) : colonne nationale, colonne de hospitalisations_clean
+CIBLES = {
+    'hosp':  ("hospitalisations", 'hosp_mm7', 'hospitalises'),
+    'rea':   ("réanimation",      'rea_mm7',  'reanimation'),
+    'deces': ("décès",            'deces_mm7', 'deces'),
+}
+NATIONAL = "France"
+COLONNES = ['dep', 'cible', 'portee', 'debut', 'fin', 'decalage_jours', 'correlation']
+
+
+#  Corrélations croisées
+def correlations_croisees(x: np.ndarray, y: np.ndarray,
+                          decalage_max: int = DECALAGE_MAX) -> np.ndarray:
+    """
+    Corrélation de Pearson entre x[t] et y[t + k], k = 0..decalage_max, pour
+    toutes les séries à la fois (dernier axe = temps, autres axes = lots ;
+    y peut porter des axes de plus, x est diffusé — un seul jeu de FFT des cas
+    pour toutes les cibles).
+
+    Identique à x.corr(y.shift(-k)) de pandas : seuls les couples où les deux
+    valeurs sont renseignées comptent, avec leurs propres moyennes et variances.
+    Les six sommes nécessaires (effectif, Σx, Σy, Σx², Σy², Σxy sur les couples)
+    sont des corrélations de séries masquées : Σ_t a[t]·b[t + k] est lu dans
+    irfft(conj(rfft(a)) · rfft(b)), sur une longueur >= T + decalage_max pour
+    qu'aucun terme ne se replie. NaN si moins de COUPLES_MIN couples ou une
+    variance nulle.
+    """
+    from scipy import fft
+
+    # Centrage-réduction préalable (Pearson n'en dépend pas) : sommes d'ordre 1,
+    # erreurs d'arrondi de la FFT négligeables devant les différences calculées
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = (x - np.nanmean(x, axis=-1, keepdims=True)) / np.nanstd(x, axis=-1, keepdims=True)
+        y = (y - np.nanmean(y, axis=-1, keepdims=True)) / np.nanstd(y, axis=-1, keepdims=True)
+    mx, my = np.isfinite(x), np.isfinite(y)
+    x0, y0 = np.where(mx, x, 0.0), np.where(my, y, 0.0)
+
+    taille = fft.next_fast_len(x.shape[-1] + decalage_max, real=True)
+    spectre = lambda a: fft.rfft(a, taille, workers=-1)
+    fx, fx2, fmx = np.conj(spectre(x0)), np.conj(spectre(x0 ** 2)), np.conj(spectre(mx.astype(float)))
+    fy, fy2, fmy = spectre(y0), spectre(y0 ** 2), spectre(my.astype(float))
+    correler = lambda produit: fft.irfft(produit, taille, workers=-1)[..., :decalage_max + 1]
+
+    effectif = np.rint(correler(fmx * fmy))
+    sx, sy = correler(fx * fmy), correler(fmx * fy)
+    sxx, syy = correler(fx2 * fmy), correler(fmx * fy2)
+    sxy = correler(fx * fy)
+
+    variance = (effectif * sxx - sx ** 2) * (effectif * syy - sy ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (effectif * sxy - sx * sy) / np.sqrt(variance)
+    return np.where((effectif >= COUPLES_MIN) & (variance > 1e-9 * effectif ** 4), r, np.nan)
+
+
+def meilleurs_decalages(correlations: np.ndarray) -> tuple:
+    """(décalage en jours, corrélation) maximisant la corrélation — NaN si aucune"""
+    valides = ~np.isnan(correlations).all(axis=-1)
+    rang = np.where(np.isnan(correlations), -np.inf, correlations).argmax(axis=-1)
+    maximum = np.take_along_axis(correlations, rang[..., None], axis=-1)[..., 0]
+    return np.where(valides, rang, np.nan), np.where(valides, maximum, np.nan)
+
+
+def segments(matrice: np.ndarray, lignes: np.ndarray, debuts: np.ndarray,
+             fins: np.ndarray) -> np.ndarray:
+    """
+    Lot (segment × jour) des tranches matrice[ligne, debut:fin + 1], complétées
+    par des NaN jusqu'à la plus longue : fenêtres et vagues de longueurs
+    différentes passent dans un seul appel FFT
+    """
+    if len(lignes) == 0:
+        return np.empty((0, 1))
+    longueur = int((fins - debuts).max()) + 1
+    colonnes = debuts[:, None] + np.arange(longueur)[None, :]
+    dedans = colonnes <= fins[:, None]
+    valeurs = matrice[lignes[:, None], np.minimum(colonnes, matrice.shape[1] - 1)]
+    return np.where(dedans, valeurs, np.nan)
+
+
+#  Séries
+def matrices_series(tests_dep: pd.DataFrame, hosp_dep: pd.DataFrame,
+                    tests_nat: pd.DataFrame, hosp_nat: pd.DataFrame) -> tuple:
+    """
+    (territoires, jours, {'cas', 'hosp', 'rea', 'deces': matrice (territoire × jour)})
+    Départements : cas_mm7_dep, MM7 des hospitalisations, réanimations et décès
+    quotidiens (différence des cumuls) ; dernière ligne : séries nationales MM7.
+    """
+    grille = pd.concat([tests_dep[['dep', 'jour']], hosp_dep[['dep', 'jour']]], ignore_index=True)
+    deps, jours, i, j = construire_grille(grille)
+    forme = (len(deps), len(jours))
+    i_tests, j_tests = i[:len(tests_dep)], j[:len(tests_dep)]
+    i_hosp, j_hosp = i[len(tests_dep):], j[len(tests_dep):]
+
+    matrices = {'cas': vers_matrice(tests_dep['cas_mm7_dep'].to_numpy(dtype=float), i_tests, j_tests, forme)}
+    for cible, (_, _, colonne) in CIBLES.items():
+        valeurs = vers_matrice(hosp_dep[colonne].to_numpy(dtype=float), i_hosp, j_hosp, forme)
+        if cible == 'deces':
+            valeurs = np.clip(np.diff(valeurs, axis=1, prepend=np.nan), 0, None)
+        matrices[cible] = moyenne_glissante(valeurs)
+
+    national = (tests_nat.set_index('jour')[['cas_mm7']]
+                .join(hosp_nat.set_index('jour')[[c for _, c, _ in CIBLES.values()]], how='outer')
+                .reindex(jours))
+    matrices['cas'] = np.vstack([matrices['cas'], national['cas_mm7'].to_numpy(dtype=float)])
+    for cible, (_, colonne, _) in CIBLES.items():
+        matrices[cible] = np.vstack([matrices[cible], national[colonne].to_numpy(dtype=float)])
+    return np.append(deps, NATIONAL), jours, matrices
+
+
+#  Analyse
+def analyser(territoires: np.ndarray, jours: pd.DatetimeIndex, matrices: dict,
+             vagues: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Meilleur décalage cas → cible, une ligne par (territoire, cible, portée) :
+    - 'historique' : toute la série
+    - 'glissante'  : fenêtres de LARGEUR_FENETRE jours tous les PAS_FENETRE jours
+    - 'vague'      : chaque vague (dep, debut, fin ; dep = NATIONAL pour les vagues
+                     nationales), prolongée de DECALAGE_MAX jours pour la cible
+    Chaque portée est un seul lot FFT pour tous les territoires.
+    """
+    n, nb_jours = matrices['cas'].shape
+    portees = {'historique': (np.arange(n), np.zeros(n, dtype=int), np.full(n, nb_jours - 1))}
+
+    departs = np.arange(0, nb_jours - LARGEUR_FENETRE + 1, PAS_FENETRE)
+    portees['glissante'] = (np.repeat(np.arange(n), len(departs)), np.tile(departs, n),
+                            np.tile(departs + LARGEUR_FENETRE - 1, n))
+
+    if vagues is not None and len(vagues):
+        rang = {territoire: k for k, territoire in enumerate(territoires)}
+        vagues = vagues[vagues['dep'].isin(rang)]
+        debuts = np.clip(jours.get_indexer(vagues['debut']), 0, None)
+        fins = jours.searchsorted(vagues['fin'].to_numpy()) + DECALAGE_MAX
+        portees['vague'] = (vagues['dep'].map(rang).to_numpy(), debuts,
+                            np.minimum(fins, nb_jours - 1))
+
+    morceaux = []
+    for portee, (lignes, debuts, fins) in portees.items():
+        cibles = np.stack([segments(matrices[cible], lignes, debuts, fins) for cible in CIBLES])
+        decalages, correlations = meilleurs_decalages(
+            correlations_croisees(segments(matrices['cas'], lignes, debuts, fins), cibles))
+        for cible, decalage, correlation in zip(CIBLES, decalages, correlations):
+            morceaux.append(pd.DataFrame({
+                'dep': territoires[lignes], 'cible': cible, 'portee': portee,
+                'debut': jours[debuts], 'fin': jours[fins],
+                'decalage_jours': decalage, 'correlation': np.round(correlation, 4),
+            }))
+    return pd.concat(morceaux, ignore_index=True)[COLONNES]
+
+
+def calculer_decalages(dossier_processed: Path) -> pd.DataFrame:
+    """Analyse complète depuis data/processed → table decalages (tout est recalculé : < 1 s)"""
+    from stockage import lire_table, sauvegarder_table
+    from vagues_departements import DUREE_MIN_VAGUE
+
+    dossier_processed = Path(dossier_processed)
+    territoires, jours, matrices = matrices_series(
+        lire_table("tests_par_dep", dossier_processed, colonnes=['dep', 'jour', 'cas_mm7_dep']),
+        lire_table("hospitalisations_clean", dossier_processed,
+                   colonnes=['dep', 'jour'] + [c for _, _, c in CIBLES.values()]),
+        lire_table("indicateurs_tests", dossier_processed),
+        lire_table("indicateurs_hosp", dossier_processed))
+
+    vagues = [lire_table("vagues_detectees", dossier_processed).assign(dep=NATIONAL)]
+    if (dossier_processed / "vagues_departements.csv").exists():
+        vagues_dep = lire_table("vagues_departements", dossier_processed)
+        vagues.append(vagues_dep[vagues_dep['duree_jours'] >= DUREE_MIN_VAGUE])
+    resultats = analyser(territoires, jours, matrices,
+                         pd.concat([v[['dep', 'debut', 'fin']] for v in vagues], ignore_index=True))
+    sauvegarder_table(resultats, "decalages", dossier_processed)
+    return resultats
+
+
+#  Vérification
+def reference_pandas(x: pd.Series, y: pd.Series, decalage_max: int = DECALAGE_MAX) -> np.ndarray:
+    """Boucle historique : Series.corr sur la cible décalée, un décalage à la fois"""
+    correlations = []
+    for k in range(decalage_max + 1):
+        decalee = y.shift(-k)
+        couples = x.notna() & decalee.notna()
+        correlations.append(x.corr(decalee) if couples.sum() >= COUPLES_MIN else np.nan)
+    return np.array(correlations)
+
+
+def verifier_decalages(territoires: np.ndarray, jours: pd.DatetimeIndex, matrices: dict,
+                       echantillon: int = 6, repetitions: int = 3) -> pd.DataFrame:
+    """
+    FFT par lots == Series.corr(shift) sur un échantillon de territoires
+    (historique complet et fenêtres glissantes) ; temps du lot complet
+    vs temps des boucles extrapolé à toutes les séries.
+    Lève AssertionError si une corrélation diffère de plus de 1e-6.
+    """
+    n, nb_jours = matrices['cas'].shape
+    choisis = np.unique(np.r_[np.random.default_rng(0).choice(n - 1, echantillon - 1, replace=False), n - 1])
+    departs = np.arange(0, nb_jours - LARGEUR_FENETRE + 1, PAS_FENETRE)
+
+    debut = time.perf_counter()
+    series_boucles = 0
+    for ligne in choisis:
+        cas = pd.Series(matrices['cas'][ligne])
+        for cible in CIBLES:
+            cible_serie = pd.Series(matrices[cible][ligne])
+            attendu = reference_pandas(cas, cible_serie)
+            obtenu = correlations_croisees(matrices['cas'][ligne], matrices[cible][ligne])
+            np.testing.assert_allclose(obtenu, attendu, atol=1e-6, equal_nan=True,
+                                       err_msg=f"{territoires[ligne]} / {cible} (historique)")
+            for depart in departs:
+                fenetre = slice(depart, depart + LARGEUR_FENETRE)
+                attendu = reference_pandas(cas[fenetre].reset_index(drop=True),
+                                           cible_serie[fenetre].reset_index(drop=True))
+                obtenu = correlations_croisees(matrices['cas'][ligne, fenetre], matrices[cible][ligne, fenetre])
+                np.testing.assert_allclose(obtenu, attendu, atol=1e-6, equal_nan=True,
+                                           err_msg=f"{territoires[ligne]} / {cible} (fenêtre {depart})")
+            series_boucles += 1
+    duree_boucles = (time.perf_counter() - debut) / series_boucles * n * len(CIBLES)
+
+    mesures = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        analyser(territoires, jours, matrices)
+        mesures.append(time.perf_counter() - debut)
+
+    return pd.DataFrame([
+        {"calcul": f"Series.corr(shift), {n} territoires × {len(CIBLES)} cibles (extrapolé)",
+         "temps_s": round(duree_boucles, 2)},
+        {"calcul": f"FFT par lots, {n} territoires × {len(CIBLES)} cibles",
+         "temps_s": round(min(mesures), 3)},
+    ])
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    territoires, jours, matrices = matrices_series(
+        lire_table("tests_par_dep", PROCESSED, colonnes=['dep', 'jour', 'cas_mm7_dep']),
+        lire_table("hospitalisations_clean", PROCESSED,
+                   colonnes=['dep', 'jour'] + [c for _, _, c in CIBLES.values()]),
+        lire_table("indicateurs_tests", PROCESSED),
+        lire_table("indicateurs_hosp", PROCESSED))
+
+    print("DÉCALAGES CAS → HOSPITALISATIONS / RÉANIMATION / DÉCÈS — VÉRIFICATION")
+    print("=" * 50)
+    print(f"Fenêtres de {LARGEUR_FENETRE} jours tous les {PAS_FENETRE} jours, décalages 0-{DECALAGE_MAX} j\n")
+    print(verifier_decalages(territoires, jours, matrices).to_string(index=False))
+
+    resultats = calculer_decalages(PROCESSED)
+    national = resultats[(resultats['dep'] == NATIONAL) & (resultats['portee'] == 'historique')]
+    print("\nFrance, historique complet")
+    print(national[['cible', 'decalage_jours', 'correlation']].to_string(index=False))
@@ -0,0 +1,147 @@
+#  EpiSight — Index temporel pour les requêtes par période
+#  Tranches par recherche dichotomique, sommes par préfixes, max/min par sparse table
+
+import numpy as np
+import pandas as pd
+
+
+def _sparse_table(valeurs: np.ndarray, operation) -> list:
+    """
+    niveaux[k][i] = operation sur valeurs[i : i + 2^k]
+    Construction O(n log n), requête O(1) par recouvrement de deux blocs
+    """
+    niveaux = [valeurs]
+    largeur = 1
+    while 2 * largeur <= len(valeurs):
+        precedent = niveaux[-1]
+        niveaux.append(operation(precedent[:-largeur], precedent[largeur:]))
+        largeur *= 2
+    return niveaux
+
+
+class IndexTemporel:
+    """
+    Index en lecture seule d'une table quotidienne (colonne 'jour')
+
+    - tranche(debut, fin)        : vue sur les lignes de la période, sans copie
+    - somme / moyenne(col, ...)  : O(1) par sommes préfixes
+    - maximum / minimum(col, ...) : O(1) par sparse table
+    La localisation de la période coûte O(log n) (searchsorted sur 'jour' trié).
+    """
+
+    def __init__(self, df: pd.DataFrame, sommes: list = (), extremums: list = ()):
+        if not df['jour'].is_monotonic_increasing:
+            df = df.sort_values('jour', kind='stable')
+        self.df = df.reset_index(drop=True)
+        self.jours = self.df['jour'].to_numpy(dtype='datetime64[ns]')
+
+        self._prefixes, self._effectifs = {}, {}
+        for col in sommes:
+            valeurs = self.df[col].to_numpy(dtype=float)
+            presents = ~np.isnan(valeurs)
+            self._prefixes[col] = np.concatenate([[0.0], np.cumsum(np.where(presents, valeurs, 0.0))])
+            self._effectifs[col] = np.concatenate([[0], np.cumsum(presents)])
+
+        # NaN ignorés : ±inf ne l'emportent jamais sur une valeur renseignée
+        self._max, self._min = {}, {}
+        for col in extremums:
+            valeurs = self.df[col].to_numpy(dtype=float)
+            self._max[col] = _sparse_table(np.where(np.isnan(valeurs), -np.inf, valeurs), np.maximum)
+            self._min[col] = _sparse_table(np.where(np.isnan(valeurs), np.inf, valeurs), np.minimum)
+
+    def bornes(self, debut=None, fin=None) -> tuple:
+        """Indices [i, j) des lignes telles que debut <= jour <= fin"""
+        i = 0 if debut is None else int(np.searchsorted(self.jours, np.datetime64(pd.Timestamp(debut), 'ns'), 'left'))
+        j = len(self.jours) if fin is None else int(np.searchsorted(self.jours, np.datetime64(pd.Timestamp(fin), 'ns'), 'right'))
+        return i, max(i, j)
+
+    def tranche(self, debut=None, fin=None) -> pd.DataFrame:
+        i, j = self.bornes(debut, fin)
+        return self.df.iloc[i:j]
+
+    def somme(self, col: str, debut=None, fin=None) -> float:
+        i, j = self.bornes(debut, fin)
+        return float(self._prefixes[col][j] - self._prefixes[col][i])
+
+    def moyenne(self, col: str, debut=None, fin=None, defaut=np.nan) -> float:
+        i, j = self.bornes(debut, fin)
+        effectif = self._effectifs[col][j] - self._effectifs[col][i]
+        if effectif == 0:
+            return defaut
+        return float((self._prefixes[col][j] - self._prefixes[col][i]) / effectif)
+
+    def _requete(self, niveaux: list, operation, debut, fin, defaut):
+        i, j = self.bornes(debut, fin)
+        if j == i:
+            return defaut
+        k = (j - i).bit_length() - 1
+        valeur = operation(niveaux[k][i], niveaux[k][j - (1 << k)])
+        return defaut if np.isinf(valeur) else float(valeur)
+
+    def maximum(self, col: str, debut=None, fin=None, defaut=np.nan) -> float:
+        return self._requete(self._max[col], max, debut, fin, defaut)
+
+    def minimum(self, col: str, debut=None, fin=None, defaut=np.nan) -> float:
+        return self._requete(self._min[col], min, debut, fin, defaut)
+
+
+def comparer_aux_masques(df: pd.DataFrame, sommes: list, extremums: list,
+                         n_requetes: int = 200, graine: int = 0) -> pd.DataFrame:
+    """
+    Vérifie l'index contre le filtrage historique (masque booléen + copie)
+    sur des périodes tirées au hasard et compare les temps par requête.
+    Lève AssertionError en cas d'écart.
+    """
+    import time
+
+    rng = np.random.default_rng(graine)
+    jours = np.sort(df['jour'].unique())
+    bornes = np.sort(rng.integers(0, len(jours), size=(n_requetes, 2)), axis=1)
+    periodes = [(pd.Timestamp(jours[a]), pd.Timestamp(jours[b])) for a, b in bornes]
+
+    debut_construction = time.perf_counter()
+    index = IndexTemporel(df, sommes=sommes, extremums=extremums)
+    duree_construction = time.perf_counter() - debut_construction
+
+    def par_masques(debut, fin):
+        tranche = df[(df['jour'] >= debut) & (df['jour'] <= fin)].copy()
+        return ([tranche[col].sum() for col in sommes]
+                + [tranche[col].max() for col in extremums]
+                + [tranche[col].min() for col in extremums])
+
+    def par_index(debut, fin):
+        index.tranche(debut, fin)
+        return ([index.somme(col, debut, fin) for col in sommes]
+                + [index.maximum(col, debut, fin) for col in extremums]
+                + [index.minimum(col, debut, fin) for col in extremums])
+
+    temps = {}
+    for nom, calcul in [("masques booléens + copie", par_masques), ("index temporel", par_index)]:
+        debut_mesure = time.perf_counter()
+        resultats = [calcul(debut, fin) for debut, fin in periodes]
+        temps[nom] = ((time.perf_counter() - debut_mesure) / n_requetes, resultats)
+
+    for attendu, obtenu in zip(temps["masques booléens + copie"][1], temps["index temporel"][1]):
+        np.testing.assert_allclose(obtenu, attendu, rtol=1e-9, atol=1e-6)
+
+    return pd.DataFrame([
+        {"calcul": nom, "ms_par_requete": round(duree * 1000, 4)} for nom, (duree, _) in temps.items()
+    ] + [{"calcul": "construction de l'index", "ms_par_requete": round(duree_construction * 1000, 4)}])
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    print("VÉRIFICATION — INDEX TEMPOREL vs MASQUES BOOLÉENS")
+    print("=" * 50)
+    for nom, sommes, extremums in [
+        ("indicateurs_tests", ['cas_positifs'], ['cas_mm7']),
+        ("indicateurs_hosp", [], ['hospitalises', 'reanimation']),
+        ("indicateurs_vacc", [], ['couv_complet_pct']),
+    ]:
+        print(f"\n{nom}")
+        print(comparer_aux_masques(lire_table(nom, PROCESSED), sommes, extremums).to_string(index=False))
@@ -0,0 +1,163 @@
+#  EpiSight — Calcul des indicateurs départementaux
+#  Moteur vectorisé : tous les départements à la fois sur une matrice dense (dep × jour)
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FENETRE = 7
+
+
+def construire_grille(df: pd.DataFrame) -> tuple:
+    """
+    Grille dense commune à tous les départements
+
+    Retourne (deps, jours, i, j) :
+    - deps, jours : axes de la matrice (départements triés, calendrier continu)
+    - i, j        : position de chaque ligne de df dans la matrice
+    """
+    i, deps = pd.factorize(df['dep'], sort=True)
+    jours_int = df['jour'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    j = jours_int - jours_int.min()
+    jours = pd.date_range(df['jour'].min(), periods=j.max() + 1, freq='D')
+    return np.asarray(deps), jours, i, j
+
+
+def vers_matrice(valeurs: np.ndarray, i: np.ndarray, j: np.ndarray,
+                 forme: tuple) -> np.ndarray:
+    """Place une colonne dans la matrice (dep × jour) — NaN pour les jours absents"""
+    matrice = np.full(forme, np.nan)
+    matrice[i, j] = valeurs
+    return matrice
+
+
+def somme_glissante(matrice: np.ndarray, fenetre: int = FENETRE) -> tuple:
+    """
+    Sommes sur fenêtre glissante par différence de sommes cumulées :
+    S[t] = C[t] - C[t - fenetre], en une passe pour toutes les lignes.
+
+    Retourne (sommes, effectifs) où effectifs = nombre de jours renseignés
+    dans la fenêtre (équivalent de min_periods=1 quand effectifs >= 1).
+    """
+    presents = ~np.isnan(matrice)
+    cumul = np.cumsum(np.where(presents, matrice, 0.0), axis=1)
+    cumul_presents = np.cumsum(presents, axis=1)
+
+    sommes = cumul.copy()
+    sommes[:, fenetre:] -= cumul[:, :-fenetre]
+    effectifs = cumul_presents.copy()
+    effectifs[:, fenetre:] -= cumul_presents[:, :-fenetre]
+    return sommes, effectifs
+
+
+def moyenne_glissante(matrice: np.ndarray, fenetre: int = FENETRE) -> np.ndarray:
+    sommes, effectifs = somme_glissante(matrice, fenetre)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(effectifs > 0, sommes / effectifs, np.nan)
+
+
+def calculer_indicateurs_dep(tests: pd.DataFrame) -> pd.DataFrame:
+    """
+    Indicateurs départementaux calculés en une passe matricielle :
+    - cas_7j             : cas positifs sur 7 jours glissants
+    - taux_incidence     : cas_7j / population × 100 000
+    - cas_mm7_dep        : moyenne mobile 7 jours des cas
+    - taux_positivite_7j : cas / tests sur 7 jours glissants × 100
+
+    Les fenêtres sont calendaires : un jour absent n'est pas compté
+    (identique au rolling(7, min_periods=1) pandas quand la série est continue).
+    L'ordre des lignes est conservé.
+    """
+    tests = tests.reset_index(drop=True)
+    deps, jours, i, j = construire_grille(tests)
+    forme = (len(deps), len(jours))
+
+    cas = vers_matrice(tests['cas_positifs'].to_numpy(dtype=float), i, j, forme)
+    nb_tests = vers_matrice(tests['total_tests'].to_numpy(dtype=float), i, j, forme)
+
+    cas_7j, effectifs = somme_glissante(cas)
+    tests_7j, _ = somme_glissante(nb_tests)
+
+    tests['cas_7j'] = cas_7j[i, j]
+    tests['taux_incidence'] = (tests['cas_7j'] / tests['population'] * 100_000).round(1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tests['cas_mm7_dep'] = np.round(np.where(effectifs[i, j] > 0, cas_7j[i, j] / effectifs[i, j], np.nan), 1)
+        tests['taux_positivite_7j'] = np.round(cas_7j[i, j] / tests_7j[i, j] * 100, 2)
+    tests['taux_positivite_7j'] = tests['taux_positivite_7j'].replace([np.inf, -np.inf], np.nan).fillna(0)
+    return tests
+
+
+def reference_pandas(tests: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcul historique (notebook 03) : un rolling pandas par département,
+    sur 7 jours calendaires — identique au rolling(7) du notebook quand la
+    série est continue, sans compter le 8e jour quand un jour manque
+    """
+    tests = tests.sort_values(['dep', 'jour']).reset_index(drop=True)
+    # Groupes dans l'ordre des départements triés, jours triés : aligné sur tests
+    glissant = tests.set_index('jour').groupby('dep').rolling(f'{FENETRE}D', min_periods=1)
+    tests['cas_7j'] = glissant['cas_positifs'].sum().to_numpy()
+    tests['taux_incidence'] = (tests['cas_7j'] / tests['population'] * 100_000).round(1)
+    tests['cas_mm7_dep'] = glissant['cas_positifs'].mean().to_numpy().round(1)
+    tests_7j = glissant['total_tests'].sum().to_numpy()
+    tests['taux_positivite_7j'] = (tests['cas_7j'] / tests_7j * 100).round(2)
+    tests['taux_positivite_7j'] = tests['taux_positivite_7j'].replace([np.inf, -np.inf], np.nan).fillna(0)
+    return tests
+
+
+def comparer_a_reference(tests: pd.DataFrame, repetitions: int = 3) -> pd.DataFrame:
+    """
+    Vérifie l'égalité avec le calcul pandas de référence et compare les temps.
+    Lève AssertionError si un indicateur diffère (au-delà d'un arrondi).
+    """
+    colonnes = ['cas_7j', 'taux_incidence', 'cas_mm7_dep', 'taux_positivite_7j']
+    temps = {}
+    for nom, calcul in [("pandas (groupby + rolling)", reference_pandas),
+                        ("numpy (matrice dense)", calculer_indicateurs_dep)]:
+        mesures = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            resultat = calcul(tests)
+            mesures.append(time.perf_counter() - debut)
+        temps[nom] = (min(mesures), resultat)
+
+    reference = temps["pandas (groupby + rolling)"][1]
+    vectorise = temps["numpy (matrice dense)"][1].sort_values(['dep', 'jour']).reset_index(drop=True)
+    for col in colonnes:
+        # Tolérance d'un pas d'arrondi : les deux calculs peuvent tomber
+        # de part et d'autre d'une demi-unité
+        pas = {'taux_incidence': 0.1, 'cas_mm7_dep': 0.1, 'taux_positivite_7j': 0.01}.get(col, 1e-9)
+        ecart = np.nanmax(np.abs(reference[col].to_numpy() - vectorise[col].to_numpy()))
+        assert ecart <= pas + 1e-9, f"{col} : écart {ecart} avec la référence pandas"
+
+    return pd.DataFrame([
+        {"calcul": nom, "temps_s": round(duree, 4)} for nom, (duree, _) in temps.items()
+    ])
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table, sauvegarder_table
+
+    parser = argparse.ArgumentParser(description="Indicateurs départementaux EpiSight")
+    parser.add_argument("--verifier", action="store_true",
+                        help="compare le moteur vectorisé à pandas sans rien écrire")
+    args = parser.parse_args()
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    colonnes_base = ['dep', 'jour', 'population', 'cas_positifs', 'total_tests', 'taux_positivite']
+    tests = lire_table("tests_par_dep", PROCESSED, colonnes=colonnes_base)
+
+    if args.verifier:
+        print("VÉRIFICATION — MOTEUR VECTORISÉ vs PANDAS")
+        print("=" * 50)
+        print(comparer_a_reference(tests).to_string(index=False))
+        sys.exit(0)
+
+    # Persistance : le dashboard ne fait plus que découper ces colonnes
+    sauvegarder_table(calculer_indicateurs_dep(tests), "tests_par_dep", PROCESSED)
+    print("tests_par_dep mis à jour (cas_7j, taux_incidence, cas_mm7_dep, taux_positivite_7j)")
@@ -4,9 +4,23 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import hashlib
+import logging
+import os
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+# Configuration du modèle
+PARAMETRES_PROPHET = dict(
+    changepoint_prior_scale=0.15,  # Sensibilité aux changements de tendance
+    seasonality_prior_scale=10,    # Importance des effets saisonniers
+    yearly_seasonality=True,       # Patterns annuels (vagues saisonnières)
+    weekly_seasonality=True,       # Patterns hebdomadaires (effet week-end)
+    daily_seasonality=False,       # Pas pertinent avec données quotidiennes agrégées
+    interval_width=0.95            # Intervalle de confiance à 95%
+)
+
 def preparer_donnees_prophet(df_tests_nat: pd.DataFrame, 
                               colonne: str = 'cas_mm7') -> pd.DataFrame:
     """
@@ -21,36 +35,58 @@ def preparer_donnees_prophet(df_tests_nat: pd.DataFrame,
     return df
 
 
+def creer_modele(**parametres):
+    """Modèle Prophet avec la configuration EpiSight (surchargeable)"""
+    try:
+        from prophet import Prophet
+    except ImportError:
+        raise ImportError("Prophet non installé. Exécute : pip install prophet")
+    return Prophet(**{**PARAMETRES_PROPHET, **parametres})
+
+
+def extraire_predictions_futures(prediction: pd.DataFrame,
+                                 derniere_date_reelle: pd.Timestamp,
+                                 decimales: int = 0) -> pd.DataFrame:
+    """
+    Ne garde que les jours postérieurs aux données réelles,
+    arrondis (decimales : 2 pour un taux) et sans valeurs négatives
+    """
+    prediction_future = prediction[
+        prediction['ds'] > derniere_date_reelle
+    ][['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+
+    for col in ['yhat', 'yhat_lower', 'yhat_upper']:
+        prediction_future[col] = prediction_future[col].clip(lower=0).round(decimales)
+
+    prediction_future.columns = ['date', 'prediction', 'borne_basse', 'borne_haute']
+    return prediction_future
+
+
 def entrainer_et_predire(df_tests_nat: pd.DataFrame,
-                          jours_prediction: int = 7) -> tuple:
+                          jours_prediction: int = 7,
+                          registre=None) -> tuple:
     """
     Entraînement du modèle Prophet sur les données historiques et prédit les jours suivants
+
+    - registre : RegistreModeles optionnel — réutilise le modèle si les données
+                 n'ont pas changé, réentraîne à chaud sinon
     
     Retourne : (dataframe_historique_avec_prediction, dataframe_prediction_seule)
     """
-    try:
-        from prophet import Prophet
-    except ImportError:
-        raise ImportError("Prophet non installé. Exécute : pip install prophet")
-    
     # Préparation des données
     df_prophet = preparer_donnees_prophet(df_tests_nat)
     
     print(f"Entraînement sur {len(df_prophet)} jours de données...")
     print(f"Période : {df_prophet['ds'].min().date()} → {df_prophet['ds'].max().date()}")
     
-    # Configuration du modèle
-    modele = Prophet(
-        changepoint_prior_scale=0.15,  # Sensibilité aux changements de tendance
-        seasonality_prior_scale=10,    # Importance des effets saisonniers
-        yearly_seasonality=True,       # Patterns annuels (vagues saisonnières)
-        weekly_seasonality=True,       # Patterns hebdomadaires (effet week-end)
-        daily_seasonality=False,       # Pas pertinent avec données quotidiennes agrégées
-        interval_width=0.95            # Intervalle de confiance à 95%
-    )
-    
     # Entraînement
-    modele.fit(df_prophet)
+    if registre is None:
+        modele = creer_modele()
+        modele.fit(df_prophet)
+    else:
+        modele, statut = registre.entrainer(df_prophet, serie="national:cas_mm7",
+                                            parametres=PARAMETRES_PROPHET)
+        print(f"Modèle : {statut} (registre {registre.dossier})")
     
     # Création du dataframe futur
     futur = modele.make_future_dataframe(periods=jours_prediction)
@@ -59,16 +95,7 @@ def entrainer_et_predire(df_tests_nat: pd.DataFrame,
     prediction = modele.predict(futur)
     
     # Extraction des prédictions futures uniquement
-    derniere_date_reelle = df_prophet['ds'].max()
-    prediction_future = prediction[
-        prediction['ds'] > derniere_date_reelle
-    ][['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-    
-    # Arrondir et éviter les valeurs négatives
-    for col in ['yhat', 'yhat_lower', 'yhat_upper']:
-        prediction_future[col] = prediction_future[col].clip(lower=0).round(0)
-    
-    prediction_future.columns = ['date', 'prediction', 'borne_basse', 'borne_haute']
+    prediction_future = extraire_predictions_futures(prediction, df_prophet['ds'].max())
     
     print(f"\nPrédictions pour les {jours_prediction} prochains jours :")
     print(prediction_future.to_string(index=False))
@@ -76,18 +103,519 @@ def entrainer_et_predire(df_tests_nat: pd.DataFrame,
     return prediction, prediction_future, modele
 
 
+MOTEURS = ('prophet', 'holt_winters')
+NOMS_MOTEURS = {'prophet': "Prophet", 'holt_winters': "Holt-Winters"}
+
+
+def predire(df_tests_nat: pd.DataFrame, jours_prediction: int = 7,
+            colonne: str = 'cas_mm7', moteur: str = 'prophet') -> pd.DataFrame:
+    """
+    Prédictions futures seules (date, prediction, borne_basse, borne_haute)
+    avec le moteur choisi :
+    - 'prophet'      : modèle Prophet (plusieurs secondes par série)
+    - 'holt_winters' : moteur NumPy de prevision_rapide (quelques millisecondes)
+    """
+    if moteur == 'holt_winters':
+        from prevision_rapide import prevoir
+        return prevoir(df_tests_nat, jours_prediction, colonne, DECIMALES.get(colonne, 0))
+    if moteur == 'prophet':
+        return prevoir_prophet(df_tests_nat, jours_prediction, colonne)[0]
+    raise ValueError(f"Moteur inconnu : {moteur!r} (choix : {', '.join(MOTEURS)})")
+
+
+#  Mode basse latence : seuls les jours de l'horizon sont prédits
+ECHANTILLONS_INCERTITUDE = 1000   # uncertainty_samples par défaut de Prophet
+TOLERANCE_BORNES = 0.15           # écart max des bornes / largeur de l'intervalle de référence, à 1 000 tirages
+                                  # (≈ 1,5 × l'écart entre deux graines, mesuré à 0,07–0,10)
+DECIMALES = {'tp_mm7': 2}         # taux en % : pas d'arrondi à l'unité
+
+
+def predire_horizon(modele, derniere_date_reelle: pd.Timestamp, jours_prediction: int = 7,
+                    echantillons: int = None, decimales: int = 0) -> pd.DataFrame:
+    """
+    Prédit uniquement les jours postérieurs aux données réelles
+
+    make_future_dataframe + predict évaluent tout l'historique (tendance,
+    saisonnalités, tirages Monte-Carlo des intervalles) pour n'en garder
+    que l'horizon. La prédiction centrale est identique ; les bornes, tirées
+    au hasard, varient autant qu'entre deux exécutions complètes.
+
+    - echantillons : tirages Monte-Carlo des intervalles (None : réglage du modèle,
+                     0 : pas d'intervalle, bornes à NaN)
+    """
+    futur = pd.DataFrame({'ds': pd.date_range(derniere_date_reelle + pd.Timedelta(days=1),
+                                              periods=jours_prediction, freq='D')})
+    echantillons_modele = modele.uncertainty_samples
+    if echantillons is not None:
+        modele.uncertainty_samples = echantillons
+    try:
+        prediction = modele.predict(futur)
+    finally:
+        modele.uncertainty_samples = echantillons_modele
+    if 'yhat_lower' not in prediction:
+        prediction = prediction.assign(yhat_lower=np.nan, yhat_upper=np.nan)
+    return extraire_predictions_futures(prediction, derniere_date_reelle, decimales)
+
+
+def prevoir_prophet(df_tests_nat: pd.DataFrame, jours_prediction: int = 7,
+                    colonne: str = 'cas_mm7', echantillons: int = ECHANTILLONS_INCERTITUDE,
+                    fenetre_jours: int = None, registre=None) -> tuple:
+    """
+    Prévision Prophet basse latence
+
+    - fenetre_jours : n'entraîne que sur les N derniers jours (ajustement plus court,
+                      mais le modèle change : hors du périmètre de verifier_horizon)
+    - registre      : RegistreModeles optionnel, comme entrainer_et_predire
+
+    Retourne : (prediction_future, durees) — durees : jours_entrainement, ajustement_s, prediction_s
+    """
+    df_prophet = preparer_donnees_prophet(df_tests_nat, colonne)
+    if fenetre_jours is not None:
+        df_prophet = df_prophet[df_prophet['ds'] > df_prophet['ds'].max() - pd.Timedelta(days=fenetre_jours)]
+
+    debut = time.perf_counter()
+    if registre is None:
+        modele = creer_modele()
+        modele.fit(df_prophet)
+    else:
+        modele, _ = registre.entrainer(df_prophet, serie=f"national:{colonne}",
+                                       parametres=PARAMETRES_PROPHET)
+    duree_ajustement = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    prediction_future = predire_horizon(modele, df_prophet['ds'].max(), jours_prediction,
+                                        echantillons, DECIMALES.get(colonne, 0))
+    return prediction_future, {'jours_entrainement': len(df_prophet),
+                               'ajustement_s': duree_ajustement,
+                               'prediction_s': time.perf_counter() - debut}
+
+
+def verifier_horizon(df_tests_nat: pd.DataFrame, colonne: str = 'cas_mm7',
+                     jours_prediction: int = 28, echantillons: tuple = (1000, 200, 0),
+                     graine: int = 0) -> pd.DataFrame:
+    """
+    Non-régression du mode basse latence contre la prédiction complète
+    (make_future_dataframe + predict, 1 000 tirages) d'un même modèle :
+
+    - prédiction centrale : écart <= arrondi (10^-décimales)
+    - bornes : écart <= TOLERANCE_BORNES × √(1000 / tirages) × largeur de
+      l'intervalle de référence — deux exécutions complètes avec des graines
+      différentes s'écartent déjà de 7 à 10 % de cette largeur
+
+    Retourne le rapport par nombre de tirages ; AssertionError hors tolérance
+    """
+    decimales = DECIMALES.get(colonne, 0)
+    df_prophet = preparer_donnees_prophet(df_tests_nat, colonne)
+    derniere_date = df_prophet['ds'].max()
+    modele = creer_modele(uncertainty_samples=ECHANTILLONS_INCERTITUDE)
+    modele.fit(df_prophet)
+
+    np.random.seed(graine)
+    debut = time.perf_counter()
+    reference = extraire_predictions_futures(
+        modele.predict(modele.make_future_dataframe(periods=jours_prediction)),
+        derniere_date, decimales).reset_index(drop=True)
+    duree_reference = time.perf_counter() - debut
+    largeur = np.maximum(reference['borne_haute'] - reference['borne_basse'], 10.0 ** -decimales)
+
+    lignes = [{'echantillons': f"{ECHANTILLONS_INCERTITUDE} (complet)", 'prediction_s': duree_reference,
+               'acceleration': 1.0, 'ecart_prediction': 0.0, 'ecart_bornes': 0.0,
+               'tolerance_bornes': None, 'conforme': True}]
+    for n in echantillons:
+        np.random.seed(graine)
+        debut = time.perf_counter()
+        horizon = predire_horizon(modele, derniere_date, jours_prediction, n, decimales)
+        duree = time.perf_counter() - debut
+        assert (horizon['date'].to_numpy() == reference['date'].to_numpy()).all()
+        ecart_prediction = float((horizon['prediction'] - reference['prediction']).abs().max())
+        if n:
+            ecart_bornes = float(((horizon[['borne_basse', 'borne_haute']] - reference[['borne_basse', 'borne_haute']])
+                                  .abs().max(axis=1) / largeur).max())
+            tolerance = TOLERANCE_BORNES * np.sqrt(ECHANTILLONS_INCERTITUDE / n)
+        else:
+            ecart_bornes, tolerance = None, None
+        lignes.append({'echantillons': str(n), 'prediction_s': duree,
+                       'acceleration': duree_reference / duree,
+                       'ecart_prediction': ecart_prediction, 'ecart_bornes': ecart_bornes,
+                       'tolerance_bornes': tolerance,
+                       'conforme': ecart_prediction <= 10.0 ** -decimales
+                                   and (tolerance is None or ecart_bornes <= tolerance)})
+    rapport = pd.DataFrame(lignes)
+    print(f"{colonne} — {len(df_prophet)} jours, horizon {jours_prediction} j")
+    print(rapport.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    assert rapport['conforme'].all(), f"{colonne} : mode basse latence hors tolérance"
+    return rapport
+
+
+#  Prédictions départementales (un modèle par département, en parallèle)
+def _predire_serie(dep: str, df_serie: pd.DataFrame, colonne: str,
+                   jours_prediction: int, dossier_modeles: Path = None) -> dict:
+    """
+    Entraîne et prédit une série départementale dans un processus du pool.
+    Toute erreur est capturée : un département en échec n'interrompt pas le lot.
+    """
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    debut = time.perf_counter()
+    try:
+        df_prophet = preparer_donnees_prophet(df_serie, colonne)
+        if dossier_modeles is None:
+            modele = creer_modele()
+            modele.fit(df_prophet)
+        else:
+            from registre_modeles import RegistreModeles
+            modele, _ = RegistreModeles(dossier_modeles).entrainer(
+                df_prophet, serie=f"dep:{dep}:{colonne}", parametres=PARAMETRES_PROPHET)
+        prediction_future = predire_horizon(modele, df_prophet['ds'].max(), jours_prediction)
+        prediction_future.insert(0, 'dep', dep)
+        return {'dep': dep, 'prediction': prediction_future, 'erreur': None,
+                'duree_s': time.perf_counter() - debut}
+    except Exception as e:
+        return {'dep': dep, 'prediction': None, 'erreur': f"{type(e).__name__}: {e}",
+                'duree_s': time.perf_counter() - debut}
+
+
+def predire_departements(tests_dep: pd.DataFrame,
+                         jours_prediction: int = 7,
+                         colonne: str = 'cas_mm7_dep',
+                         deps: list = None,
+                         n_jobs: int = None,
+                         dossier_modeles: Path = None) -> tuple:
+    """
+    Prédiction Prophet pour chaque département, modèles entraînés en parallèle
+    (pool de processus joblib/loky, un fit indépendant par processus)
+
+    - n_jobs          : nombre de processus (défaut : nombre de cœurs, borné au nombre de séries)
+    - dossier_modeles : registre des modèles partagé par les processus (None = sans cache)
+
+    Retourne : (predictions, rapport)
+    - predictions : format long dep, date, prediction, borne_basse, borne_haute
+    - rapport     : dep, duree_s, erreur (None si succès)
+    """
+    from joblib import Parallel, delayed
+
+    if deps is not None:
+        tests_dep = tests_dep[tests_dep['dep'].isin(deps)]
+    series = {dep: groupe[['jour', colonne]].sort_values('jour')
+              for dep, groupe in tests_dep.groupby('dep')}
+
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(len(series), 1))
+    print(f"Entraînement de {len(series)} modèles départementaux sur {n_jobs} processus...")
+
+    debut = time.perf_counter()
+    resultats = Parallel(n_jobs=n_jobs, backend='loky')(
+        delayed(_predire_serie)(dep, serie, colonne, jours_prediction, dossier_modeles)
+        for dep, serie in series.items()
+    )
+    duree_totale = time.perf_counter() - debut
+
+    rapport = pd.DataFrame([{k: r[k] for k in ('dep', 'duree_s', 'erreur')} for r in resultats])
+    reussites = [r['prediction'] for r in resultats if r['prediction'] is not None]
+    colonnes = ['dep', 'date', 'prediction', 'borne_basse', 'borne_haute']
+    predictions = (pd.concat(reussites, ignore_index=True) if reussites
+                   else pd.DataFrame(columns=colonnes))
+
+    echecs = rapport['erreur'].notna().sum()
+    print(f"{len(reussites)} départements prédits, {echecs} en échec — "
+          f"{duree_totale:.1f} s (somme des fits : {rapport['duree_s'].sum():.1f} s, "
+          f"accélération ×{rapport['duree_s'].sum() / duree_totale:.1f})")
+    return predictions, rapport
+
+
 def sauvegarder_predictions(prediction_future: pd.DataFrame, 
-                             dossier_processed: Path) -> Path:
+                             dossier_processed: Path, moteur: str = 'prophet') -> Path:
     chemin = dossier_processed / "predictions_7j.csv"
-    prediction_future.to_csv(chemin, index=False)
+    prediction_future.assign(moteur=moteur).to_csv(chemin, index=False)
     print(f"\nPrédictions sauvegardées : {chemin}")
     return chemin
 
 
+def sauvegarder_predictions_dep(predictions: pd.DataFrame,
+                                dossier_processed: Path, moteur: str = 'prophet') -> Path:
+    # Le moteur est écrit dans le fichier : le dashboard l'affiche sans le deviner
+    chemin = dossier_processed / "predictions_dep_7j.csv"
+    predictions.assign(moteur=moteur).to_csv(chemin, index=False)
+    print(f"\nPrédictions départementales sauvegardées : {chemin}")
+    return chemin
+
+
+#  Lot multi-indicateurs, multi-horizons : un seul artefact Parquet versionné
+# Indicateur → table de data/processed qui le contient
+METRIQUES = {
+    'cas_mm7':   "indicateurs_tests",
+    'tp_mm7':    "indicateurs_tests",
+    'hosp_mm7':  "indicateurs_hosp",
+    'rea_mm7':   "indicateurs_hosp",
+    'deces_mm7': "indicateurs_hosp",
+}
+HORIZONS = (7, 14, 28)
+DOSSIER_ARTEFACTS = "previsions"          # sous-dossier de data/processed
+CLE_METADONNEES = b"episight"             # métadonnées du lot dans le schéma Parquet
+VERSIONS_CONSERVEES = 5                   # lots gardés sur disque, les plus anciens sont supprimés
+
+
+def _predire_metrique(colonne: str, df_prophet: pd.DataFrame, horizon: int,
+                      moteur: str = 'prophet', dossier_modeles: Path = None,
+                      echantillons: int = ECHANTILLONS_INCERTITUDE) -> dict:
+    """
+    Une série préparée, un ajustement au plus long horizon, dans un processus
+    du pool : les horizons plus courts sont les premiers jours de la même
+    prévision. Toute erreur est capturée, comme pour les départements.
+    """
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    debut = time.perf_counter()
+    duree_ajustement = None
+    try:
+        if moteur == 'holt_winters':
+            from prevision_rapide import prevoir
+            prediction_future = prevoir(df_prophet.rename(columns={'ds': 'jour', 'y': colonne}),
+                                        horizon, colonne, DECIMALES.get(colonne, 0))
+            duree_ajustement = time.perf_counter() - debut
+        else:
+            if dossier_modeles is None:
+                modele = creer_modele()
+                modele.fit(df_prophet)
+            else:
+                from registre_modeles import RegistreModeles
+                modele, _ = RegistreModeles(dossier_modeles).entrainer(
+                    df_prophet, serie=f"national:{colonne}", parametres=PARAMETRES_PROPHET)
+            duree_ajustement = time.perf_counter() - debut
+            prediction_future = predire_horizon(modele, df_prophet['ds'].max(), horizon,
+                                                echantillons, DECIMALES.get(colonne, 0))
+        prediction_future.insert(0, 'echeance', np.arange(1, len(prediction_future) + 1))
+        prediction_future.insert(0, 'metrique', colonne)
+        erreur = None
+    except Exception as e:
+        prediction_future, erreur = None, f"{type(e).__name__}: {e}"
+    duree = time.perf_counter() - debut
+    return {'metrique': colonne, 'prediction': prediction_future, 'erreur': erreur,
+            'duree_ajustement_s': duree_ajustement,
+            'duree_prediction_s': None if duree_ajustement is None else duree - duree_ajustement}
+
+
+def predire_lot(dossier_processed: Path, metriques: list = None, horizons: tuple = HORIZONS,
+                moteur: str = 'prophet', n_jobs: int = None,
+                dossier_modeles: Path = None, echantillons: int = ECHANTILLONS_INCERTITUDE,
+                fenetre_jours: int = None) -> tuple:
+    """
+    Prévision de plusieurs indicateurs nationaux sur plusieurs horizons en une exécution
+
+    - chaque table source est lue une fois, chaque série préparée une fois
+    - un ajustement par indicateur, au plus long horizon, en parallèle
+      (pool de processus joblib/loky, comme predire_departements)
+    - echantillons, fenetre_jours : comme prevoir_prophet
+
+    Retourne : (predictions, metadonnees)
+    - predictions : metrique, echeance (1..max(horizons)), date, prediction, borne_basse, borne_haute
+    - metadonnees : version, empreinte des données, paramètres, durées, détail par indicateur
+    """
+    from joblib import Parallel, delayed
+    from registre_modeles import empreinte
+    from stockage import lire_table
+
+    debut_total = time.perf_counter()
+    metriques = list(metriques or METRIQUES)
+    horizon_max = max(horizons)
+    parametres = PARAMETRES_PROPHET if moteur == 'prophet' else {}
+
+    debut = time.perf_counter()
+    tables = {nom: lire_table(nom, dossier_processed)
+              for nom in dict.fromkeys(METRIQUES[m] for m in metriques)}
+    duree_chargement = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    series = {m: preparer_donnees_prophet(tables[METRIQUES[m]], m) for m in metriques}
+    if fenetre_jours is not None:
+        series = {m: df[df['ds'] > df['ds'].max() - pd.Timedelta(days=fenetre_jours)]
+                  for m, df in series.items()}
+    empreintes = {m: empreinte(df, parametres) for m, df in series.items()}
+    duree_preparation = time.perf_counter() - debut
+
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(series))
+    print(f"{len(series)} indicateurs × horizons {', '.join(map(str, horizons))} j "
+          f"({moteur}) sur {n_jobs} processus...")
+    debut = time.perf_counter()
+    resultats = Parallel(n_jobs=n_jobs, backend='loky')(
+        delayed(_predire_metrique)(m, df, horizon_max, moteur, dossier_modeles, echantillons)
+        for m, df in series.items()
+    )
+    duree_previsions = time.perf_counter() - debut
+
+    reussites = [r['prediction'] for r in resultats if r['prediction'] is not None]
+    colonnes = ['metrique', 'echeance', 'date', 'prediction', 'borne_basse', 'borne_haute']
+    predictions = (pd.concat(reussites, ignore_index=True)[colonnes] if reussites
+                   else pd.DataFrame(columns=colonnes))
+
+    empreinte_donnees = hashlib.sha256("".join(empreintes[m] for m in metriques).encode()).hexdigest()[:32]
+    cree_le = pd.Timestamp.now()
+    metadonnees = {
+        'version': f"{cree_le:%Y%m%d-%H%M%S}-{empreinte_donnees[:8]}",
+        'cree_le': cree_le.isoformat(timespec='seconds'),
+        'moteur': moteur,
+        'parametres': parametres,
+        'horizons': sorted(horizons),
+        'echantillons_incertitude': echantillons if moteur == 'prophet' else None,
+        'fenetre_jours': fenetre_jours,
+        'empreinte_donnees': empreinte_donnees,
+        'n_jobs': n_jobs,
+        'durees_s': {'chargement': round(duree_chargement, 3),
+                     'preparation': round(duree_preparation, 3),
+                     'previsions': round(duree_previsions, 3),
+                     'total': round(time.perf_counter() - debut_total, 3)},
+        'metriques': {
+            r['metrique']: {
+                'source': METRIQUES[r['metrique']],
+                'jours': len(series[r['metrique']]),
+                'debut': str(series[r['metrique']]['ds'].min().date()),
+                'fin': str(series[r['metrique']]['ds'].max().date()),
+                'empreinte': empreintes[r['metrique']],
+                'duree_ajustement_s': None if r['duree_ajustement_s'] is None else round(r['duree_ajustement_s'], 3),
+                'duree_prediction_s': None if r['duree_prediction_s'] is None else round(r['duree_prediction_s'], 3),
+                'erreur': r['erreur'],
+            } for r in resultats
+        },
+    }
+    echecs = sum(r['erreur'] is not None for r in resultats)
+    print(f"{len(reussites)} indicateurs prédits, {echecs} en échec — {duree_previsions:.1f} s "
+          f"(somme des ajustements : {sum(r['duree_ajustement_s'] or 0 for r in resultats):.1f} s)")
+    return predictions, metadonnees
+
+
+def sauvegarder_artefact(predictions: pd.DataFrame, metadonnees: dict,
+                         dossier_processed: Path, conserver: int = VERSIONS_CONSERVEES) -> Path:
+    """
+    data/processed/previsions/previsions_<version>.parquet, métadonnées du lot
+    dans le schéma Parquet ; écriture puis renommage (jamais de fichier partiel)
+
+    - conserver : nombre de versions gardées (la nouvelle comprise), les plus
+                  anciennes sont supprimées — None pour tout garder
+    """
+    import json
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    dossier = Path(dossier_processed) / DOSSIER_ARTEFACTS
+    dossier.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(predictions, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           CLE_METADONNEES: json.dumps(metadonnees).encode()})
+    chemin = dossier / f"previsions_{metadonnees['version']}.parquet"
+    temporaire = chemin.with_name(f".{chemin.name}.{os.getpid()}.tmp")
+    pq.write_table(table, temporaire)
+    os.replace(temporaire, chemin)
+    print(f"\nArtefact de prévisions sauvegardé : {chemin}")
+
+    # Les noms de version commencent par l'horodatage : tri = ordre chronologique
+    if conserver is not None:
+        versions = sorted(dossier.glob("previsions_*.parquet"))
+        for ancien in versions[:max(len(versions) - max(conserver, 1), 0)]:
+            ancien.unlink()
+            print(f"Ancienne version supprimée : {ancien.name}")
+    return chemin
+
+
+def lire_artefact(dossier_processed: Path, version: str = None) -> tuple:
+    """
+    (predictions, metadonnees) de la version demandée, ou de la plus récente
+    (les noms de version commencent par l'horodatage) — None si aucun artefact
+    """
+    import json
+    import pyarrow.parquet as pq
+
+    dossier = Path(dossier_processed) / DOSSIER_ARTEFACTS
+    if version is not None:
+        chemin = dossier / f"previsions_{version}.parquet"
+    else:
+        chemins = sorted(dossier.glob("previsions_*.parquet"))
+        if not chemins:
+            return None
+        chemin = chemins[-1]
+    table = pq.read_table(chemin)
+    return table.to_pandas(), json.loads(table.schema.metadata[CLE_METADONNEES])
+
+
 if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Prédictions Prophet EpiSight")
+    parser.add_argument("--departements", action="store_true",
+                        help="prédit aussi chaque département (tests_par_dep)")
+    parser.add_argument("--n-jobs", type=int, default=None,
+                        help="processus pour les modèles départementaux (défaut : nb de cœurs)")
+    parser.add_argument("--sans-cache", action="store_true",
+                        help="réentraîne sans passer par le registre models/")
+    parser.add_argument("--moteur", choices=MOTEURS, default='prophet',
+                        help="holt_winters : moteur NumPy rapide à la place de Prophet")
+    parser.add_argument("--lot", action="store_true",
+                        help="prévoit plusieurs indicateurs × horizons et écrit un artefact "
+                             "Parquet versionné dans data/processed/previsions/")
+    parser.add_argument("--metriques", nargs="+", choices=list(METRIQUES), default=None,
+                        help="indicateurs du lot (défaut : tous)")
+    parser.add_argument("--horizons", nargs="+", type=int, default=list(HORIZONS),
+                        help="horizons du lot en jours (défaut : 7 14 28)")
+    parser.add_argument("--conserver", type=int, default=VERSIONS_CONSERVEES,
+                        help="lots gardés dans data/processed/previsions/ (défaut : 5)")
+    parser.add_argument("--echantillons", type=int, default=ECHANTILLONS_INCERTITUDE,
+                        help="tirages Monte-Carlo des intervalles (0 : sans intervalle, plus rapide)")
+    parser.add_argument("--fenetre", type=int, default=None,
+                        help="n'entraîne que sur les N derniers jours")
+    parser.add_argument("--verifier", action="store_true",
+                        help="non-régression du mode basse latence contre la prédiction complète")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    from registre_modeles import RegistreModeles
+
     # Test standalone du module
     PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    MODELES = Path(__file__).parent.parent / "models"
+
+    if args.verifier:
+        logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+        from stockage import lire_table
+        for colonne in args.metriques or ['cas_mm7', 'tp_mm7', 'hosp_mm7']:
+            verifier_horizon(lire_table(METRIQUES[colonne], PROCESSED), colonne, max(args.horizons))
+        print("\nMode basse latence conforme à la prédiction complète")
+        sys.exit(0)
+
+    if args.lot:
+        predictions, metadonnees = predire_lot(
+            PROCESSED, args.metriques, tuple(args.horizons), moteur=args.moteur,
+            n_jobs=args.n_jobs, dossier_modeles=None if args.sans_cache else MODELES,
+            echantillons=args.echantillons, fenetre_jours=args.fenetre)
+        sauvegarder_artefact(predictions, metadonnees, PROCESSED, args.conserver)
+        print(f"Version {metadonnees['version']} — durées : {metadonnees['durees_s']}")
+        for colonne, info in metadonnees['metriques'].items():
+            print(f"  {colonne:<10} {info['jours']:>5} jours ({info['debut']} → {info['fin']})  "
+                  f"ajustement {info['duree_ajustement_s']} s  {info['erreur'] or ''}")
+        sys.exit(0)
+
+    # Modes mono-indicateur : cas positifs nationaux (predictions_7j.csv)
     tests_nat = pd.read_csv(PROCESSED / "indicateurs_tests.csv", parse_dates=['jour'])
-    
-    prediction_complete, prediction_future, modele = entrainer_et_predire(tests_nat)
-    sauvegarder_predictions(prediction_future, PROCESSED)
\ No newline at end of file
+    registre = None if args.sans_cache else RegistreModeles(MODELES)
+    if args.moteur == 'prophet':
+        prediction_future, durees = prevoir_prophet(tests_nat, echantillons=args.echantillons,
+                                                    fenetre_jours=args.fenetre, registre=registre)
+        print(prediction_future.to_string(index=False))
+        print(f"\n{durees['jours_entrainement']} jours d'entraînement — ajustement "
+              f"{durees['ajustement_s']:.2f} s, prédiction {durees['prediction_s']:.3f} s "
+              f"({args.echantillons} tirages)")
+    else:
+        prediction_future = predire(tests_nat, moteur=args.moteur)
+        print(prediction_future.to_string(index=False))
+    sauvegarder_predictions(prediction_future, PROCESSED, args.moteur)
+
+    if args.departements:
+        from stockage import lire_table
+
+        tests_dep = lire_table("tests_par_dep", PROCESSED, colonnes=['dep', 'jour', 'cas_mm7_dep'])
+        if args.moteur == 'prophet':
+            predictions_dep, rapport = predire_departements(
+                tests_dep, n_jobs=args.n_jobs,
+                dossier_modeles=None if args.sans_cache else MODELES)
+            if rapport['erreur'].notna().any():
+                print(rapport[rapport['erreur'].notna()].to_string(index=False))
+        else:
+            from prevision_rapide import prevoir_departements
+            predictions_dep = prevoir_departements(tests_dep)
+        sauvegarder_predictions_dep(predictions_dep, PROCESSED, args.moteur)
@@ -0,0 +1,171 @@
+#  EpiSight — Moteur de prévision rapide
+#  Holt-Winters additif (tendance amortie + saisonnalité hebdomadaire) sur log(1 + y),
+#  vectorisé sur un lot de séries : alternative sub-seconde à Prophet
+
+import numpy as np
+import pandas as pd
+
+SAISON = 7          # saisonnalité hebdomadaire (effet week-end)
+AMORTISSEMENT = 0.98
+
+# Grille de lissage évaluée en un seul lot : chaque série garde
+# la combinaison (alpha, beta, gamma) de plus faible erreur à un pas
+GRILLE = [(alpha, beta, gamma)
+          for alpha in (0.2, 0.4, 0.6, 0.8)
+          for beta in (0.01, 0.05, 0.15)
+          for gamma in (0.05, 0.2, 0.4)]
+
+
+def _lisser(Y: np.ndarray, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray,
+            saison: int, phi: float) -> tuple:
+    """
+    Filtre Holt-Winters additif sur toutes les lignes de Y à la fois
+    (une itération par jour, vectorisée sur les séries)
+
+    Retourne (niveau, tendance, saisons, residus) en fin de série
+    """
+    n, T = Y.shape
+    niveau = Y[:, :saison].mean(axis=1)
+    tendance = (Y[:, saison:2 * saison].mean(axis=1) - niveau) / saison
+    saisons = Y[:, :saison] - niveau[:, None]
+    residus = np.zeros((n, T))
+
+    for t in range(saison, T):
+        s = saisons[:, t % saison]
+        prevu = niveau + phi * tendance + s
+        residus[:, t] = Y[:, t] - prevu
+        ancien_niveau = niveau
+        niveau = alpha * (Y[:, t] - s) + (1 - alpha) * (ancien_niveau + phi * tendance)
+        tendance = beta * (niveau - ancien_niveau) + (1 - beta) * phi * tendance
+        saisons[:, t % saison] = gamma * (Y[:, t] - niveau) + (1 - gamma) * s
+    return niveau, tendance, saisons, residus
+
+
+def _extrapoler(niveau, tendance, saisons, T: int, horizon: int, phi: float) -> np.ndarray:
+    h = np.arange(1, horizon + 1)
+    cumul_phi = np.cumsum(phi ** h)                      # φ + φ² + … + φ^h
+    indices_saison = (T + h - 1) % saisons.shape[1]
+    return niveau[:, None] + cumul_phi[None, :] * tendance[:, None] + saisons[:, indices_saison]
+
+
+def prevoir_lot(Y: np.ndarray, horizon: int = 7, saison: int = SAISON,
+                niveau_confiance: float = 0.95, intervalle: str = 'analytique',
+                n_simulations: int = 500, grille: list = None,
+                phi: float = AMORTISSEMENT, graine: int = 0) -> dict:
+    """
+    Prévision d'un lot de séries (lignes de Y, valeurs >= 0, jours consécutifs)
+
+    - intervalle : 'analytique' (variance ETS(A,Ad,A) à h pas)
+                   ou 'bootstrap' (rééchantillonnage des résidus à un pas)
+
+    Retourne {'prediction', 'borne_basse', 'borne_haute'} de forme (n_series, horizon)
+    """
+    from scipy.stats import norm
+
+    grille = grille or GRILLE
+    Y = np.log1p(np.clip(np.asarray(Y, dtype=float), 0, None))
+    n, T = Y.shape
+    if T < 2 * saison:
+        raise ValueError(f"Au moins {2 * saison} jours requis, {T} fournis")
+
+    # Toutes les combinaisons de la grille × toutes les séries en un seul lot
+    k = len(grille)
+    params = np.repeat(np.array(grille), n, axis=0)                   # (k·n, 3)
+    niveau, tendance, saisons, residus = _lisser(
+        np.tile(Y, (k, 1)), params[:, 0], params[:, 1], params[:, 2], saison, phi)
+    sse = (residus[:, saison:] ** 2).sum(axis=1).reshape(k, n)
+    meilleur = sse.argmin(axis=0) * n + np.arange(n)                  # ligne retenue par série
+
+    alpha, beta, gamma = params[meilleur].T
+    niveau, tendance, saisons = niveau[meilleur], tendance[meilleur], saisons[meilleur]
+    residus = residus[meilleur, saison:]
+    centrale = _extrapoler(niveau, tendance, saisons, T, horizon, phi)
+
+    if intervalle == 'analytique':
+        # Var(e_{T+h}) = σ² (1 + Σ_{j<h} c_j²), c_j = α(1 + β(φ+…+φ^j)) + γ·1[j ≡ 0 mod m]
+        sigma2 = residus.var(axis=1)
+        j = np.arange(1, horizon)
+        cumul_phi = np.cumsum(phi ** j) if horizon > 1 else np.zeros(0)
+        c = (alpha[:, None] * (1 + beta[:, None] * cumul_phi[None, :])
+             + gamma[:, None] * (j % saison == 0)[None, :])
+        variance = sigma2[:, None] * (1 + np.concatenate(
+            [np.zeros((n, 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+        z = norm.ppf(0.5 + niveau_confiance / 2)
+        basse = centrale - z * np.sqrt(variance)
+        haute = centrale + z * np.sqrt(variance)
+    elif intervalle == 'bootstrap':
+        # Simulation de trajectoires : résidus tirés avec remise, propagés par le filtre
+        rng = np.random.default_rng(graine)
+        tirages = rng.integers(0, residus.shape[1], size=(n, n_simulations, horizon))
+        chocs = np.take_along_axis(residus[:, None, :].repeat(n_simulations, axis=1),
+                                   tirages, axis=2)
+        niv = np.repeat(niveau[:, None], n_simulations, axis=1)
+        ten = np.repeat(tendance[:, None], n_simulations, axis=1)
+        sai = np.repeat(saisons[:, None, :], n_simulations, axis=1)
+        trajectoires = np.empty((n, n_simulations, horizon))
+        a, b, g = alpha[:, None], beta[:, None], gamma[:, None]
+        for h in range(horizon):
+            s = sai[:, :, (T + h) % saison]
+            y = niv + phi * ten + s + chocs[:, :, h]
+            trajectoires[:, :, h] = y
+            ancien = niv
+            niv = a * (y - s) + (1 - a) * (ancien + phi * ten)
+            ten = b * (niv - ancien) + (1 - b) * phi * ten
+            sai[:, :, (T + h) % saison] = g * (y - niv) + (1 - g) * s
+        queue = (1 - niveau_confiance) / 2
+        basse = np.quantile(trajectoires, queue, axis=1)
+        haute = np.quantile(trajectoires, 1 - queue, axis=1)
+    else:
+        raise ValueError(f"Intervalle inconnu : {intervalle!r} (analytique ou bootstrap)")
+
+    def retour(x):
+        return np.clip(np.expm1(x), 0, None)
+
+    return {'prediction': retour(centrale), 'borne_basse': retour(basse), 'borne_haute': retour(haute)}
+
+
+def _mettre_en_forme(resultat: dict, derniere_date: pd.Timestamp, horizon: int, ligne: int,
+                     decimales: int = 0) -> pd.DataFrame:
+    prediction_future = pd.DataFrame({
+        'date': pd.date_range(derniere_date + pd.Timedelta(days=1), periods=horizon, freq='D'),
+        'prediction': resultat['prediction'][ligne],
+        'borne_basse': resultat['borne_basse'][ligne],
+        'borne_haute': resultat['borne_haute'][ligne],
+    })
+    for col in ['prediction', 'borne_basse', 'borne_haute']:
+        prediction_future[col] = prediction_future[col].round(decimales)
+    return prediction_future
+
+
+def prevoir(df: pd.DataFrame, jours_prediction: int = 7, colonne: str = 'cas_mm7',
+            decimales: int = 0, **options) -> pd.DataFrame:
+    """
+    Prévision d'une série (colonnes 'jour' et colonne) — même format que
+    la prédiction future de entrainer_et_predire : date, prediction, borne_basse, borne_haute
+    (arrondis à decimales : 2 pour un taux)
+    """
+    serie = (df[['jour', colonne]].dropna().set_index('jour')[colonne]
+             .sort_index().asfreq('D').ffill())
+    resultat = prevoir_lot(serie.to_numpy()[None, :], jours_prediction, **options)
+    return _mettre_en_forme(resultat, serie.index.max(), jours_prediction, 0, decimales)
+
+
+def prevoir_departements(tests_dep: pd.DataFrame, jours_prediction: int = 7,
+                         colonne: str = 'cas_mm7_dep', decimales: int = 0, **options) -> pd.DataFrame:
+    """
+    Prévision de tous les départements en un lot, sur une grille (dep × jour) commune
+    Retourne le format long : dep, date, prediction, borne_basse, borne_haute
+    """
+    from indicators import construire_grille, vers_matrice
+
+    tests_dep = tests_dep.dropna(subset=[colonne])
+    deps, jours, i, j = construire_grille(tests_dep)
+    matrice = vers_matrice(tests_dep[colonne].to_numpy(dtype=float), i, j, (len(deps), len(jours)))
+    # Jours absents : dernière valeur connue (0 avant le premier jour renseigné)
+    matrice = pd.DataFrame(matrice).T.ffill().fillna(0).T.to_numpy()
+
+    resultat = prevoir_lot(matrice, jours_prediction, **options)
+    return pd.concat([
+        _mettre_en_forme(resultat, jours[-1], jours_prediction, ligne, decimales).assign(dep=dep)
+        for ligne, dep in enumerate(deps)
+    ], ignore_index=True)[['dep', 'date', 'prediction', 'borne_basse', 'borne_haute']]
@@ -0,0 +1,155 @@
+#  EpiSight — Registre des modèles Prophet entraînés
+#  models/<empreinte>.json : modèle sérialisé — models/<empreinte>.meta.json : métadonnées
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def empreinte(df_prophet: pd.DataFrame, parametres: dict) -> str:
+    """
+    Hash SHA-256 des données préparées (ds, y) et des hyperparamètres :
+    deux entraînements de même empreinte produisent le même modèle
+    """
+    h = hashlib.sha256()
+    h.update(df_prophet['ds'].to_numpy(dtype='datetime64[ns]').astype(np.int64).tobytes())
+    h.update(df_prophet['y'].to_numpy(dtype=float).tobytes())
+    h.update(json.dumps(parametres, sort_keys=True).encode())
+    return h.hexdigest()[:32]
+
+
+def parametres_warm_start(modele) -> dict:
+    """
+    Paramètres ajustés d'un modèle, réutilisés comme point initial
+    de l'optimisation (cf. documentation Prophet, « Updating fitted models »)
+    """
+    return {
+        'k': modele.params['k'][0][0],
+        'm': modele.params['m'][0][0],
+        'sigma_obs': modele.params['sigma_obs'][0][0],
+        'delta': modele.params['delta'][0],
+        'beta': modele.params['beta'][0],
+    }
+
+
+def _ecrire_atomique(chemin: Path, contenu: str) -> None:
+    # Écriture puis renommage : un lecteur concurrent ne voit jamais un fichier partiel
+    temporaire = chemin.with_name(f".{chemin.name}.{os.getpid()}.tmp")
+    temporaire.write_text(contenu)
+    os.replace(temporaire, chemin)
+
+
+class RegistreModeles:
+    """
+    Cache disque des modèles Prophet entraînés
+
+    - même empreinte (données + hyperparamètres) → modèle réutilisé tel quel
+    - nouvelles données sur une série connue    → réentraînement à chaud depuis
+                                                  les paramètres du dernier modèle
+    - éviction : entrées non utilisées depuis age_max_jours, puis les moins
+                 récemment utilisées tant que le dossier dépasse taille_max_mo
+    """
+
+    def __init__(self, dossier: Path, taille_max_mo: float = 200, age_max_jours: float = 30):
+        self.dossier = Path(dossier)
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        self.taille_max = taille_max_mo * 1024 * 1024
+        self.age_max = age_max_jours * 86_400
+
+    def _chemins(self, cle: str) -> tuple:
+        return self.dossier / f"{cle}.json", self.dossier / f"{cle}.meta.json"
+
+    def charger(self, cle: str):
+        """Modèle stocké sous cette empreinte, None si absent"""
+        from prophet.serialize import model_from_json
+
+        chemin_modele, chemin_meta = self._chemins(cle)
+        if not (chemin_modele.exists() and chemin_meta.exists()):
+            return None
+        os.utime(chemin_meta)  # date de dernier accès (éviction LRU)
+        return model_from_json(chemin_modele.read_text())
+
+    def sauvegarder(self, modele, cle: str, serie: str, df_prophet: pd.DataFrame,
+                    parametres: dict) -> None:
+        from prophet.serialize import model_to_json
+
+        chemin_modele, chemin_meta = self._chemins(cle)
+        _ecrire_atomique(chemin_modele, model_to_json(modele))
+        _ecrire_atomique(chemin_meta, json.dumps({
+            'serie': serie,
+            'parametres': parametres,
+            'ds_max': df_prophet['ds'].max().strftime('%Y-%m-%d'),
+            'nb_jours': len(df_prophet),
+            'cree': time.time(),
+        }))
+        self.evincer()
+
+    def dernier_modele(self, serie: str, parametres: dict):
+        """Modèle le plus récent de la série avec les mêmes hyperparamètres (warm start)"""
+        candidats = []
+        for chemin_meta in self.dossier.glob("*.meta.json"):
+            try:
+                meta = json.loads(chemin_meta.read_text())
+            except (OSError, ValueError):
+                continue
+            if meta['serie'] == serie and meta['parametres'] == parametres:
+                candidats.append((meta['cree'], chemin_meta.name[:-len(".meta.json")]))
+        if not candidats:
+            return None
+        return self.charger(max(candidats)[1])
+
+    def entrainer(self, df_prophet: pd.DataFrame, serie: str, parametres: dict) -> tuple:
+        """
+        Retourne (modele, statut) avec statut :
+        - 'cache'  : modèle identique déjà entraîné
+        - 'chaud'  : réentraîné depuis les paramètres du modèle précédent de la série
+        - 'froid'  : premier entraînement de la série
+        """
+        from prophet import Prophet
+
+        cle = empreinte(df_prophet, parametres)
+        modele = self.charger(cle)
+        if modele is not None:
+            return modele, 'cache'
+
+        precedent = self.dernier_modele(serie, parametres)
+        modele = Prophet(**parametres)
+        if precedent is not None:
+            modele.fit(df_prophet, init=parametres_warm_start(precedent))
+            statut = 'chaud'
+        else:
+            modele.fit(df_prophet)
+            statut = 'froid'
+        self.sauvegarder(modele, cle, serie, df_prophet, parametres)
+        return modele, statut
+
+    def evincer(self) -> int:
+        """Supprime les entrées périmées puis les moins utilisées — retourne le nombre supprimé"""
+        maintenant = time.time()
+        entrees = []
+        for chemin_meta in self.dossier.glob("*.meta.json"):
+            cle = chemin_meta.name[:-len(".meta.json")]
+            chemin_modele = self._chemins(cle)[0]
+            try:
+                acces = chemin_meta.stat().st_mtime
+                taille = chemin_meta.stat().st_size + chemin_modele.stat().st_size
+            except FileNotFoundError:
+                continue
+            entrees.append((acces, taille, cle))
+
+        entrees.sort()  # du moins récemment utilisé au plus récent
+        total = sum(taille for _, taille, _ in entrees)
+        supprimees = 0
+        for acces, taille, cle in entrees:
+            if maintenant - acces <= self.age_max and total <= self.taille_max:
+                break
+            for chemin in self._chemins(cle):
+                chemin.unlink(missing_ok=True)
+            total -= taille
+            supprimees += 1
+        return supprimees
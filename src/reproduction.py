@@ -0,0 +1,252 @@
+#  EpiSight — Nombre de reproduction effectif (Rt)
+#  Méthode de Cori (équation de renouvellement, a posteriori Gamma) calculée
+#  en une passe pour tous les départements + la France : convolution par lots
+#  sur la matrice (série × jour), intervalles de crédibilité, mode incrémental
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import construire_grille, vers_matrice
+
+# Intervalle sériel : loi Gamma discrétisée (valeurs usuelles Covid-19), tronquée
+SI_MOYENNE = 5.2                # jours
+SI_ECART_TYPE = 2.8             # jours
+LONGUEUR_SI = 21                # jours
+FENETRE_RT = 7                  # jours lissés par estimation (Cori : τ)
+
+# A priori Gamma sur Rt (valeurs par défaut de Cori et al. : moyenne 5, écart-type 5)
+PRIOR_MOYENNE = 5.0
+PRIOR_ECART_TYPE = 5.0
+NIVEAU_CREDIBILITE = 0.95
+
+# Jours d'historique nécessaires à une estimation : fenêtre + intervalle sériel complet
+AMORCE = LONGUEUR_SI + FENETRE_RT - 1
+NATIONAL = "France"
+COLONNES = ['dep', 'jour', 'rt', 'rt_bas', 'rt_haut']
+
+
+def intervalle_seriel(moyenne: float = SI_MOYENNE, ecart_type: float = SI_ECART_TYPE,
+                      longueur: int = LONGUEUR_SI) -> np.ndarray:
+    """
+    w[s], s = 0..longueur : probabilité qu'un cas secondaire apparaisse s jours
+    après son cas source (masse de la Gamma sur [s - 0,5 ; s + 0,5], w[0] = 0, somme 1)
+    """
+    from scipy.special import gammainc
+
+    forme, echelle = (moyenne / ecart_type) ** 2, ecart_type ** 2 / moyenne
+    bornes = np.clip(np.arange(longueur + 2) - 0.5, 0, None)
+    poids = np.diff(gammainc(forme, bornes / echelle))
+    poids[0] = 0.0
+    return poids / poids.sum()
+
+
+def _fenetres(matrice: np.ndarray, largeur: int) -> np.ndarray:
+    """Vues (série, jour, largeur) : les `largeur` derniers jours jusqu'à t inclus, zéros avant"""
+    bordee = np.pad(matrice, ((0, 0), (largeur - 1, 0)))
+    return sliding_window_view(bordee, largeur, axis=1)
+
+
+def estimer_rt(cas: np.ndarray, premier_jour: np.ndarray, poids: np.ndarray = None) -> tuple:
+    """
+    Rt de Cori sur une matrice (série × jour) de cas quotidiens (NaN = jour absent)
+
+    - infectiosité Λ_t = Σ_s w_s · I_(t-s) : une convolution par lots
+      (fenêtres glissantes × poids, toutes séries et tous jours à la fois)
+    - a posteriori sur la fenêtre [t - τ + 1, t] :
+      Gamma(a + Σ I, 1 / (1/b + Σ Λ)) → moyenne et intervalle de crédibilité
+    - premier_jour : colonne du premier jour de chaque série ; Rt vaut NaN
+      tant que l'historique ne couvre pas AMORCE jours, ou si Σ Λ = 0
+
+    Chaque Rt ne dépend que des AMORCE jours qui le précèdent : le calcul
+    d'une fin d'historique (mode incrémental) donne exactement les mêmes valeurs.
+    Retourne (rt, bas, haut).
+    """
+    from scipy.special import gammaincinv
+
+    poids = intervalle_seriel() if poids is None else poids
+    cas = np.where(np.isnan(cas), 0.0, cas)
+    infectiosite = _fenetres(cas, len(poids)) @ poids[::-1]
+    somme_cas = _fenetres(cas, FENETRE_RT).sum(axis=2)
+    somme_infectiosite = _fenetres(infectiosite, FENETRE_RT).sum(axis=2)
+
+    prior_forme = (PRIOR_MOYENNE / PRIOR_ECART_TYPE) ** 2
+    prior_echelle = PRIOR_ECART_TYPE ** 2 / PRIOR_MOYENNE
+    forme = prior_forme + somme_cas
+    echelle = 1 / (1 / prior_echelle + somme_infectiosite)
+
+    valide = ((np.arange(cas.shape[1])[None, :] - premier_jour[:, None] >= AMORCE)
+              & (somme_infectiosite > 0))
+    alpha = (1 - NIVEAU_CREDIBILITE) / 2
+    rt = np.where(valide, forme * echelle, np.nan)
+    bas = np.where(valide, gammaincinv(forme, alpha) * echelle, np.nan)
+    haut = np.where(valide, gammaincinv(forme, 1 - alpha) * echelle, np.nan)
+    return rt, bas, haut
+
+
+def calculer_rt(cas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rt de toutes les séries d'une table longue (dep, jour, cas_positifs),
+    une ligne de résultat par ligne d'entrée (dep, jour, rt, rt_bas, rt_haut)
+    """
+    if cas.empty:
+        return pd.DataFrame(columns=COLONNES)
+    cas = cas.reset_index(drop=True)
+    deps, jours, i, j = construire_grille(cas)
+    matrice = vers_matrice(cas['cas_positifs'].to_numpy(dtype=float), i, j, (len(deps), len(jours)))
+    premier_jour = np.full(len(deps), len(jours))
+    np.minimum.at(premier_jour, i, j)
+
+    rt, bas, haut = estimer_rt(matrice, premier_jour)
+    return pd.DataFrame({'dep': cas['dep'], 'jour': cas['jour'],
+                         'rt': rt[i, j].round(3), 'rt_bas': bas[i, j].round(3),
+                         'rt_haut': haut[i, j].round(3)})
+
+
+def series_de_cas(tests_dep: pd.DataFrame, tests_nat: pd.DataFrame) -> pd.DataFrame:
+    """Départements + série nationale (dep = NATIONAL) dans une seule table longue"""
+    national = tests_nat[['jour', 'cas_positifs']].assign(dep=NATIONAL)
+    return pd.concat([tests_dep[['dep', 'jour', 'cas_positifs']], national], ignore_index=True)
+
+
+def separer(rt: pd.DataFrame) -> tuple:
+    """(rt_national sans colonne dep, rt_par_dep)"""
+    national = rt['dep'] == NATIONAL
+    return (rt[national].drop(columns='dep').reset_index(drop=True),
+            rt[~national].reset_index(drop=True))
+
+
+def mettre_a_jour_rt(dossier_processed: Path, dernier_jour=None, etiquette: str = None) -> pd.DataFrame:
+    """
+    Tables rt_national et rt_par_dep depuis indicateurs_tests et tests_par_dep :
+    - dernier_jour=None ou tables absentes : tout l'historique
+    - sinon : seuls les jours postérieurs à dernier_jour, calculés sur
+      AMORCE jours d'amorce, sont ajoutés
+    Retourne les lignes calculées.
+    """
+    from stockage import ajouter_lignes, lire_table, sauvegarder_table
+
+    dossier_processed = Path(dossier_processed)
+    complet = dernier_jour is None or not all(
+        (dossier_processed / f"{nom}.csv").exists() for nom in ["rt_national", "rt_par_dep"])
+    debut = None if complet else pd.Timestamp(dernier_jour) - pd.Timedelta(days=AMORCE)
+
+    cas = series_de_cas(
+        lire_table("tests_par_dep", dossier_processed, colonnes=['dep', 'jour', 'cas_positifs'], debut=debut),
+        lire_table("indicateurs_tests", dossier_processed, colonnes=['jour', 'cas_positifs'], debut=debut))
+    rt = calculer_rt(cas)
+    if complet:
+        national, par_dep = separer(rt)
+        sauvegarder_table(national, "rt_national", dossier_processed)
+        sauvegarder_table(par_dep, "rt_par_dep", dossier_processed)
+        return rt
+
+    rt = rt[rt['jour'] > pd.Timestamp(dernier_jour)].reset_index(drop=True)
+    national, par_dep = separer(rt)
+    if not rt.empty:
+        ajouter_lignes(national, "rt_national", dossier_processed, etiquette)
+        ajouter_lignes(par_dep, "rt_par_dep", dossier_processed, etiquette)
+    return rt
+
+
+#  Vérification et benchmark
+def reference_boucles(cas: pd.DataFrame) -> pd.DataFrame:
+    """Même estimation, une série et un jour à la fois (boucles Python)"""
+    from scipy.stats import gamma
+
+    poids = intervalle_seriel()
+    prior_forme = (PRIOR_MOYENNE / PRIOR_ECART_TYPE) ** 2
+    prior_echelle = PRIOR_ECART_TYPE ** 2 / PRIOR_MOYENNE
+    alpha = (1 - NIVEAU_CREDIBILITE) / 2
+    resultats = []
+    for dep, serie in cas.sort_values(['dep', 'jour']).groupby('dep'):
+        serie = serie.set_index('jour')['cas_positifs'].asfreq('D')
+        valeurs = serie.fillna(0).to_numpy()
+        infectiosite = np.array([sum(poids[s] * valeurs[t - s] for s in range(1, len(poids)) if t - s >= 0)
+                                 for t in range(len(valeurs))])
+        for t, jour in enumerate(serie.index):
+            if np.isnan(serie.iloc[t]):
+                continue
+            fenetre = slice(max(0, t - FENETRE_RT + 1), t + 1)
+            forme = prior_forme + valeurs[fenetre].sum()
+            somme_infectiosite = infectiosite[fenetre].sum()
+            if t < AMORCE or somme_infectiosite <= 0:
+                rt = bas = haut = np.nan
+            else:
+                echelle = 1 / (1 / prior_echelle + somme_infectiosite)
+                rt = forme * echelle
+                bas, haut = gamma.ppf([alpha, 1 - alpha], forme, scale=echelle)
+            resultats.append({'dep': dep, 'jour': jour, 'rt': round(rt, 3),
+                              'rt_bas': round(bas, 3), 'rt_haut': round(haut, 3)})
+    return pd.DataFrame(resultats, columns=COLONNES)
+
+
+def verifier_rt(cas: pd.DataFrame, jours_incrementaux: int = 30, repetitions: int = 3) -> pd.DataFrame:
+    """
+    - passe matricielle == boucles par série (à un pas d'arrondi près)
+    - fins d'historique jour par jour (AMORCE jours d'amorce) == calcul complet
+    Lève AssertionError sinon ; retourne les temps.
+    """
+    cas = cas.sort_values(['dep', 'jour']).reset_index(drop=True)
+
+    mesures = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        complet = calculer_rt(cas)
+        mesures.append(time.perf_counter() - debut)
+    duree_matrice = min(mesures)
+
+    debut = time.perf_counter()
+    reference = reference_boucles(cas)
+    duree_boucles = time.perf_counter() - debut
+    for col in ['rt', 'rt_bas', 'rt_haut']:
+        ecart = np.nanmax(np.abs(complet[col].to_numpy() - reference[col].to_numpy()))
+        assert ecart <= 0.001 + 1e-9, f"{col} : écart {ecart} avec les boucles"
+        assert (complet[col].isna() == reference[col].isna()).all(), f"{col} : NaN différents"
+
+    jours = np.sort(cas['jour'].unique())
+    durees = []
+    for precedent, jour in zip(jours[-jours_incrementaux - 1:-1], jours[-jours_incrementaux:]):
+        recents = cas[(cas['jour'] <= jour)
+                      & (cas['jour'] >= pd.Timestamp(precedent) - pd.Timedelta(days=AMORCE))]
+        debut = time.perf_counter()
+        dernier = calculer_rt(recents)
+        dernier = dernier[dernier['jour'] > precedent]
+        durees.append(time.perf_counter() - debut)
+        attendu = complet[complet['jour'] == jour]
+        pd.testing.assert_frame_equal(dernier.reset_index(drop=True), attendu.reset_index(drop=True),
+                                      obj=f"fin d'historique au {pd.Timestamp(jour).date()}")
+
+    series = cas['dep'].nunique()
+    return pd.DataFrame([
+        {"calcul": f"boucles Python ({series} séries)", "temps_s": round(duree_boucles, 3)},
+        {"calcul": f"matrice (série × jour), {series} séries", "temps_s": round(duree_matrice, 4)},
+        {"calcul": "nouveau jour, AMORCE jours relus (médiane)",
+         "temps_s": round(float(np.median(durees)), 4)},
+    ])
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    cas = series_de_cas(lire_table("tests_par_dep", PROCESSED, colonnes=['dep', 'jour', 'cas_positifs']),
+                        lire_table("indicateurs_tests", PROCESSED, colonnes=['jour', 'cas_positifs']))
+
+    print("NOMBRE DE REPRODUCTION Rt (CORI) — VÉRIFICATION")
+    print("=" * 50)
+    resultats = verifier_rt(cas)
+    print(resultats.to_string(index=False))
+    duree = resultats.loc[1, "temps_s"]
+    print(f"\nHistorique complet, toutes séries : {duree:.3f} s "
+          f"({'✅' if duree < 1 else '❌'} objectif < 1 s)")
+
+    rt = mettre_a_jour_rt(PROCESSED)
+    dernier = rt[rt['dep'] == NATIONAL].dropna().iloc[-1]
+    print(f"\nRt France au {dernier['jour']:%d/%m/%Y} : {dernier['rt']:.2f} "
+          f"[{dernier['rt_bas']:.2f} ; {dernier['rt_haut']:.2f}] → rt_national, rt_par_dep")
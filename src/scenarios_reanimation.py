@@ -0,0 +1,276 @@
+#  EpiSight — Scénarios de pression en réanimation
+#  Monte-Carlo vectorisé : prévision des cas (avec sa bande) → admissions → occupation,
+#  des milliers de trajectoires par territoire, probabilité de dépasser la capacité
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CAPACITE_REA_NORMALE = 5_000    # lits de réanimation (France, même valeur que data_loader)
+TRAJECTOIRES = 10_000           # par territoire
+TRAJECTOIRES_DEPARTEMENTS = 500 # par département pour la vue d'ensemble (≈ 50 000 au total)
+DELAI_ADMISSION = 7             # jours entre le test positif et l'admission en réanimation
+DUREE_SEJOUR = 10               # jours en réanimation (moyenne)
+FENETRE_CALIBRATION = 28        # jours de flux observés pour calibrer la fraction admise
+DISPERSION_FRACTION = 0.15      # écart-type du log de la fraction admise, par trajectoire
+CV_DUREE = 0.2                  # coefficient de variation de la durée moyenne de séjour
+QUANTILES = (5, 50, 95)
+Z_BANDE = 1.96                  # borne_basse / borne_haute = intervalle à 95 %
+HISTORIQUE = 60                 # jours d'occupation observée conservés pour l'affichage
+
+
+def capacites_departements(population: pd.Series,
+                           capacite_nationale: float = CAPACITE_REA_NORMALE) -> pd.Series:
+    """
+    Lits par département au prorata de la population : les fichiers SPF ne
+    donnent pas la capacité locale, seulement le total national de référence
+    """
+    return capacite_nationale * population / population.sum()
+
+
+def _trajectoires(occupation: np.ndarray, fraction: np.ndarray, centre: np.ndarray,
+                  ecart_bas: np.ndarray, ecart_haut: np.ndarray, duree_sejour: float,
+                  trajectoires: int, graine, dispersion: float = DISPERSION_FRACTION,
+                  cv_duree: float = CV_DUREE) -> np.ndarray:
+    """
+    Occupation simulée (territoire × trajectoire × jour), toutes les trajectoires
+    de tous les territoires avancées ensemble, un pas de temps à la fois :
+
+    - cas      : centre + z · écart de la bande (z ~ N(0, 1) par trajectoire,
+                 écart bas ou haut selon le signe), nuls au minimum
+    - fraction : fraction admise calibrée × LogNormale(0, dispersion)
+    - séjour   : durée moyenne ~ Gamma(moyenne duree_sejour, CV cv_duree),
+                 sorties quotidiennes ~ Binomiale(occupés, 1 / durée)
+    - admissions ~ Poisson(fraction · cas du jour − DELAI_ADMISSION)
+    """
+    rng = np.random.default_rng(graine)
+    territoires, jours = centre.shape
+    forme = (territoires, trajectoires)
+
+    z = rng.standard_normal(forme)[..., None]
+    cas = centre[:, None, :] + np.where(z < 0, z * ecart_bas[:, None, :], z * ecart_haut[:, None, :])
+    fraction = fraction[:, None] * rng.lognormal(0.0, dispersion, forme) if dispersion else \
+        np.broadcast_to(fraction[:, None], forme)
+    admissions = rng.poisson(fraction[..., None] * np.clip(cas, 0, None))
+
+    if cv_duree:
+        forme_gamma = 1 / cv_duree ** 2
+        duree = rng.gamma(forme_gamma, duree_sejour / forme_gamma, forme)
+    else:
+        duree = np.full(forme, float(duree_sejour))
+    sortie = 1 / np.maximum(duree, 1.0)
+
+    resultat = np.empty(forme + (jours,), dtype=np.int32)
+    occupes = np.broadcast_to(occupation[:, None], forme).astype(np.int64)
+    for t in range(jours):
+        occupes = occupes - rng.binomial(occupes, sortie) + admissions[..., t]
+        resultat[..., t] = occupes
+    return resultat
+
+
+class MoteurScenarios:
+    """
+    Entrées alignées une fois (occupation de départ, flux de calibration, cas
+    sources observés puis prévus), puis simulations à la demande.
+
+    cas        : dep, jour, cas (MM7 observée)
+    rea        : dep, jour, reanimation (patients présents)
+    previsions : dep, date, prediction, borne_basse, borne_haute (predictions.py)
+
+    Simulation du lendemain du dernier jour de réanimation connu jusqu'à
+    DELAI_ADMISSION jours après la dernière prévision : les premières
+    admissions viennent de cas déjà observés, les suivantes de la prévision.
+    """
+
+    def __init__(self, cas: pd.DataFrame, rea: pd.DataFrame, previsions: pd.DataFrame,
+                 delai: int = DELAI_ADMISSION, fenetre: int = FENETRE_CALIBRATION):
+        territoires = np.array(sorted(set(rea['dep']) & set(cas['dep']) & set(previsions['dep'])))
+        filtrer = lambda df: df[df['dep'].isin(territoires)]
+        rea = filtrer(rea).pivot(index='jour', columns='dep', values='reanimation')[territoires]
+        cas = filtrer(cas).pivot(index='jour', columns='dep', values='cas')[territoires]
+        previsions = filtrer(previsions).rename(columns={'date': 'jour'})
+        centre = previsions.pivot(index='jour', columns='dep', values='prediction')[territoires]
+
+        self.territoires = territoires
+        self.delai = delai
+        depart = rea.index.max()
+        self.jours = pd.date_range(depart + pd.Timedelta(days=1),
+                                   centre.index.max() + pd.Timedelta(days=delai), freq='D')
+        self.occupation_initiale = rea.ffill().iloc[-1].to_numpy(dtype=float)
+        self.occupation_recente = rea.iloc[-HISTORIQUE:]
+
+        # Flux des FENETRE_CALIBRATION derniers jours : admissions = Δ occupés + occupés / durée
+        recents = rea.loc[depart - pd.Timedelta(days=fenetre - 1):depart].ffill()
+        self._variation = (recents.iloc[-1] - recents.iloc[0]).to_numpy(dtype=float) / (fenetre - 1)
+        self._occupation_moyenne = recents.mean().to_numpy(dtype=float)
+        sources = cas.reindex(recents.index - pd.Timedelta(days=delai))
+        self._cas_moyens = sources.mean().to_numpy(dtype=float)
+
+        # Cas à l'origine des admissions de chaque jour simulé : observés, sinon prévus
+        # (écarts de la bande nuls sur les jours observés)
+        jours_sources = self.jours - pd.Timedelta(days=delai)
+        observes = cas.reindex(jours_sources)
+        prevus = centre.reindex(jours_sources)
+        self.centre = observes.fillna(prevus).ffill().fillna(0).to_numpy(dtype=float).T
+        colonne_bande = lambda nom: (previsions.pivot(index='jour', columns='dep', values=nom)[territoires]
+                                     .reindex(jours_sources).to_numpy(dtype=float).T)
+        prevu = observes.isna().to_numpy().T & ~np.isnan(prevus.to_numpy(dtype=float).T)
+        self.ecart_bas = np.where(prevu, (self.centre - colonne_bande('borne_basse')) / Z_BANDE, 0.0)
+        self.ecart_haut = np.where(prevu, (colonne_bande('borne_haute') - self.centre) / Z_BANDE, 0.0)
+        self.ecart_bas = np.clip(np.nan_to_num(self.ecart_bas), 0, None)
+        self.ecart_haut = np.clip(np.nan_to_num(self.ecart_haut), 0, None)
+
+    def fraction_admission(self, duree_sejour: float = DUREE_SEJOUR) -> np.ndarray:
+        """Admissions quotidiennes / cas DELAI_ADMISSION jours plus tôt, par territoire"""
+        admissions = np.clip(self._variation + self._occupation_moyenne / duree_sejour, 0, None)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = admissions / self._cas_moyens
+        return np.where(np.isfinite(fraction), fraction, 0.0)
+
+    def simuler(self, multiplicateur: float = 1.0, duree_sejour: float = DUREE_SEJOUR,
+                capacites=CAPACITE_REA_NORMALE, trajectoires: int = TRAJECTOIRES,
+                graine: int = 0, processus: int = 1, quantiles: tuple = QUANTILES,
+                territoires: list = None) -> pd.DataFrame:
+        """
+        Une ligne par (territoire, jour simulé) : capacite, p_depassement
+        (part des trajectoires au-dessus de la capacité) et occupation_qXX
+        pour chaque quantile demandé (quantiles=() pour s'en passer).
+
+        - multiplicateur : facteur sur la fraction admise (variant plus sévère, etc.)
+        - capacites      : scalaire ou un nombre de lits par territoire
+        - processus > 1  : trajectoires réparties sur un pool de processus
+                           (graines indépendantes issues de `graine`)
+        """
+        lignes = (np.arange(len(self.territoires)) if territoires is None
+                  else np.flatnonzero(np.isin(self.territoires, territoires)))
+        capacites = np.broadcast_to(np.asarray(capacites, dtype=float), (len(self.territoires),))[lignes]
+        entrees = (self.occupation_initiale[lignes],
+                   self.fraction_admission(duree_sejour)[lignes] * multiplicateur,
+                   self.centre[lignes], self.ecart_bas[lignes], self.ecart_haut[lignes], duree_sejour)
+
+        if processus > 1:
+            parts = np.diff(np.linspace(0, trajectoires, processus + 1).astype(int))
+            graines = np.random.SeedSequence(graine).spawn(processus)
+            with ProcessPoolExecutor(processus) as pool:
+                morceaux = pool.map(_trajectoires, *zip(*[entrees + (n, g) for n, g in zip(parts, graines)]))
+                occupation = np.concatenate(list(morceaux), axis=1)
+        else:
+            occupation = _trajectoires(*entrees, trajectoires, graine)
+
+        resultat = {
+            'dep': np.repeat(self.territoires[lignes], len(self.jours)),
+            'jour': np.tile(self.jours, len(lignes)),
+            'capacite': np.repeat(capacites, len(self.jours)).round(0),
+            'p_depassement': (occupation > capacites[:, None, None]).mean(axis=1).ravel(),
+        }
+        if quantiles:
+            valeurs = np.percentile(occupation, quantiles, axis=1)
+            for q, valeur in zip(quantiles, valeurs):
+                resultat[f'occupation_q{q:02d}'] = valeur.ravel()
+        return pd.DataFrame(resultat)
+
+
+#  Vérification
+def reference_boucles(occupation: float, fraction: float, cas: np.ndarray,
+                      duree_sejour: float, trajectoires: int, graine: int = 0) -> np.ndarray:
+    """Une trajectoire puis un jour à la fois, tirages scalaires (sans bande ni dispersion)"""
+    rng = np.random.default_rng(graine)
+    resultat = np.empty((trajectoires, len(cas)), dtype=np.int32)
+    for n in range(trajectoires):
+        occupes = int(occupation)
+        for t, c in enumerate(cas):
+            occupes += rng.poisson(fraction * c) - rng.binomial(occupes, 1 / duree_sejour)
+            resultat[n, t] = occupes
+    return resultat
+
+
+def verifier_scenarios(moteur: MoteurScenarios, trajectoires: int = TRAJECTOIRES,
+                       repetitions: int = 3) -> pd.DataFrame:
+    """
+    - moyenne Monte-Carlo == récurrence déterministe E[O_t] = E[O_t-1](1 - 1/D) + f·cas
+      (sans bande ni dispersion, à 4 erreurs-types près)
+    - temps du lot vectorisé vs boucles Python extrapolées, 1 et 2 processus
+    Lève AssertionError si l'écart dépasse la tolérance.
+    """
+    occupation0 = moteur.occupation_initiale[:1]
+    fraction = moteur.fraction_admission()[:1]
+    centre = moteur.centre[:1]
+    simule = _trajectoires(occupation0, fraction, centre, np.zeros_like(centre), np.zeros_like(centre),
+                           DUREE_SEJOUR, trajectoires, 0, dispersion=0.0, cv_duree=0.0)
+    attendu, esperance = [], occupation0[0]
+    for c in centre[0]:
+        esperance = esperance * (1 - 1 / DUREE_SEJOUR) + fraction[0] * c
+        attendu.append(esperance)
+    ecart = np.abs(simule[0].mean(axis=0) - attendu)
+    tolerance = 4 * simule[0].std(axis=0) / np.sqrt(trajectoires) + 1e-9
+    assert (ecart <= tolerance).all(), f"moyenne simulée hors tolérance (max {ecart.max():.1f})"
+
+    echantillon = 200
+    debut = time.perf_counter()
+    reference_boucles(occupation0[0], fraction[0], centre[0], DUREE_SEJOUR, echantillon)
+    duree_boucles = (time.perf_counter() - debut) / echantillon * trajectoires
+
+    mesures = []
+    for processus in (1, 2):
+        moteur.simuler(processus=processus, trajectoires=trajectoires, territoires=moteur.territoires[:1])
+        debut = time.perf_counter()
+        for _ in range(repetitions):
+            moteur.simuler(processus=processus, trajectoires=trajectoires,
+                           territoires=moteur.territoires[:1])
+        mesures.append((time.perf_counter() - debut) / repetitions)
+
+    jours = len(moteur.jours)
+    return pd.DataFrame([
+        {"calcul": f"boucles Python, {trajectoires} trajectoires × {jours} j (extrapolé)",
+         "temps_s": round(duree_boucles, 2)},
+        {"calcul": f"lot NumPy, {trajectoires} trajectoires × {jours} j",
+         "temps_s": round(mesures[0], 3)},
+        {"calcul": f"lot NumPy sur 2 processus, {trajectoires} trajectoires × {jours} j",
+         "temps_s": round(mesures[1], 3)},
+    ])
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    tests_nat = lire_table("indicateurs_tests", PROCESSED)
+    hosp_nat = lire_table("indicateurs_hosp", PROCESSED)
+    previsions = pd.read_csv(PROCESSED / "predictions_7j.csv", parse_dates=['date'])
+    moteur = MoteurScenarios(tests_nat[['jour', 'cas_mm7']].rename(columns={'cas_mm7': 'cas'}).assign(dep="France"),
+                             hosp_nat[['jour', 'reanimation']].assign(dep="France"),
+                             previsions.assign(dep="France"))
+
+    print("SCÉNARIOS RÉANIMATION — VÉRIFICATION")
+    print("=" * 50)
+    print(f"{moteur.jours[0]:%d/%m/%Y} → {moteur.jours[-1]:%d/%m/%Y} ({len(moteur.jours)} jours), "
+          f"occupation initiale {moteur.occupation_initiale[0]:.0f}, "
+          f"fraction admise {moteur.fraction_admission()[0] * 100:.2f} %\n")
+    print(verifier_scenarios(moteur).to_string(index=False))
+
+    for multiplicateur in (1, 3, 10):
+        scenario = moteur.simuler(multiplicateur=multiplicateur)
+        pire = scenario.loc[scenario['p_depassement'].idxmax()]
+        print(f"\nFraction admise ×{multiplicateur} : pic médian {scenario['occupation_q50'].max():.0f} lits, "
+              f"P(dépassement de {CAPACITE_REA_NORMALE} lits) max {pire['p_depassement'] * 100:.1f} % "
+              f"le {pire['jour']:%d/%m/%Y}")
+
+    chemin_dep = PROCESSED / "predictions_dep_7j.csv"
+    if chemin_dep.exists():
+        tests_dep = lire_table("tests_par_dep", PROCESSED, colonnes=['dep', 'jour', 'cas_mm7_dep', 'population'])
+        moteur_dep = MoteurScenarios(
+            tests_dep.rename(columns={'cas_mm7_dep': 'cas'}),
+            lire_table("hospitalisations_clean", PROCESSED, colonnes=['dep', 'jour', 'reanimation']),
+            pd.read_csv(chemin_dep, parse_dates=['date'], dtype={'dep': str}))
+        population = tests_dep.groupby('dep')['population'].first()
+        debut = time.perf_counter()
+        scenario = moteur_dep.simuler(capacites=capacites_departements(population)[moteur_dep.territoires],
+                                      trajectoires=1_000, quantiles=())
+        print(f"\n{len(moteur_dep.territoires)} départements × 1 000 trajectoires : "
+              f"{time.perf_counter() - debut:.2f} s")
+        print(scenario.groupby('dep')['p_depassement'].max().nlargest(10).to_string())
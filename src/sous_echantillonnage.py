@@ -0,0 +1,209 @@
+#  EpiSight — Sous-échantillonnage des séries affichées
+#  Réduit le nombre de points envoyés au navigateur (LTTB ou enveloppe min/max)
+#  en conservant exactement les pics de vague et les franchissements de seuil
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# Largeurs de tracé usuelles du dashboard (layout="wide")
+LARGEUR_PLEINE = 1200
+LARGEUR_COLONNE = 600
+
+# Au-delà d'un point tous les deux pixels, les segments ne se distinguent plus
+PIXELS_PAR_POINT = 2
+
+# Taille de seau LTTB au-delà de laquelle la sélection passe par NumPy
+SEAU_PYTHON_MAX = 64
+
+
+def budget_points(largeur_px: int = LARGEUR_PLEINE) -> int:
+    return max(3, largeur_px // PIXELS_PAR_POINT)
+
+
+def _en_reels(x) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, n_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets (Steinarsson, 2013) : dans chaque seau,
+    le point formant le plus grand triangle avec le point retenu précédent
+    et la moyenne du seau suivant. Retourne les indices retenus (triés).
+
+    Les moyennes de seaux sont calculées en une passe (sommes cumulées) ;
+    seule la sélection, qui dépend du point précédent, itère sur les seaux —
+    en Python pur pour les petits seaux (séries quotidiennes), où un appel
+    NumPy par seau coûterait plus que le calcul lui-même.
+    """
+    n = len(y)
+    if n_points >= n or n_points < 3:
+        return np.arange(n)
+
+    xf, yf = _en_reels(x), np.nan_to_num(np.asarray(y, dtype=float))
+    bords = np.linspace(1, n - 1, n_points - 1).astype(int)     # n_points - 2 seaux
+    cumul_x = np.concatenate([[0.0], np.cumsum(xf)])
+    cumul_y = np.concatenate([[0.0], np.cumsum(yf)])
+    tailles = np.diff(bords)
+    moy_x = np.append((cumul_x[bords[1:]] - cumul_x[bords[:-1]]) / tailles, xf[-1]).tolist()
+    moy_y = np.append((cumul_y[bords[1:]] - cumul_y[bords[:-1]]) / tailles, yf[-1]).tolist()
+    X, Y, B = xf.tolist(), yf.tolist(), bords.tolist()
+
+    indices = np.empty(n_points, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for k in range(n_points - 2):
+        d, f = B[k], B[k + 1]
+        ax, ay = X[a], Y[a]
+        dx, dy = ax - moy_x[k + 1], moy_y[k + 1] - ay
+        if f - d <= SEAU_PYTHON_MAX:
+            a = max(range(d, f), key=lambda i: abs(dx * (Y[i] - ay) - (ax - X[i]) * dy))
+        else:
+            a = d + int(np.argmax(np.abs(dx * (yf[d:f] - ay) - (ax - xf[d:f]) * dy)))
+        indices[k + 1] = a
+    return indices
+
+
+def enveloppe_min_max(y, n_points: int) -> np.ndarray:
+    """
+    Décimation min/max : minimum et maximum de chaque seau, entièrement
+    vectorisée (seaux de taille égale, complétés par ±inf). Les extrêmes
+    locaux — donc les pics — sont conservés par construction.
+    """
+    n = len(y)
+    if n_points >= n or n_points < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    n_seaux = n_points // 2
+    taille = -(-n // n_seaux)
+    complement = n_seaux * taille - n
+    hauts = np.pad(np.where(np.isnan(y), -np.inf, y), (0, complement), constant_values=-np.inf)
+    bas = np.pad(np.where(np.isnan(y), np.inf, y), (0, complement), constant_values=np.inf)
+    debuts = np.arange(n_seaux) * taille
+    maximums = debuts + hauts.reshape(n_seaux, taille).argmax(axis=1)
+    minimums = debuts + bas.reshape(n_seaux, taille).argmin(axis=1)
+    indices = np.concatenate([[0, n - 1], maximums, minimums])
+    return np.unique(indices[indices < n])
+
+
+def indices_franchissements(y, seuils) -> np.ndarray:
+    """Les deux points encadrant chaque passage de la série au-dessus/au-dessous d'un seuil"""
+    y = np.asarray(y, dtype=float)
+    resultats = [np.zeros(0, dtype=int)]
+    for seuil in seuils:
+        dessus = y >= seuil
+        changements = np.flatnonzero(dessus[1:] != dessus[:-1])
+        resultats += [changements, changements + 1]
+    return np.concatenate(resultats)
+
+
+def indices_pics(x, y, intervalles=()) -> np.ndarray:
+    """Maximum global et maximum de chaque intervalle (debut, fin), ex. les vagues détectées"""
+    y = np.asarray(y, dtype=float)
+    if len(y) == 0 or np.isnan(y).all():
+        return np.zeros(0, dtype=int)
+    x = np.asarray(x)
+    pics = [int(np.nanargmax(y))]
+    for debut, fin in intervalles:
+        i = np.searchsorted(x, np.asarray(debut, dtype=x.dtype), 'left')
+        j = np.searchsorted(x, np.asarray(fin, dtype=x.dtype), 'right')
+        if j > i and not np.isnan(y[i:j]).all():
+            pics.append(i + int(np.nanargmax(y[i:j])))
+    return np.asarray(pics, dtype=int)
+
+
+def sous_echantillonner(x, y, largeur_px: int = LARGEUR_PLEINE, methode: str = 'lttb',
+                        seuils=(), intervalles=()) -> np.ndarray:
+    """
+    Indices des points à tracer pour une série triée par x
+
+    - le budget de points suit la largeur du tracé ; une période courte
+      (moins de points que le budget) est renvoyée telle quelle
+    - methode    : 'lttb' (courbes lissées) ou 'min_max' (données brutes bruitées)
+    - seuils     : valeurs dont chaque franchissement est conservé exactement
+    - intervalles: (debut, fin) dont le maximum est conservé (pics de vague)
+    """
+    n_points = budget_points(largeur_px)
+    if len(y) <= n_points:
+        return np.arange(len(y))
+    if methode == 'lttb':
+        indices = lttb(x, y, n_points)
+    elif methode == 'min_max':
+        indices = enveloppe_min_max(y, n_points)
+    else:
+        raise ValueError(f"Méthode inconnue : {methode!r} (lttb ou min_max)")
+    return np.unique(np.concatenate([
+        indices, indices_franchissements(y, seuils), indices_pics(x, y, intervalles)]))
+
+
+def decimer(df: pd.DataFrame, colonne: str, x: str = 'jour', **options) -> pd.DataFrame:
+    """Lignes de df à tracer pour la colonne (cf. sous_echantillonner)"""
+    indices = sous_echantillonner(df[x].to_numpy(), df[colonne].to_numpy(dtype=float), **options)
+    return df.iloc[indices]
+
+
+def mesurer_figure(fig) -> dict:
+    """Taille du JSON transmis au navigateur et temps de sérialisation côté serveur"""
+    debut = time.perf_counter()
+    contenu = fig.to_json()
+    duree = time.perf_counter() - debut
+    points = sum(len(trace.x) for trace in fig.data if trace.x is not None)
+    return {'points': points, 'octets': len(contenu.encode()), 'serialisation_ms': round(duree * 1000, 2)}
+
+
+def comparer(df: pd.DataFrame, colonnes: list, largeur_px: int = LARGEUR_PLEINE,
+             seuils: dict = None, methodes: dict = None, intervalles=()) -> pd.DataFrame:
+    """
+    Figure complète vs figure sous-échantillonnée : points, octets, temps
+    de sérialisation et de décimation — et vérification que pics et
+    franchissements de seuil sont présents à l'identique
+    """
+    import plotly.graph_objects as go
+
+    seuils, methodes = seuils or {}, methodes or {}
+    complete, reduite = go.Figure(), go.Figure()
+    duree_decimation = 0.0
+    for col in colonnes:
+        complete.add_trace(go.Scatter(x=df['jour'], y=df[col], mode='lines'))
+        debut = time.perf_counter()
+        tranche = decimer(df, col, largeur_px=largeur_px, methode=methodes.get(col, 'lttb'),
+                          seuils=seuils.get(col, ()), intervalles=intervalles)
+        duree_decimation += (time.perf_counter() - debut) * 1000
+        reduite.add_trace(go.Scatter(x=tranche['jour'], y=tranche[col], mode='lines'))
+
+        y = df[col].to_numpy(dtype=float)
+        conserves = set(tranche.index)
+        for i in np.concatenate([indices_pics(df['jour'].to_numpy(), y, intervalles),
+                                 indices_franchissements(y, seuils.get(col, ()))]):
+            assert df.index[i] in conserves, f"{col} : point {i} (pic/seuil) perdu"
+
+    return pd.DataFrame([
+        {'figure': 'complète', **mesurer_figure(complete), 'decimation_ms': 0.0},
+        {'figure': 'sous-échantillonnée', **mesurer_figure(reduite),
+         'decimation_ms': round(duree_decimation, 2)},
+    ])
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    tests_nat = lire_table("indicateurs_tests", PROCESSED).sort_values('jour').reset_index(drop=True)
+    vagues = lire_table("vagues_detectees", PROCESSED)
+    intervalles = list(zip(vagues['debut'].to_numpy(), vagues['fin'].to_numpy()))
+
+    print("SOUS-ÉCHANTILLONNAGE — CHARGE TRANSMISE AU NAVIGATEUR")
+    print("=" * 50)
+    for largeur in (LARGEUR_PLEINE, LARGEUR_COLONNE):
+        print(f"\nÉvolution nationale (cas bruts + MM7 + positivité), {largeur} px")
+        print(comparer(tests_nat, ['cas_positifs', 'cas_mm7', 'tp_mm7'], largeur,
+                       seuils={'tp_mm7': (5,)}, methodes={'cas_positifs': 'min_max'},
+                       intervalles=intervalles).to_string(index=False))
@@ -0,0 +1,405 @@
+#  EpiSight — Stockage colonnaire des données traitées
+#  Format : Parquet (pyarrow) — typé, tables départementales partitionnées par dep
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+SOUS_DOSSIER_PARQUET = "parquet"
+
+# Description des tables de data/processed :
+# - dates     : colonnes converties en datetime (évite l'inférence au chargement)
+# - partition : colonne de partitionnement Hive (dep=XX/) pour les tables départementales
+TABLES = {
+    "indicateurs_tests":      {"dates": ["jour"]},
+    "indicateurs_hosp":       {"dates": ["jour"]},
+    "indicateurs_vacc":       {"dates": ["jour"]},
+    "vagues_detectees":       {"dates": ["debut", "fin"]},
+    "vagues_departements":    {"dates": ["debut", "fin", "pic"]},
+    "alertes_departements":   {"dates": ["jour"]},
+    "rt_national":            {"dates": ["jour"]},
+    "rt_par_dep":             {"dates": ["jour"], "partition": "dep"},
+    "decalages":              {"dates": ["debut", "fin"]},
+    "cube_jour":              {"dates": ["jour"]},
+    "cube_semaine":           {"dates": ["jour"]},
+    "territoires":            {"dates": []},
+    "tests_national":            {"dates": ["jour"]},
+    "hospitalisations_national": {"dates": ["jour"]},
+    "tests_par_dep":          {"dates": ["jour"], "partition": "dep"},
+    "hospitalisations_clean": {"dates": ["jour"], "partition": "dep"},
+    "vaccination_clean":      {"dates": ["jour"], "partition": "dep"},
+}
+
+
+def chemin_parquet(nom: str, dossier_processed: Path) -> Path:
+    """
+    Fichier .parquet pour une table nationale,
+    dossier partitionné (dep=XX/) pour une table départementale
+    """
+    racine = Path(dossier_processed) / SOUS_DOSSIER_PARQUET
+    if TABLES[nom].get("partition"):
+        return racine / nom
+    return racine / f"{nom}.parquet"
+
+
+def typer_table(df: pd.DataFrame, nom: str) -> pd.DataFrame:
+    """
+    Applique le schéma de la table : dates en datetime64,
+    code département en chaîne sur 2 caractères minimum ('01', '2A', '971')
+    """
+    df = df.copy()
+    for col in TABLES[nom]["dates"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    if "dep" in df.columns:
+        df["dep"] = df["dep"].astype(str).str.zfill(2)
+    return df
+
+
+def _partitionnement():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    # Schéma explicite : sans lui, pyarrow lirait '01' comme l'entier 1
+    return ds.partitioning(pa.schema([("dep", pa.string())]), flavor="hive")
+
+
+def ecrire_parquet(df: pd.DataFrame, nom: str, dossier_processed: Path) -> Path:
+    """
+    Écrit une table au format Parquet (remplace la version précédente).
+    Les tables départementales sont triées par (dep, jour) et partitionnées par dep.
+    """
+    import shutil
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    df = typer_table(df, nom)
+    chemin = chemin_parquet(nom, dossier_processed)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+
+    if TABLES[nom].get("partition"):
+        df = df.sort_values(["dep", "jour"]).reset_index(drop=True)
+        if chemin.exists():
+            shutil.rmtree(chemin)
+        ds.write_dataset(
+            pa.Table.from_pandas(df, preserve_index=False),
+            chemin,
+            format="parquet",
+            partitioning=_partitionnement(),
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    else:
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), chemin)
+    return chemin
+
+
+def sauvegarder_table(df: pd.DataFrame, nom: str, dossier_processed: Path) -> None:
+    """
+    Sauvegarde une table dans les deux formats :
+    CSV (format de référence versionné) et Parquet (chargement rapide du dashboard)
+    """
+    dossier_processed = Path(dossier_processed)
+    df.to_csv(dossier_processed / f"{nom}.csv", index=False)
+    ecrire_parquet(df, nom, dossier_processed)
+
+
+def ajouter_lignes(df: pd.DataFrame, nom: str, dossier_processed: Path,
+                   etiquette: str) -> None:
+    """
+    Ajoute des lignes en fin de table sans réécrire l'existant :
+    - CSV     : écriture en mode 'a', colonnes dans l'ordre du fichier
+    - Parquet : nouveau fragment part-<etiquette>-N.parquet par partition
+                (tables départementales), réécriture pour les petites tables nationales
+
+    'etiquette' identifie le lot ajouté (ex : date du premier jour ajouté).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    dossier_processed = Path(dossier_processed)
+    chemin_csv = dossier_processed / f"{nom}.csv"
+    if not chemin_csv.exists():
+        sauvegarder_table(df, nom, dossier_processed)
+        return
+
+    colonnes = pd.read_csv(chemin_csv, nrows=0).columns
+    df = typer_table(df[colonnes], nom)
+    df.to_csv(chemin_csv, mode="a", header=False, index=False)
+
+    chemin = chemin_parquet(nom, dossier_processed)
+    if not chemin.exists():
+        return  # pas de Parquet : le dashboard lit le CSV
+    if TABLES[nom].get("partition"):
+        ds.write_dataset(
+            pa.Table.from_pandas(df.sort_values(["dep", "jour"]), preserve_index=False),
+            chemin,
+            format="parquet",
+            partitioning=_partitionnement(),
+            basename_template=f"part-{etiquette}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    else:
+        existant = pq.read_table(chemin)
+        nouveau = pa.Table.from_pandas(df, schema=existant.schema, preserve_index=False)
+        pq.write_table(pa.concat_tables([existant, nouveau]), chemin)
+
+
+def convertir_csv_en_parquet(dossier_processed: Path) -> list:
+    """
+    Convertit les CSV existants de data/processed en Parquet
+    Retourne la liste des tables converties
+    """
+    dossier_processed = Path(dossier_processed)
+    converties = []
+    for nom in TABLES:
+        chemin_csv = dossier_processed / f"{nom}.csv"
+        if not chemin_csv.exists():
+            print(f"   {nom:<25} : CSV absent, ignoré")
+            continue
+        df = pd.read_csv(chemin_csv, dtype={"dep": str})
+        ecrire_parquet(df, nom, dossier_processed)
+        converties.append(nom)
+        print(f"   {nom:<25} : {len(df):>7,} lignes → Parquet")
+    return converties
+
+
+def _filtre_arrow(deps, debut, fin):
+    import pyarrow.dataset as ds
+
+    expression = None
+    conditions = []
+    if deps is not None:
+        conditions.append(ds.field("dep").isin(list(deps)))
+    if debut is not None:
+        conditions.append(ds.field("jour") >= pd.Timestamp(debut))
+    if fin is not None:
+        conditions.append(ds.field("jour") <= pd.Timestamp(fin))
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def lire_table(nom: str, dossier_processed: Path,
+               colonnes: list = None, deps: list = None,
+               debut=None, fin=None) -> pd.DataFrame:
+    """
+    Charge une table en ne lisant que les colonnes et lignes demandées
+
+    - colonnes   : projection (None = toutes)
+    - deps       : départements à lire (élagage des partitions dep=XX/)
+    - debut, fin : bornes incluses sur la colonne 'jour'
+
+    Lit le Parquet s'il existe, sinon retombe sur le CSV.
+    """
+    dossier_processed = Path(dossier_processed)
+    schema = TABLES[nom]
+    chemin = chemin_parquet(nom, dossier_processed)
+
+    if chemin.exists():
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(
+            chemin, format="parquet",
+            partitioning=_partitionnement() if schema.get("partition") else None,
+        )
+        table = dataset.to_table(columns=colonnes, filter=_filtre_arrow(deps, debut, fin))
+        return table.to_pandas()
+
+    # Repli CSV : mêmes filtres, appliqués après lecture
+    dates = [c for c in schema["dates"] if colonnes is None or c in colonnes]
+    df = pd.read_csv(dossier_processed / f"{nom}.csv", usecols=colonnes,
+                     parse_dates=dates,
+                     dtype={"dep": str})
+    if "dep" in df.columns:
+        df["dep"] = df["dep"].str.zfill(2)
+    masque = pd.Series(True, index=df.index)
+    if deps is not None:
+        masque &= df["dep"].isin(list(deps))
+    if debut is not None:
+        masque &= df["jour"] >= pd.Timestamp(debut)
+    if fin is not None:
+        masque &= df["jour"] <= pd.Timestamp(fin)
+    return df[masque].reset_index(drop=True)
+
+
+def lister_departements(nom: str, dossier_processed: Path) -> list:
+    """
+    Liste triée des départements d'une table partitionnée
+    Avec Parquet, seuls les noms de dossiers dep=XX/ sont lus.
+    """
+    chemin = chemin_parquet(nom, dossier_processed)
+    if chemin.exists():
+        return sorted(p.name.split("=", 1)[1] for p in chemin.glob("dep=*"))
+    deps = pd.read_csv(Path(dossier_processed) / f"{nom}.csv",
+                       usecols=["dep"], dtype={"dep": str})["dep"]
+    return sorted(deps.str.zfill(2).unique().tolist())
+
+
+def version_donnees(dossier_processed: Path) -> str:
+    """
+    Signature des données lues par le dashboard : nom, date de modification
+    et taille des tables de TABLES (CSV et Parquet), des predictions*, du
+    dossier des lots previsions/ et de watermarks.json. Toute écriture du
+    pipeline la change (sauvegarder_table et ajouter_lignes réécrivent ou
+    prolongent le CSV, ecrire_parquet remplace le fichier ou le dossier
+    partitionné, un nouveau lot de prévisions modifie previsions/) ; les
+    autres fichiers de data/processed n'invalident pas les caches.
+    Deux dossiers sont lus, sans descendre plus bas (≈ 0,2 ms) : appelable à chaque exécution.
+    """
+    import hashlib
+    import os
+
+    dossier_processed = Path(dossier_processed)
+    if not dossier_processed.exists():
+        return ""
+
+    def lue_par_le_dashboard(nom: str) -> bool:
+        return (nom.endswith(".csv") and nom[:-len(".csv")] in TABLES
+                or nom.startswith("predictions") or nom in ("previsions", "watermarks.json"))
+
+    entrees = [(e.name, e.stat().st_mtime_ns, e.stat().st_size)
+               for e in os.scandir(dossier_processed) if lue_par_le_dashboard(e.name)]
+    racine_parquet = dossier_processed / SOUS_DOSSIER_PARQUET
+    if racine_parquet.is_dir():
+        entrees += [(f"{SOUS_DOSSIER_PARQUET}/{e.name}", e.stat().st_mtime_ns, e.stat().st_size)
+                    for e in os.scandir(racine_parquet) if e.name.removesuffix(".parquet") in TABLES]
+    return hashlib.sha256(repr(sorted(entrees)).encode()).hexdigest()[:16]
+
+
+#  Benchmark démarrage à froid
+# Chaque mesure tourne dans un processus neuf : imports compris,
+# aucun cache pandas/pyarrow déjà chaud.
+
+_CODE_CSV = """
+import time
+t0 = time.perf_counter()
+import pandas as pd
+from pathlib import Path
+base = Path({dossier!r})
+tests_nat = pd.read_csv(base / "indicateurs_tests.csv", parse_dates=['jour'])
+hosp_nat  = pd.read_csv(base / "indicateurs_hosp.csv",  parse_dates=['jour'])
+vacc_nat  = pd.read_csv(base / "indicateurs_vacc.csv",  parse_dates=['jour'])
+tests_dep = pd.read_csv(base / "tests_par_dep.csv",     parse_dates=['jour'])
+vagues    = pd.read_csv(base / "vagues_detectees.csv",  parse_dates=['debut','fin'])
+tests_dep['dep'] = tests_dep['dep'].astype(str).str.zfill(2)
+print(time.perf_counter() - t0)
+"""
+
+_CODE_PARQUET = """
+import time
+t0 = time.perf_counter()
+import sys
+sys.path.insert(0, {src!r})
+from stockage import lire_table, lister_departements
+base = {dossier!r}
+tests_nat = lire_table("indicateurs_tests", base)
+hosp_nat  = lire_table("indicateurs_hosp",  base)
+vacc_nat  = lire_table("indicateurs_vacc",  base)
+vagues    = lire_table("vagues_detectees",  base)
+deps      = lister_departements("tests_par_dep", base)
+tests_dep = lire_table("tests_par_dep", base, deps=["75"],
+                       colonnes=["dep", "jour", "cas_positifs",
+                                 "taux_incidence", "taux_positivite"])
+print(time.perf_counter() - t0)
+"""
+
+
+def _mesurer(code: str, repetitions: int) -> list:
+    mesures = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, "-c", code],
+                                capture_output=True, text=True, check=True)
+        mesures.append(float(sortie.stdout.strip().splitlines()[-1]))
+    return mesures
+
+
+def benchmark_demarrage_a_froid(dossier_processed: Path, repetitions: int = 5) -> pd.DataFrame:
+    """
+    Compare le chargement initial du dashboard :
+    - 'csv'     : chemin historique (5 × read_csv + inférence des dates)
+    - 'parquet' : lire_table (colonnes projetées, un seul département)
+
+    Retourne un tableau des temps (médiane, min, max) en secondes.
+    """
+    dossier = str(Path(dossier_processed).resolve())
+    src = str(Path(__file__).parent.resolve())
+
+    resultats = {
+        "csv": _mesurer(_CODE_CSV.format(dossier=dossier), repetitions),
+        "parquet": _mesurer(_CODE_PARQUET.format(dossier=dossier, src=src), repetitions),
+    }
+    return pd.DataFrame([
+        {"chemin": chemin,
+         "median_s": round(float(pd.Series(temps).median()), 3),
+         "min_s": round(min(temps), 3),
+         "max_s": round(max(temps), 3)}
+        for chemin, temps in resultats.items()
+    ])
+
+
+def _rss_mo() -> float:
+    """Mémoire résidente actuelle du processus (Linux), en Mo"""
+    import os
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def mesurer_memoire_sessions(dossier_processed: Path, sessions: int = 20) -> pd.DataFrame:
+    """
+    Mémoire ajoutée par chaque session du dashboard, chacune gardant ses données
+    vivantes comme pendant des exécutions concurrentes (les cinq tables complètes,
+    tests_par_dep compris) :
+    - 'copie par session' : st.cache_data (tables désérialisées à chaque appel)
+                            + tranches par masque booléen et .copy()
+    - 'partagé'           : st.cache_resource (même objet pour toutes les sessions)
+                            + tranches par vues, Copy-on-Write pandas
+    """
+    import gc
+    import pickle
+
+    # Les tables complètes que chargeait charger_donnees, tests_par_dep compris
+    noms = ["indicateurs_tests", "indicateurs_hosp", "indicateurs_vacc", "vagues_detectees",
+            "tests_par_dep"]
+    tables = [lire_table(nom, dossier_processed) for nom in noms]
+    serialise = pickle.dumps(tables)
+
+    def copie_par_session():
+        donnees = pickle.loads(serialise)
+        return donnees, [df[df['jour'] >= df['jour'].min()].copy()
+                         for df in donnees if 'jour' in df]
+
+    def partage():
+        return tables, [df.iloc[0:len(df)] for df in tables if 'jour' in df]
+
+    lignes = []
+    for nom, session in [("copie par session", copie_par_session), ("partagé", partage)]:
+        with pd.option_context("mode.copy_on_write", True):
+            gc.collect()
+            avant = _rss_mo()
+            vivantes = [session() for _ in range(sessions)]
+            apres = _rss_mo()
+            del vivantes
+        lignes.append({"chargement": nom, "sessions": sessions,
+                       "mo_par_session": round((apres - avant) / sessions, 3)})
+    return pd.DataFrame(lignes)
+
+
+if __name__ == "__main__":
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+
+    print("CONVERSION CSV → PARQUET")
+    print("=" * 50)
+    convertir_csv_en_parquet(PROCESSED)
+
+    if (PROCESSED / "tests_par_dep.csv").exists():
+        print("\nBENCHMARK DÉMARRAGE À FROID")
+        print("=" * 50)
+        print(benchmark_demarrage_a_froid(PROCESSED).to_string(index=False))
+
+        print("\nMÉMOIRE PAR SESSION DU DASHBOARD")
+        print("=" * 50)
+        print(mesurer_memoire_sessions(PROCESSED).to_string(index=False))
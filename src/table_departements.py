@@ -0,0 +1,122 @@
+#  EpiSight — Représentation compacte des tables départementales
+#  dep en code entier + table de correspondance, jours en décalages int32,
+#  comptages en int32, taux en float32, lignes triées (dep, jour)
+
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class TableDepartements:
+    """
+    Table (dep × jour) en colonnes NumPy compactes, en lecture seule
+
+    - deps    : table de correspondance code → département (triée)
+    - offsets : lignes du département de code c = [offsets[c], offsets[c + 1])
+    - jours   : décalage en jours depuis origine (int32)
+    - colonnes: entiers → int32, décimaux → float32
+
+    Un département est une tranche contiguë : aucune comparaison de chaînes
+    ni copie pour le retrouver (recherche dichotomique dans deps + deux offsets).
+    """
+
+    def __init__(self, deps: np.ndarray, offsets: np.ndarray, origine: np.datetime64,
+                 jours: np.ndarray, colonnes: dict):
+        self.deps = deps
+        self.offsets = offsets
+        self.origine = origine
+        self.jours = jours
+        self.colonnes = colonnes
+        for tableau in [self.offsets, self.jours, *self.colonnes.values()]:
+            tableau.flags.writeable = False
+
+    @classmethod
+    def depuis_dataframe(cls, df: pd.DataFrame) -> "TableDepartements":
+        codes, deps = pd.factorize(df['dep'], sort=True)
+        jours_d = df['jour'].to_numpy().astype('datetime64[D]')
+        origine = jours_d.min()
+        jours = (jours_d - origine).astype(np.int32)
+        ordre = np.lexsort((jours, codes))
+
+        colonnes = {}
+        for col in df.columns.drop(['dep', 'jour']):
+            valeurs = df[col].to_numpy()[ordre]
+            if np.issubdtype(valeurs.dtype, np.integer):
+                assert np.abs(valeurs).max(initial=0) < 2 ** 31, f"{col} dépasse int32"
+                colonnes[col] = valeurs.astype(np.int32)
+            else:
+                colonnes[col] = valeurs.astype(np.float32)
+
+        effectifs = np.bincount(codes, minlength=len(deps))
+        offsets = np.concatenate([[0], np.cumsum(effectifs)]).astype(np.int64)
+        return cls(np.asarray(deps, dtype=str), offsets, origine, jours[ordre], colonnes)
+
+    def __len__(self) -> int:
+        return len(self.jours)
+
+    def bornes(self, dep: str) -> tuple:
+        """Lignes [debut, fin) du département — (0, 0) s'il est inconnu"""
+        code = int(np.searchsorted(self.deps, dep))
+        if code == len(self.deps) or self.deps[code] != dep:
+            return 0, 0
+        return int(self.offsets[code]), int(self.offsets[code + 1])
+
+    def tranche(self, dep: str) -> dict:
+        """Vues (sans copie) sur les colonnes du département, 'jour' en décalages"""
+        debut, fin = self.bornes(dep)
+        return {'jour': self.jours[debut:fin],
+                **{col: valeurs[debut:fin] for col, valeurs in self.colonnes.items()}}
+
+    def departement(self, dep: str) -> pd.DataFrame:
+        """DataFrame du département (dates reconstituées), trié par jour"""
+        tranche = self.tranche(dep)
+        jours = self.origine + tranche.pop('jour').astype('timedelta64[D]')
+        return pd.DataFrame({'dep': dep, 'jour': jours.astype('datetime64[ns]'), **tranche})
+
+    def octets(self) -> int:
+        return (self.deps.nbytes + self.offsets.nbytes + self.jours.nbytes
+                + sum(valeurs.nbytes for valeurs in self.colonnes.values()))
+
+
+def comparer_empreinte(df: pd.DataFrame, repetitions: int = 200) -> pd.DataFrame:
+    """
+    Octets par ligne et latence d'accès à un département :
+    DataFrame pandas (dep en chaînes, int64/float64, filtre par masque)
+    vs TableDepartements (tranche contiguë)
+    """
+    table = TableDepartements.depuis_dataframe(df)
+    deps = table.deps[np.random.default_rng(0).integers(0, len(table.deps), repetitions)]
+
+    def latence(acces) -> float:
+        debut = time.perf_counter()
+        for dep in deps:
+            acces(dep)
+        return (time.perf_counter() - debut) / repetitions * 1000
+
+    return pd.DataFrame([
+        {"representation": "pandas (dep en chaînes)",
+         "octets_par_ligne": round(df.memory_usage(deep=True, index=False).sum() / len(df), 1),
+         "acces_dep_ms": round(latence(lambda dep: df[df['dep'] == dep]), 4)},
+        {"representation": "table compacte (vues)",
+         "octets_par_ligne": round(table.octets() / len(table), 1),
+         "acces_dep_ms": round(latence(table.tranche), 4)},
+        {"representation": "table compacte (DataFrame)",
+         "octets_par_ligne": round(table.octets() / len(table), 1),
+         "acces_dep_ms": round(latence(table.departement), 4)},
+    ])
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    print("EMPREINTE MÉMOIRE — TABLES DÉPARTEMENTALES")
+    print("=" * 50)
+    for nom in ["tests_par_dep", "hospitalisations_clean"]:
+        df = lire_table(nom, PROCESSED)
+        print(f"\n{nom} ({len(df):,} lignes)".replace(",", " "))
+        print(comparer_empreinte(df).to_string(index=False))
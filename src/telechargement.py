@@ -0,0 +1,258 @@
+#  EpiSight — Téléchargement des datasets SPF
+#  Téléchargements simultanés (session HTTP partagée), conditionnels (ETag /
+#  Last-Modified), repris après interruption (Range) et écrits en flux sur disque
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TAILLE_BLOC = 1024 * 1024       # octets écrits sur disque par itération
+DELAI_REQUETE = 60              # secondes (connexion et entre deux blocs reçus)
+
+
+def nouvelle_session(connexions: int = 3) -> requests.Session:
+    """Session à connexions réutilisées, une par téléchargement simultané"""
+    session = requests.Session()
+    adaptateur = HTTPAdapter(pool_connections=connexions, pool_maxsize=connexions)
+    session.mount("http://", adaptateur)
+    session.mount("https://", adaptateur)
+    return session
+
+
+def _lire_json(chemin: Path) -> dict:
+    return json.loads(chemin.read_text()) if chemin.exists() else {}
+
+
+def _validateurs(reponse: requests.Response) -> dict:
+    return {cle: reponse.headers[entete] for cle, entete in
+            [("etag", "ETag"), ("last_modified", "Last-Modified")] if entete in reponse.headers}
+
+
+def telecharger_dataset(url: str, nom_fichier: str, dossier: Path, forcer: bool = False,
+                        session: requests.Session = None) -> tuple:
+    """
+    Télécharge un dataset en flux vers dossier/nom_fichier. Retourne (chemin, modifie).
+
+    - fichier présent et forcer=False : aucun accès réseau
+    - forcer=True : requête conditionnelle (If-None-Match / If-Modified-Since,
+      validateurs du téléchargement précédent dans <fichier>.meta.json) ;
+      304 : le fichier local est conservé
+    - le transfert est écrit dans <fichier>.part ; s'il est interrompu,
+      l'appel suivant le reprend (Range + If-Range) au lieu de repartir de zéro
+    """
+    chemin = Path(dossier) / nom_fichier
+    meta = chemin.with_name(chemin.name + ".meta.json")
+    partiel = chemin.with_name(chemin.name + ".part")
+    meta_partiel = chemin.with_name(chemin.name + ".part.json")
+
+    if chemin.exists() and not forcer:
+        print(f"{nom_fichier} déjà présent, chargement local...")
+        return chemin, False
+
+    entetes = {}
+    if chemin.exists():
+        validateurs = _lire_json(meta)
+        if "etag" in validateurs:
+            entetes["If-None-Match"] = validateurs["etag"]
+        if "last_modified" in validateurs:
+            entetes["If-Modified-Since"] = validateurs["last_modified"]
+    deja_recu = partiel.stat().st_size if partiel.exists() else 0
+    validateurs_partiel = _lire_json(meta_partiel)
+    if deja_recu and validateurs_partiel:
+        entetes["Range"] = f"bytes={deja_recu}-"
+        # Ressource modifiée depuis le début du transfert : le serveur renvoie tout (200)
+        entetes["If-Range"] = validateurs_partiel.get("etag", validateurs_partiel.get("last_modified"))
+
+    session = session or requests
+    debut = time.perf_counter()
+    with session.get(url, headers=entetes, stream=True, timeout=DELAI_REQUETE) as reponse:
+        if reponse.status_code == 304:
+            print(f"{nom_fichier} inchangé (304)")
+            return chemin, False
+        if reponse.status_code == 416:
+            # Partiel incohérent avec la ressource : on repart de zéro
+            partiel.unlink(missing_ok=True)
+            meta_partiel.unlink(missing_ok=True)
+            return telecharger_dataset(url, nom_fichier, dossier, forcer=True, session=session)
+        reponse.raise_for_status()
+
+        reprise = reponse.status_code == 206
+        if not reprise:
+            meta_partiel.write_text(json.dumps(_validateurs(reponse)))
+        with open(partiel, "ab" if reprise else "wb") as fichier:
+            for bloc in reponse.iter_content(chunk_size=TAILLE_BLOC):
+                fichier.write(bloc)
+        validateurs = _validateurs(reponse) if not reprise else validateurs_partiel
+
+    partiel.replace(chemin)
+    meta.write_text(json.dumps(validateurs))
+    meta_partiel.unlink(missing_ok=True)
+    taille = chemin.stat().st_size / (1024 * 1024)
+    detail = f"reprise à {deja_recu / (1024 * 1024):.1f} Mo, " if reprise else ""
+    print(f"{nom_fichier} téléchargé ({detail}{taille:.1f} Mo, {time.perf_counter() - debut:.1f} s)")
+    return chemin, True
+
+
+def telecharger_en_parallele(sources: dict, dossier: Path, forcer: bool = False,
+                             simultanes: int = None):
+    """
+    Télécharge simultanément sources = {nom: (url, fichier)} et génère
+    (nom, chemin, modifie) dans l'ordre où les téléchargements se terminent :
+    le traitement d'un dataset commence pendant que les autres arrivent.
+    """
+    simultanes = simultanes or len(sources)
+    with nouvelle_session(simultanes) as session, ThreadPoolExecutor(simultanes) as executeur:
+        taches = {executeur.submit(telecharger_dataset, url, fichier, dossier, forcer, session): nom
+                  for nom, (url, fichier) in sources.items()}
+        for tache in as_completed(taches):
+            chemin, modifie = tache.result()
+            yield taches[tache], chemin, modifie
+
+
+#  Serveur local de substitution (vérifications hors ligne)
+class _Gestionnaire(BaseHTTPRequestHandler):
+    """
+    Sert les fichiers de `racine` avec ETag / Last-Modified, requêtes
+    conditionnelles et plages (Range / If-Range), à `debit` octets/s par
+    connexion, comme un serveur distant ; `couper` interrompt la prochaine
+    réponse d'un fichier après ce nombre d'octets.
+    """
+    racine: Path = None
+    debit: float = None
+    couper: dict = {}
+    journal: list = []
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        chemin = self.racine / self.path.lstrip("/")
+        if not chemin.is_file():
+            self.send_error(404)
+            return
+        etat = chemin.stat()
+        etag = f'"{etat.st_size:x}-{etat.st_mtime_ns:x}"'
+        modifie = self.date_time_string(int(etat.st_mtime))
+
+        if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers
+                and self.headers.get("If-Modified-Since") == modifie):
+            self.journal.append((chemin.name, 304, 0))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        debut = 0
+        plage = self.headers.get("Range", "")
+        if plage.startswith("bytes=") and self.headers.get("If-Range", etag) in (etag, modifie):
+            debut = int(plage[len("bytes="):].split("-")[0])
+            if debut >= etat.st_size:
+                self.journal.append((chemin.name, 416, 0))
+                self.send_error(416)
+                return
+        statut = 206 if debut else 200
+        self.send_response(statut)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", modifie)
+        self.send_header("Content-Length", str(etat.st_size - debut))
+        if debut:
+            self.send_header("Content-Range", f"bytes {debut}-{etat.st_size - 1}/{etat.st_size}")
+        self.end_headers()
+
+        limite = self.couper.pop(chemin.name, None)
+        envoye = 0
+        with open(chemin, "rb") as fichier:
+            fichier.seek(debut)
+            while bloc := fichier.read(256 * 1024):
+                if limite is not None and envoye + len(bloc) > limite:
+                    bloc = bloc[:limite - envoye]
+                self.wfile.write(bloc)
+                envoye += len(bloc)
+                if self.debit:
+                    time.sleep(len(bloc) / self.debit)
+                if limite is not None and envoye >= limite:
+                    self.close_connection = True
+                    break
+        self.journal.append((chemin.name, statut, envoye))
+
+
+def serveur_local(racine: Path, debit_mo_s: float = None):
+    """Démarre le serveur de substitution sur un port libre : (serveur, url_de_base)"""
+    gestionnaire = type("Gestionnaire", (_Gestionnaire,),
+                        {"racine": Path(racine), "debit": debit_mo_s and debit_mo_s * 1024 * 1024,
+                         "couper": {}, "journal": []})
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), gestionnaire)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur, f"http://127.0.0.1:{serveur.server_port}"
+
+
+def verifier_telechargements(taille_mo: float = 16, debit_mo_s: float = 8) -> list:
+    """
+    Scénarios contre le serveur local (3 fichiers de taille_mo, débit limité
+    par connexion) : séquentiel vs simultané, second passage conditionnel,
+    reprise après coupure. Lève AssertionError si un fichier diffère de la source.
+    """
+    import hashlib
+    import os
+    import tempfile
+
+    lignes = []
+    with tempfile.TemporaryDirectory() as temporaire:
+        source, cible = Path(temporaire, "source"), Path(temporaire, "cible")
+        source.mkdir()
+        noms = ["tests", "hospitalisations", "vaccination"]
+        for nom in noms:
+            (source / f"{nom}.csv").write_bytes(os.urandom(int(taille_mo * 1024 * 1024)))
+        empreinte = lambda chemin: hashlib.sha256(chemin.read_bytes()).hexdigest()
+
+        serveur, base = serveur_local(source, debit_mo_s)
+        journal = serveur.RequestHandlerClass.journal
+        sources = {nom: (f"{base}/{nom}.csv", f"{nom}.csv") for nom in noms}
+
+        def scenario(intitule: str, simultanes: int, forcer: bool) -> None:
+            journal.clear()
+            debut = time.perf_counter()
+            ordre = [nom for nom, _, _ in telecharger_en_parallele(sources, cible, forcer, simultanes)]
+            for nom in noms:
+                assert empreinte(cible / f"{nom}.csv") == empreinte(source / f"{nom}.csv"), nom
+            lignes.append({"scenario": intitule, "duree_s": round(time.perf_counter() - debut, 2),
+                           "statuts": " ".join(str(statut) for _, statut, _ in journal),
+                           "mo_transferes": round(sum(o for _, _, o in journal) / 1024 ** 2, 1),
+                           "ordre_de_fin": " ".join(ordre)})
+
+        try:
+            cible.mkdir()
+            scenario("séquentiel (1 connexion)", 1, True)
+            for fichier in cible.iterdir():
+                fichier.unlink()
+            scenario("simultané (3 connexions)", 3, True)
+            scenario("second passage (conditionnel)", 3, True)
+
+            # Ressource modifiée, transfert coupé à mi-chemin puis repris
+            (source / "tests.csv").write_bytes(os.urandom(int(taille_mo * 1024 * 1024)))
+            serveur.RequestHandlerClass.couper["tests.csv"] = int(taille_mo * 1024 * 1024) // 2
+            try:
+                telecharger_dataset(sources["tests"][0], "tests.csv", cible, forcer=True)
+                raise AssertionError("la coupure aurait dû interrompre le transfert")
+            except requests.RequestException:
+                pass
+            scenario("reprise après coupure (Range)", 3, True)
+        finally:
+            serveur.shutdown()
+    return lignes
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    print("TÉLÉCHARGEMENTS — SERVEUR LOCAL DE SUBSTITUTION")
+    print("=" * 50)
+    print("3 fichiers de 16 Mo, 8 Mo/s par connexion\n")
+    print(pd.DataFrame(verifier_telechargements()).to_string(index=False))
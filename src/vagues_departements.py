@@ -0,0 +1,242 @@
+#  EpiSight — Détection des vagues départementales
+#  Tous les départements en une passe matricielle (dep × jour), seuil proportionnel
+#  à la population, mise à jour incrémentale limitée aux vagues encore ouvertes
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indicators import construire_grille, vers_matrice
+
+# Seuil national (SEUIL_VAGUE = 10 000 cas/jour en MM7 pour 68 M d'habitants)
+# ramené à 100 000 habitants : ≈ 14,7 cas/jour, soit ~103 cas/100k sur 7 jours
+SEUIL_VAGUE_100K = 10_000 / 68_000_000 * 100_000
+DUREE_MIN_VAGUE = 14            # jours, comme au niveau national
+
+COLONNES = ['dep', 'debut', 'fin', 'pic', 'pic_cas', 'duree_jours', 'ouverte']
+COLONNES_DEP = ['dep', 'jour', 'population', 'cas_mm7_dep']
+
+
+def detecter_vagues_dep(tests_dep: pd.DataFrame, reprises: dict = None,
+                        premier_jour=None) -> pd.DataFrame:
+    """
+    Vagues de tous les départements en une passe : une vague = jours consécutifs
+    où cas_mm7_dep dépasse SEUIL_VAGUE_100K × population / 100 000.
+
+    - tests_dep    : colonnes COLONNES_DEP (tests_par_dep)
+    - reprises     : {dep: jour} en mode incrémental, les lignes antérieures sont
+                     ignorées (début d'une vague ouverte, sinon premier_jour)
+
+    Retourne une ligne par vague (dep, debut, fin, pic, pic_cas, duree_jours, ouverte).
+    Une vague ouverte touche le dernier jour : elle est conservée quelle que soit
+    sa durée, les jours suivants pouvant la prolonger ; une vague close n'est
+    conservée que si elle dure au moins DUREE_MIN_VAGUE jours.
+    """
+    if tests_dep.empty:
+        return pd.DataFrame(columns=COLONNES)
+    deps, jours, i, j = construire_grille(tests_dep)
+    forme = (len(deps), len(jours))
+    mm7 = vers_matrice(tests_dep['cas_mm7_dep'].to_numpy(dtype=float), i, j, forme)
+    population = np.zeros(len(deps))
+    population[i] = tests_dep['population'].to_numpy(dtype=float)
+
+    # NaN (jour absent) > seuil vaut False : un trou interrompt la vague
+    with np.errstate(invalid='ignore'):
+        en_vague = mm7 > (population * SEUIL_VAGUE_100K / 100_000)[:, None]
+    if reprises is not None:
+        # Conversion avant fillna : sans vague ouverte, map ne donne que des NaN (object)
+        depart = (pd.to_datetime(pd.Series(deps).map(reprises)).fillna(pd.Timestamp(premier_jour))
+                  .to_numpy().astype('datetime64[D]'))
+        en_vague &= jours.to_numpy().astype('datetime64[D]')[None, :] >= depart[:, None]
+
+    # Débuts et fins (exclues) des séquences : transitions de la matrice bordée de False.
+    # np.nonzero parcourt les lignes dans l'ordre : débuts et fins s'apparient.
+    borde = np.zeros((forme[0], forme[1] + 2), dtype=np.int8)
+    borde[:, 1:-1] = en_vague
+    transitions = np.diff(borde, axis=1)
+    lignes, debuts = np.nonzero(transitions == 1)
+    _, fins = np.nonzero(transitions == -1)
+    longueurs = fins - debuts
+
+    # Pic de chaque vague : maximum par segment de la matrice aplatie (reduceat),
+    # puis premier jour atteignant ce maximum
+    largeur = forme[1] + 1
+    valeurs = np.full((forme[0], largeur), -np.inf)
+    valeurs[:, :-1] = np.where(en_vague, mm7, -np.inf)
+    valeurs = valeurs.ravel()
+    debuts_plats = lignes * largeur + debuts
+    bornes = np.column_stack([debuts_plats, debuts_plats + longueurs]).ravel()
+    pics_cas = np.maximum.reduceat(valeurs, bornes)[::2] if len(bornes) else np.array([])
+
+    segment = np.repeat(np.arange(len(debuts)), longueurs)
+    positions = (np.arange(longueurs.sum()) - np.repeat(np.cumsum(longueurs) - longueurs, longueurs)
+                 + np.repeat(debuts, longueurs))
+    au_pic = valeurs[np.repeat(lignes * largeur, longueurs) + positions] == pics_cas[segment]
+    _, premier_au_pic = np.unique(segment[au_pic], return_index=True)
+    jour_pic = positions[au_pic][premier_au_pic]
+
+    vagues = pd.DataFrame({
+        'dep': deps[lignes],
+        'debut': jours[debuts],
+        'fin': jours[fins - 1],
+        'pic': jours[jour_pic],
+        'pic_cas': pics_cas,
+        'duree_jours': longueurs - 1,
+        'ouverte': fins == forme[1],
+    })
+    gardees = vagues['ouverte'] | (vagues['duree_jours'] >= DUREE_MIN_VAGUE)
+    return vagues[gardees].reset_index(drop=True)
+
+
+def prolonger_vagues_dep(index: pd.DataFrame, tests_dep: pd.DataFrame,
+                         dernier_jour) -> pd.DataFrame:
+    """
+    Mise à jour après ajout de jours postérieurs à dernier_jour :
+    seules les vagues ouvertes (depuis leur début) et les nouveaux jours
+    sont réévalués, les vagues closes sont reprises telles quelles.
+
+    tests_dep doit couvrir au moins [début de la plus ancienne vague ouverte, fin].
+    """
+    ouvertes = index[index['ouverte']]
+    premier_jour = pd.Timestamp(dernier_jour) + pd.Timedelta(days=1)
+    reprises = dict(zip(ouvertes['dep'], ouvertes['debut']))
+    nouvelles = detecter_vagues_dep(tests_dep, reprises, premier_jour)
+    vagues = pd.concat([index[~index['ouverte']], nouvelles], ignore_index=True)
+    return vagues.sort_values(['dep', 'debut']).reset_index(drop=True)
+
+
+def debut_reevaluation(index: pd.DataFrame, dernier_jour) -> pd.Timestamp:
+    """Premier jour à relire pour prolonger l'index : vague ouverte la plus ancienne"""
+    premier_jour = pd.Timestamp(dernier_jour) + pd.Timedelta(days=1)
+    ouvertes = index.loc[index['ouverte'], 'debut']
+    return min(ouvertes.min(), premier_jour) if len(ouvertes) else premier_jour
+
+
+def mettre_a_jour_vagues_dep(dossier_processed: Path, dernier_jour=None) -> pd.DataFrame:
+    """
+    Met à jour la table vagues_departements depuis tests_par_dep :
+    - dernier_jour=None ou index absent : détection sur tout l'historique
+    - sinon : prolongement des vagues ouvertes au dernier jour déjà indexé
+    """
+    from stockage import lire_table, sauvegarder_table
+
+    dossier_processed = Path(dossier_processed)
+    if dernier_jour is None or not (dossier_processed / "vagues_departements.csv").exists():
+        vagues = detecter_vagues_dep(lire_table("tests_par_dep", dossier_processed,
+                                                colonnes=COLONNES_DEP))
+    else:
+        index = lire_table("vagues_departements", dossier_processed)
+        tests_dep = lire_table("tests_par_dep", dossier_processed, colonnes=COLONNES_DEP,
+                               debut=debut_reevaluation(index, dernier_jour))
+        vagues = prolonger_vagues_dep(index, tests_dep, dernier_jour)
+    sauvegarder_table(vagues[COLONNES], "vagues_departements", dossier_processed)
+    return vagues
+
+
+class IndexVagues:
+    """
+    Vagues confirmées (≥ DUREE_MIN_VAGUE jours) par département, en lecture seule :
+    un dictionnaire dep → vagues triées par début, accès en temps constant
+    """
+
+    def __init__(self, vagues: pd.DataFrame):
+        confirmees = vagues[vagues['duree_jours'] >= DUREE_MIN_VAGUE].sort_values(['dep', 'debut'])
+        self._par_dep = {dep: groupe.reset_index(drop=True)
+                         for dep, groupe in confirmees.groupby('dep', sort=False)}
+        self._vide = confirmees.iloc[0:0]
+
+    def __len__(self) -> int:
+        return sum(len(vagues) for vagues in self._par_dep.values())
+
+    def vagues(self, dep: str, debut=None, fin=None) -> pd.DataFrame:
+        """Vagues du département qui chevauchent [debut, fin] (bornes incluses)"""
+        vagues = self._par_dep.get(dep, self._vide)
+        if debut is not None:
+            vagues = vagues[vagues['fin'] >= pd.Timestamp(debut)]
+        if fin is not None:
+            vagues = vagues[vagues['debut'] <= pd.Timestamp(fin)]
+        return vagues
+
+
+#  Vérification
+def reference_pandas(tests_dep: pd.DataFrame) -> pd.DataFrame:
+    """Calcul national (data_loader.detecter_vagues) répété département par département"""
+    resultats = []
+    for dep, serie in tests_dep.sort_values(['dep', 'jour']).groupby('dep'):
+        serie = serie.set_index('jour').asfreq('D').reset_index()  # trous → NaN
+        seuil = serie['population'].max() * SEUIL_VAGUE_100K / 100_000
+        en_vague = serie['cas_mm7_dep'] > seuil
+        groupe = (en_vague != en_vague.shift()).cumsum()
+        for _, vague in serie[en_vague].groupby(groupe[en_vague]):
+            pic = vague.loc[vague['cas_mm7_dep'].idxmax()]
+            resultats.append({'dep': dep, 'debut': vague['jour'].min(), 'fin': vague['jour'].max(),
+                              'pic': pic['jour'], 'pic_cas': pic['cas_mm7_dep'],
+                              'duree_jours': (vague['jour'].max() - vague['jour'].min()).days,
+                              'ouverte': vague['jour'].max() == tests_dep['jour'].max()})
+    vagues = pd.DataFrame(resultats, columns=COLONNES)
+    gardees = vagues['ouverte'] | (vagues['duree_jours'] >= DUREE_MIN_VAGUE)
+    return vagues[gardees].reset_index(drop=True)
+
+
+def verifier_vagues(tests_dep: pd.DataFrame, jours_incrementaux: int = 60,
+                    repetitions: int = 3) -> pd.DataFrame:
+    """
+    - passe matricielle == boucle pandas par département
+    - prolongements jour par jour sur les `jours_incrementaux` derniers jours
+      == détection complète (à chaque jour, pas seulement à la fin)
+    Lève AssertionError sinon ; retourne les temps.
+    """
+    tests_dep = tests_dep[COLONNES_DEP].sort_values(['dep', 'jour']).reset_index(drop=True)
+
+    def chronometrer(calcul) -> tuple:
+        mesures = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            resultat = calcul()
+            mesures.append(time.perf_counter() - debut)
+        return min(mesures), resultat
+
+    def identiques(a: pd.DataFrame, b: pd.DataFrame, contexte: str) -> None:
+        a, b = (v.sort_values(['dep', 'debut']).reset_index(drop=True) for v in (a, b))
+        pd.testing.assert_frame_equal(a, b, check_dtype=False, obj=contexte)
+
+    duree_ref, reference = chronometrer(lambda: reference_pandas(tests_dep))
+    duree_mat, complet = chronometrer(lambda: detecter_vagues_dep(tests_dep))
+    identiques(complet, reference, "matrice vs pandas")
+
+    jours = np.sort(tests_dep['jour'].unique())
+    index = detecter_vagues_dep(tests_dep[tests_dep['jour'] <= jours[-jours_incrementaux - 1]])
+    durees = []
+    for precedent, jour in zip(jours[-jours_incrementaux - 1:-1], jours[-jours_incrementaux:]):
+        visibles = tests_dep[tests_dep['jour'] <= jour]
+        relues = visibles[visibles['jour'] >= debut_reevaluation(index, precedent)]
+        debut = time.perf_counter()
+        index = prolonger_vagues_dep(index, relues, precedent)
+        durees.append(time.perf_counter() - debut)
+        identiques(index, detecter_vagues_dep(visibles), f"prolongement au {pd.Timestamp(jour).date()}")
+
+    return pd.DataFrame([
+        {"calcul": "pandas (boucle par département)", "temps_s": round(duree_ref, 4)},
+        {"calcul": "numpy (matrice dep × jour)", "temps_s": round(duree_mat, 4)},
+        {"calcul": "prolongement d'un jour (médiane)", "temps_s": round(float(np.median(durees)), 4)},
+    ])
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+    from stockage import lire_table
+
+    PROCESSED = Path(__file__).parent.parent / "data" / "processed"
+    tests_dep = lire_table("tests_par_dep", PROCESSED, colonnes=COLONNES_DEP)
+
+    print("VAGUES DÉPARTEMENTALES — VÉRIFICATION")
+    print("=" * 50)
+    print(verifier_vagues(tests_dep).to_string(index=False))
+
+    vagues = mettre_a_jour_vagues_dep(PROCESSED)
+    confirmees = vagues[vagues['duree_jours'] >= DUREE_MIN_VAGUE]
+    print(f"\n{len(confirmees)} vagues dans {confirmees['dep'].nunique()} départements "
+          f"({vagues['ouverte'].sum()} ouvertes) → vagues_departements")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Les modules de src/ s'importent à plat, comme depuis les scripts et le dashboard
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("prophet")
+
+from backtest import backtester, resumer
+
+
+@pytest.fixture
+def tests_nat():
+    rng = np.random.default_rng(0)
+    t = np.arange(260)
+    cas = 500 + 2 * t + 60 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 20, len(t))
+    return pd.DataFrame({"jour": pd.date_range("2021-01-01", periods=len(t)), "cas_mm7": cas})
+
+
+def test_plis_relus_depuis_le_cache(tests_nat, tmp_path):
+    options = dict(horizon=7, pas_jours=30, min_entrainement=180, n_jobs=1, dossier_cache=tmp_path)
+    premier = backtester(tests_nat, [{}, {"changepoint_prior_scale": 0.5}], **options)
+    assert len(premier) == 2 * 3 and not premier["depuis_cache"].any()
+    assert premier["couverture"].between(0, 100).all()
+
+    second = backtester(tests_nat, [{}, {"changepoint_prior_scale": 0.5}], **options)
+    assert second["depuis_cache"].all()
+    pd.testing.assert_frame_equal(premier.drop(columns="depuis_cache"), second.drop(columns="depuis_cache"))
+    assert set(resumer(second)["periode"]) == {"hors vague"}
+
+
+def test_historique_trop_court(tests_nat):
+    with pytest.raises(ValueError, match="Historique trop court"):
+        backtester(tests_nat.head(150), n_jobs=1)
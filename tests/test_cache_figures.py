@@ -0,0 +1,43 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from cache_figures import CacheFigures, taille_figure
+
+
+def figure(points: int):
+    x = np.arange(points, dtype=float)
+    return go.Figure(go.Scatter(x=x, y=np.sin(x), name="série"))
+
+
+def test_taille_figure_suit_les_tableaux():
+    petite, grande = taille_figure(figure(1_000)), taille_figure(figure(100_000))
+    assert petite >= 2 * 1_000 * 8
+    assert grande - petite == 2 * 99_000 * 8
+
+
+def test_eviction_lru_par_taille():
+    cache = CacheFigures(taille_max_mo=3.5 * taille_figure(figure(10_000)) / 1024 / 1024)
+    for cle in range(3):
+        cache.obtenir("courbe", (cle,), lambda: figure(10_000))
+    cache.obtenir("courbe", (0,), lambda: figure(10_000))        # 0 redevient la plus récente
+    cache.obtenir("courbe", (3,), lambda: figure(10_000))        # évince 1, la plus ancienne
+    assert len(cache) == 3 and cache.evictions == 1
+    assert cache.taille <= cache.taille_max
+    assert cache.obtenir("courbe", (0,), lambda: None) is not None
+    assert cache.succes["courbe"] == 2
+
+
+def test_version_dans_la_cle():
+    version = {"valeur": "a"}
+    cache = CacheFigures(version=lambda: version["valeur"])
+    construites = []
+
+    @cache.memoiser
+    def courbe(points):
+        construites.append(points)
+        return figure(points)
+
+    courbe(100), courbe(100)
+    version["valeur"] = "b"
+    courbe(100)
+    assert construites == [100, 100]
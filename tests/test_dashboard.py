@@ -0,0 +1,33 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+RACINE = Path(__file__).resolve().parent.parent
+PROCESSED = RACINE / "data" / "processed"
+
+# Le dashboard lit les tables du pipeline : test ignoré tant qu'elles n'ont pas été produites
+pytestmark = pytest.mark.skipif(
+    not all((PROCESSED / f"{nom}.csv").exists() or (PROCESSED / nom).is_dir()
+            for nom in ("indicateurs_tests", "indicateurs_hosp", "tests_par_dep")),
+    reason="données du pipeline absentes (python src/data_loader.py)")
+
+
+@pytest.fixture
+def app():
+    return AppTest.from_file(str(RACINE / "dashboard" / "app.py"), default_timeout=180).run()
+
+
+def test_decalages_sans_donnees_hospitalieres(app):
+    """Période postérieure aux données hospitalières : métriques « — » au lieu d'une exception"""
+    fin = app.date_input(key="periode").max
+    debut_hors_hosp = date(2023, 4, 15)
+    if fin <= debut_hors_hosp:
+        pytest.skip("pas de jours de tests après les données hospitalières")
+    app.date_input(key="periode").set_value((debut_hors_hosp, fin)).run()
+    app.radio(key="onglet").set_value(next(o for o in app.radio(key="onglet").options
+                                           if "Décalages" in o)).run()
+    assert not app.exception
+    assert all(m.value == "—" for m in app.metric if m.label.startswith("Cas →"))
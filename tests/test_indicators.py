@@ -0,0 +1,69 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import calculer_indicateurs_dep, comparer_a_reference, reference_pandas
+
+
+@pytest.fixture
+def tests_dep():
+    """Trois départements sur 20 jours : un jour manquant, un comptage NaN, des jours sans test"""
+    rng = np.random.default_rng(0)
+    jours = pd.date_range("2022-01-01", periods=20)
+    lignes = []
+    for dep, population in [("01", 650_000), ("2A", 160_000), ("75", 2_100_000)]:
+        for jour in jours:
+            total = int(rng.integers(200, 2_000))
+            lignes.append({"dep": dep, "jour": jour, "population": population,
+                           "cas_positifs": float(rng.integers(0, total // 5)), "total_tests": float(total)})
+    tests = pd.DataFrame(lignes)
+    tests = tests[~((tests["dep"] == "01") & (tests["jour"] == jours[9]))]
+    tests.loc[(tests["dep"] == "2A") & (tests["jour"] == jours[5]), "cas_positifs"] = np.nan
+    sans_test = (tests["dep"] == "75") & tests["jour"].isin(jours[:3])
+    tests.loc[sans_test, ["cas_positifs", "total_tests"]] = 0.0
+    # Ordre des lignes mélangé : le moteur doit le conserver
+    return tests.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def test_moteur_egal_a_la_reference_pandas(tests_dep):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        temps = comparer_a_reference(tests_dep, repetitions=1)
+    assert len(temps) == 2
+
+
+def test_ordre_des_lignes_conserve(tests_dep):
+    resultat = calculer_indicateurs_dep(tests_dep)
+    pd.testing.assert_frame_equal(resultat[tests_dep.columns], tests_dep)
+
+
+def test_jour_manquant_hors_fenetre(tests_dep):
+    resultat = calculer_indicateurs_dep(tests_dep).set_index(["dep", "jour"]).sort_index()
+    serie = resultat.loc["01"]
+    # Le 2022-01-16 couvre du 10 au 16 : le 10 manque, la fenêtre n'a que 6 jours
+    jour = pd.Timestamp("2022-01-16")
+    fenetre = serie.loc[jour - pd.Timedelta(days=6):jour, "cas_positifs"]
+    assert len(fenetre) == 6
+    assert serie.loc[jour, "cas_7j"] == fenetre.sum()
+    assert serie.loc[jour, "cas_mm7_dep"] == round(fenetre.mean(), 1)
+
+
+def test_comptage_nan_ignore(tests_dep):
+    resultat = calculer_indicateurs_dep(tests_dep).set_index(["dep", "jour"]).sort_index()
+    serie = resultat.loc["2A"]
+    jour = pd.Timestamp("2022-01-07")
+    fenetre = serie.loc[:jour, "cas_positifs"]
+    assert fenetre.isna().sum() == 1
+    assert serie.loc[jour, "cas_7j"] == fenetre.sum()
+    assert serie.loc[jour, "cas_mm7_dep"] == round(fenetre.mean(), 1)
+
+
+def test_positivite_nulle_sans_test(tests_dep):
+    resultat = calculer_indicateurs_dep(tests_dep)
+    reference = reference_pandas(tests_dep)
+    for tableau in (resultat, reference):
+        debut = tableau[(tableau["dep"] == "75") & (tableau["jour"] < "2022-01-04")]
+        assert (debut["taux_positivite_7j"] == 0).all()
+        assert (debut["cas_7j"] == 0).all()
@@ -0,0 +1,90 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("prophet")
+
+from predictions import (ECHANTILLONS_INCERTITUDE, TOLERANCE_BORNES, creer_modele,
+                         extraire_predictions_futures, predire_horizon, preparer_donnees_prophet,
+                         prevoir_prophet, verifier_horizon)
+
+logging.getLogger("cmdstanpy").disabled = True
+
+JOURS_PREDICTION = 28
+
+
+@pytest.fixture(scope="module")
+def tests_nat():
+    """Un an et demi de cas : tendance, saisonnalités annuelle et hebdomadaire, bruit à graine fixe"""
+    rng = np.random.default_rng(0)
+    t = np.arange(540)
+    cas = (1_000 + t + 300 * np.sin(2 * np.pi * t / 365) + 80 * np.sin(2 * np.pi * t / 7)
+           + rng.normal(0, 40, len(t)))
+    return pd.DataFrame({"jour": pd.date_range("2021-01-01", periods=len(t)), "cas_mm7": cas})
+
+
+@pytest.fixture(scope="module")
+def modele_et_reference(tests_nat):
+    """Modèle ajusté une fois et prédiction complète (make_future_dataframe + predict), graine 0"""
+    df_prophet = preparer_donnees_prophet(tests_nat)
+    modele = creer_modele(uncertainty_samples=ECHANTILLONS_INCERTITUDE)
+    modele.fit(df_prophet)
+    np.random.seed(0)
+    reference = extraire_predictions_futures(
+        modele.predict(modele.make_future_dataframe(periods=JOURS_PREDICTION)),
+        df_prophet["ds"].max()).reset_index(drop=True)
+    return modele, df_prophet["ds"].max(), reference
+
+
+def ecart_bornes(horizon, reference):
+    """Plus grand écart des bornes, en fraction de la largeur de l'intervalle de référence"""
+    largeur = np.maximum(reference["borne_haute"] - reference["borne_basse"], 1.0)
+    ecarts = (horizon[["borne_basse", "borne_haute"]] - reference[["borne_basse", "borne_haute"]]).abs()
+    return float((ecarts.max(axis=1) / largeur).max())
+
+
+@pytest.mark.parametrize("echantillons", [1000, 200])
+def test_horizon_egal_a_la_prediction_complete(modele_et_reference, echantillons):
+    modele, derniere_date, reference = modele_et_reference
+    np.random.seed(1)
+    horizon = predire_horizon(modele, derniere_date, JOURS_PREDICTION, echantillons).reset_index(drop=True)
+
+    assert (horizon["date"].to_numpy() == reference["date"].to_numpy()).all()
+    # Prédiction centrale déterministe : égale au pas d'arrondi près
+    assert (horizon["prediction"] - reference["prediction"]).abs().max() <= 1
+    assert ecart_bornes(horizon, reference) <= TOLERANCE_BORNES * np.sqrt(ECHANTILLONS_INCERTITUDE / echantillons)
+
+
+def test_tolerance_au_dela_du_bruit_entre_graines(modele_et_reference):
+    """La tolérance couvre l'écart entre deux prédictions complètes de graines différentes, sans le noyer"""
+    modele, derniere_date, reference = modele_et_reference
+    ecarts = []
+    for graine in (1, 2, 3):
+        np.random.seed(graine)
+        complete = extraire_predictions_futures(
+            modele.predict(modele.make_future_dataframe(periods=JOURS_PREDICTION)), derniere_date)
+        ecarts.append(ecart_bornes(complete.reset_index(drop=True), reference))
+    assert 0 < max(ecarts) <= TOLERANCE_BORNES <= 2.5 * max(ecarts)
+
+
+def test_sans_tirage_bornes_nan(modele_et_reference):
+    modele, derniere_date, reference = modele_et_reference
+    horizon = predire_horizon(modele, derniere_date, JOURS_PREDICTION, echantillons=0)
+    assert horizon[["borne_basse", "borne_haute"]].isna().all().all()
+    assert (horizon["prediction"].to_numpy() == reference["prediction"].to_numpy()).all()
+    assert modele.uncertainty_samples == ECHANTILLONS_INCERTITUDE
+
+
+def test_fenetre_jours(tests_nat):
+    prediction, durees = prevoir_prophet(tests_nat, 7, echantillons=0, fenetre_jours=120)
+    assert durees["jours_entrainement"] == 120
+    assert len(prediction) == 7
+    assert prediction["date"].min() == tests_nat["jour"].max() + pd.Timedelta(days=1)
+
+
+def test_verifier_horizon(tests_nat):
+    rapport = verifier_horizon(tests_nat, jours_prediction=JOURS_PREDICTION, echantillons=(1000, 0))
+    assert rapport["conforme"].all()
+    assert pd.isna(rapport["ecart_bornes"].iloc[-1])
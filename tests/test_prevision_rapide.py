@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from predictions import predire
+from prevision_rapide import prevoir, prevoir_departements
+
+
+def serie(valeurs, debut="2022-01-01"):
+    return pd.DataFrame({"jour": pd.date_range(debut, periods=len(valeurs)), "tp_mm7": valeurs})
+
+
+def test_taux_arrondi_au_centieme():
+    t = np.arange(120)
+    tests_nat = serie(8 + 2 * np.sin(2 * np.pi * t / 7) + t / 50)
+    prediction = predire(tests_nat, 7, colonne="tp_mm7", moteur="holt_winters")
+    # Un taux en % garde ses décimales (DECIMALES), il n'est pas arrondi à l'unité
+    assert (prediction["prediction"] % 1 != 0).any()
+    pd.testing.assert_frame_equal(prediction[["prediction", "borne_basse", "borne_haute"]],
+                                  prediction[["prediction", "borne_basse", "borne_haute"]].round(2))
+
+
+def test_arrondi_unite_par_defaut():
+    prediction = prevoir(serie(np.linspace(10.3, 20.7, 60)), 7, colonne="tp_mm7")
+    assert (prediction["prediction"] % 1 == 0).all()
+
+
+def test_departements_decimales():
+    tests_dep = pd.concat([serie(np.linspace(5.1, 9.9, 60)).assign(dep=dep) for dep in ("01", "02")])
+    predictions = prevoir_departements(tests_dep, 7, colonne="tp_mm7", decimales=2)
+    assert list(predictions["dep"].unique()) == ["01", "02"]
+    assert (predictions["prediction"] % 1 != 0).any()
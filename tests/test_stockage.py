@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+from stockage import ecrire_parquet, sauvegarder_table, version_donnees
+
+
+def toucher(chemin, decalage_ns=1_000_000_000):
+    """Date de modification avancée : deux écritures rapprochées restent distinguables"""
+    stat = chemin.stat()
+    os.utime(chemin, ns=(stat.st_atime_ns, stat.st_mtime_ns + decalage_ns))
+
+
+def test_version_suit_les_donnees_du_dashboard(tmp_path):
+    tests_nat = pd.DataFrame({"jour": pd.date_range("2022-01-01", periods=3), "cas_mm7": [1.0, 2.0, 3.0]})
+    sauvegarder_table(tests_nat, "indicateurs_tests", tmp_path)
+    version = version_donnees(tmp_path)
+    assert version == version_donnees(tmp_path)
+
+    # Fichiers que le dashboard ne lit pas : pas d'invalidation des caches
+    (tmp_path / "banc_de_charge.json").write_text("{}")
+    (tmp_path / "brouillon.csv").write_text("a\n1\n")
+    assert version_donnees(tmp_path) == version
+
+    (tmp_path / "predictions_7j.csv").write_text("date,prediction\n")
+    avec_predictions = version_donnees(tmp_path)
+    assert avec_predictions != version
+
+    (tmp_path / "previsions").mkdir()
+    avec_lots = version_donnees(tmp_path)
+    assert avec_lots != avec_predictions
+    (tmp_path / "previsions" / "previsions_1.parquet").write_bytes(b"")
+    toucher(tmp_path / "previsions")
+    assert version_donnees(tmp_path) != avec_lots
+
+
+def test_version_suit_les_tables(tmp_path):
+    tests_nat = pd.DataFrame({"jour": pd.date_range("2022-01-01", periods=3), "cas_mm7": [1.0, 2.0, 3.0]})
+    sauvegarder_table(tests_nat, "indicateurs_tests", tmp_path)
+    version = version_donnees(tmp_path)
+    sauvegarder_table(tests_nat.assign(cas_mm7=10.0), "indicateurs_tests", tmp_path)
+    toucher(tmp_path / "indicateurs_tests.csv")
+    assert version_donnees(tmp_path) != version
+
+    version = version_donnees(tmp_path)
+    chemin = ecrire_parquet(tests_nat, "indicateurs_tests", tmp_path)
+    assert version_donnees(tmp_path) != version
+    version = version_donnees(tmp_path)
+    ecrire_parquet(tests_nat.assign(cas_mm7=0.0), "indicateurs_tests", tmp_path)
+    toucher(chemin)
+    assert version_donnees(tmp_path) != version
@@ -0,0 +1,32 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vagues_departements import SEUIL_VAGUE_100K, detecter_vagues_dep, prolonger_vagues_dep
+
+
+def historique(jours: int):
+    """Deux départements : une vague de 20 jours pour 01, une vague qui reste ouverte pour 02"""
+    calendrier = pd.date_range("2022-01-01", periods=jours)
+    seuil = SEUIL_VAGUE_100K                # population de 100 000 habitants
+    lignes = []
+    for dep, debut, fin in [("01", 10, 30), ("02", 40, None)]:
+        niveau = np.full(jours, 0.5 * seuil)
+        niveau[debut:fin] = 2 * seuil + np.arange(len(niveau[debut:fin])) % 5
+        lignes.append(pd.DataFrame({"dep": dep, "jour": calendrier, "population": 100_000,
+                                    "cas_mm7_dep": niveau}))
+    return pd.concat(lignes, ignore_index=True)
+
+
+@pytest.mark.parametrize("dernier_jour", ["2022-01-31", "2022-02-15"])
+def test_prolongement_egal_a_la_detection_complete(dernier_jour):
+    complet = historique(70)
+    index = detecter_vagues_dep(complet[complet["jour"] <= dernier_jour])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        prolonge = prolonger_vagues_dep(index, complet, dernier_jour)
+    attendu = detecter_vagues_dep(complet).sort_values(["dep", "debut"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(prolonge, attendu)
+    assert list(attendu["dep"]) == ["01", "02"] and attendu["ouverte"].tolist() == [False, True]